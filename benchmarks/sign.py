@@ -0,0 +1,45 @@
+"""
+Signing throughput - batch signing with PrivateKey.sign_many compared
+to per call signing with ecdsa SigningKey.
+
+usage: python -m benchmarks.sign [COUNT]
+"""
+import os
+import sys
+import time
+import hashlib
+
+import ecdsa
+from ecdsa.util import sigencode_der_canonize
+
+from btc_hd_wallet.keys import PrivateKey
+
+
+def main(count: int = 1000) -> None:
+    key = PrivateKey.parse(os.urandom(32))
+    digests = [hashlib.sha256(os.urandom(32)).digest() for _ in range(count)]
+    # warm up generator table
+    key.sign(digests[0])
+
+    start = time.perf_counter()
+    for digest in digests:
+        sk = ecdsa.SigningKey.from_secret_exponent(
+            secexp=key.sec_exp, curve=ecdsa.SECP256k1
+        )
+        sk.sign_digest_deterministic(
+            digest, hashfunc=hashlib.sha256, sigencode=sigencode_der_canonize
+        )
+    per_call = time.perf_counter() - start
+
+    start = time.perf_counter()
+    signatures = key.sign_many(digests)
+    [sig.der() for sig in signatures]
+    batch = time.perf_counter() - start
+
+    print("ecdsa per call: {:>10.1f} sig/s".format(count / per_call))
+    print("sign_many:      {:>10.1f} sig/s".format(count / batch))
+    print("speedup:        {:>10.2f}x".format(per_call / batch))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
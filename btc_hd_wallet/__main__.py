@@ -1,5 +1,7 @@
 import os
 import sys
+import json
+import lzma
 import pathlib
 import argparse
 from argparse import ArgumentParser, Namespace
@@ -7,6 +9,15 @@ from typing import List, Tuple
 
 from btc_hd_wallet.bip39 import CORRECT_MNEMONIC_LENGTH, CORRECT_ENTROPY_BITS
 from btc_hd_wallet.paper_wallet import PaperWallet
+from btc_hd_wallet.planner import DerivationSpec, PURPOSE_GROUPS, parse_fields
+from btc_hd_wallet.checkpoint import manifest_path
+from btc_hd_wallet.compression import (
+    available_codecs, codec_from_path, decompress
+)
+from btc_hd_wallet.shard import (
+    SHARD_SIZE, MERGE_FORMATS, plan_job, run_shards, merge_shards
+)
+from btc_hd_wallet.daemon import CACHE_SIZE, REVERSE_LIMIT, serve
 
 
 def value_in_interval(value: str, min_: int, max_: int, name: str) -> int:
@@ -123,6 +134,80 @@ def entropy_hex(value: str) -> str:
     return value
 
 
+def chains_list(value: str) -> List[int]:
+    """
+    Checks whether comma separated chains are valid (0 or 1).
+
+    :param value: comma separated chains
+    :return: list of chains
+    """
+    try:
+        chains = [int(chain) for chain in value.split(",")]
+    except ValueError:
+        chains = None
+    if not chains or any(chain not in (0, 1) for chain in chains):
+        raise argparse.ArgumentError(
+            argument=None,
+            message="Chains have to be comma separated 0 (external) "
+                    "and/or 1 (internal)"
+        )
+    return chains
+
+
+def derivation_spec(value: str) -> DerivationSpec:
+    """
+    Checks whether derivation specification is valid.
+
+    :param value: specification string PURPOSE:ACCOUNTS:CHAINS:INDEXES
+    :return: derivation specification
+    """
+    try:
+        return DerivationSpec.parse(value)
+    except ValueError as e:
+        raise argparse.ArgumentError(
+            argument=None,
+            message="Invalid derivation specification {}: {}".format(value, e)
+        )
+
+
+def fields_list(value: str) -> Tuple[str, ...]:
+    """
+    Checks whether comma separated row fields are valid.
+
+    :param value: comma separated fields
+    :return: tuple of fields
+    """
+    try:
+        return parse_fields(value)
+    except ValueError as e:
+        raise argparse.ArgumentError(
+            argument=None,
+            message="Invalid fields {}: {}".format(value, e)
+        )
+
+
+def workers_count(value: str) -> int:
+    # at least one worker process (main process itself)
+    name = "Workers count"
+    return value_in_interval(
+        value=value,
+        min_=1,
+        max_=1024,
+        name=name
+    )
+
+
+def shard_size(value: str) -> int:
+    # at least one address index in shard
+    name = "Shard size"
+    return value_in_interval(
+        value=value,
+        min_=1,
+        max_=2 ** 32,
+        name=name
+    )
+
+
 def file_(value: str) -> str:
     """
     File related checks:
@@ -153,25 +238,60 @@ def file_(value: str) -> str:
     return value
 
 
-def paranoia_mode(data: dict) -> dict:
+def resumable_file(value: str) -> str:
     """
-    Strips secret data (mnemonic, password, BIP85, private Keys)
-    from wallet dict.
+    Checks whether checkpointed export file and its manifest exist.
 
-    :param data: source dictionary
-    :return: stripped source dictionary
+    :param value: file path
+    :return: file path
     """
-    return {
-        k: {
-            "account_extended_keys": {
-                "path": v["account_extended_keys"]["path"],
-                "pub": v["account_extended_keys"]["pub"]
-            },
-            "groups": [group[:-1] for group in v["groups"]]
-        }
-        for k, v in data.items()
-        if k in ["BIP44", "BIP49", "BIP84"]
-    }
+    if not os.path.isfile(value) or not os.path.isfile(manifest_path(value)):
+        raise argparse.ArgumentError(
+            argument=None,
+            message="{} is not checkpointed export".format(value)
+        )
+    return value
+
+
+def job_file(value: str) -> dict:
+    """
+    Loads sharded export job file. Compressed job files (.gz, .xz,
+    .bz2, .zst) are decompressed.
+
+    :param value: file path
+    :return: job mapping
+    """
+    try:
+        with open(value, "rb") as f:
+            data = f.read()
+        codec = codec_from_path(value)
+        if codec is not None:
+            data = decompress(codec=codec, data=data)
+        return json.loads(data.decode())
+    except (OSError, EOFError, ValueError, lzma.LZMAError) as e:
+        raise argparse.ArgumentError(
+            argument=None,
+            message="Invalid job file {}: {}".format(value, e)
+        )
+
+
+def specs_from_args(args: Namespace) -> List[DerivationSpec]:
+    """
+    Derivation specifications from --spec or (if not provided)
+    from --account, --interval and --chains for all purposes.
+
+    :param args: parsed arguments
+    :return: derivation specifications
+    """
+    return args.spec or [
+        DerivationSpec(
+            purpose=purpose,
+            accounts=(args.account, args.account + 1),
+            chains=args.chains,
+            interval=args.interval
+        )
+        for purpose in PURPOSE_GROUPS
+    ]
 
 
 def parse_args(args: List[str]) -> Tuple[ArgumentParser, Namespace]:
@@ -181,6 +301,38 @@ def parse_args(args: List[str]) -> Tuple[ArgumentParser, Namespace]:
     parser.add_argument(
         "-f", "--file", type=file_, required=False, help="save to FILE"
     )
+    parser.add_argument(
+        "--compress", type=str, default=None, choices=available_codecs(),
+        help=(
+            "compress output file - default determined by file "
+            "extension (.gz, .xz, .bz2, .zst)"
+        )
+    )
+    parser.add_argument(
+        "--checkpoint", action="store_true",
+        help=(
+            "write address rows to FILE as JSON lines in chunks "
+            "with sidecar manifest - default False"
+        )
+    )
+    parser.add_argument(
+        "--resume", type=resumable_file, default=None, metavar="FILE",
+        help="continue interrupted checkpointed export to FILE"
+    )
+    parser.add_argument(
+        "--shard-plan", type=file_, default=None, metavar="FILE",
+        help=(
+            "save sharded export job (account extended public keys only) "
+            "to FILE instead of generating wallet"
+        )
+    )
+    parser.add_argument(
+        "--shard-size", type=shard_size, default=SHARD_SIZE,
+        help=(
+            "number of address indexes in one shard "
+            "- default {}".format(SHARD_SIZE)
+        )
+    )
     parser.add_argument(
         "--testnet", action="store_true", help="testnet network - default False"
     )
@@ -200,6 +352,32 @@ def parse_args(args: List[str]) -> Tuple[ArgumentParser, Namespace]:
         metavar=("START", "END"),
         help="range of key pairs and addresses to generate - default [0-20]"
     )
+    parser.add_argument(
+        "--chains", type=chains_list, default=[0], metavar="CHAINS",
+        help=(
+            "comma separated chains to generate - 0 external, "
+            "1 internal (change) - default 0"
+        )
+    )
+    parser.add_argument(
+        "--spec", type=derivation_spec, action="append",
+        metavar="PURPOSE:ACCOUNTS:CHAINS:INDEXES",
+        help=(
+            "multi account derivation specification, can be repeated "
+            "(e.g. 84:0-10:0,1:0-20) - overrides --account and --interval"
+        )
+    )
+    parser.add_argument(
+        "--fields", type=fields_list, default=None, metavar="FIELDS",
+        help=(
+            "comma separated address row fields to generate - any of "
+            "path, address, sec, wif - default all"
+        )
+    )
+    parser.add_argument(
+        "--workers", type=workers_count, default=None,
+        help="number of worker processes used with --spec - default serial"
+    )
     # new wallet
     subparsers = parser.add_subparsers(dest="command", title="commands")
     parser_new_wallet = subparsers.add_parser(
@@ -259,12 +437,104 @@ def parse_args(args: List[str]) -> Tuple[ArgumentParser, Namespace]:
         "--password", type=str, required=False, default="",
         help="optional BIP39 password"
     )
+
+    # derivation daemon
+    parser_serve = subparsers.add_parser(
+        "serve",
+        help="run derivation daemon on unix domain socket"
+    )
+    parser_serve.add_argument(
+        "--socket", type=str, required=True, metavar="PATH",
+        help="unix domain socket path"
+    )
+    parser_serve.add_argument(
+        "--cache-size", type=int, default=CACHE_SIZE,
+        help=(
+            "number of recently derived addresses kept for every "
+            "parent node - default {}".format(CACHE_SIZE)
+        )
+    )
+    parser_serve.add_argument(
+        "--reverse-limit", type=int, default=REVERSE_LIMIT,
+        help=(
+            "number of derived addresses kept in reverse index (used by "
+            "lookup) of every parent node - least recently derived are "
+            "dropped first - default {}".format(REVERSE_LIMIT)
+        )
+    )
+
+    # sharded export
+    parser_shard = subparsers.add_parser(
+        "shard",
+        help="run shards of sharded export job"
+    )
+    parser_shard.add_argument("job", type=job_file, help="job file")
+    parser_shard.add_argument(
+        "--dir", type=str, required=True, help="shards directory"
+    )
+    parser_shard.add_argument(
+        "--id", type=int, action="append", dest="shard_ids", metavar="ID",
+        help="shard number to run, can be repeated - default all"
+    )
+    parser_merge = subparsers.add_parser(
+        "merge",
+        help="verify shards and merge them to ordered output"
+    )
+    parser_merge.add_argument("job", type=job_file, help="job file")
+    parser_merge.add_argument(
+        "--dir", type=str, required=True, help="shards directory"
+    )
+    parser_merge.add_argument(
+        "--output", type=file_, required=True, help="merged output file"
+    )
+    parser_merge.add_argument(
+        "--format", type=str, default="jsonl", choices=MERGE_FORMATS,
+        help="jsonl rows or binary SEC key table - default jsonl"
+    )
     return parser, parser.parse_args(args)
 
 
 def main():
     parser, args = parse_args(sys.argv[1:])
 
+    if args.command == "serve":
+        try:
+            serve(
+                socket_path=args.socket,
+                workers=args.workers,
+                cache_size=args.cache_size,
+                reverse_limit=args.reverse_limit
+            )
+        except (ValueError, RuntimeError) as e:
+            parser.error(str(e))
+        return
+    if args.command == "shard":
+        os.makedirs(args.dir, exist_ok=True)
+        try:
+            run_shards(
+                job=args.job,
+                directory=args.dir,
+                shard_ids=args.shard_ids,
+                workers=args.workers
+            )
+        except ValueError as e:
+            parser.error(str(e))
+        return
+    if args.command == "merge":
+        try:
+            summary = merge_shards(
+                job=args.job,
+                directory=args.dir,
+                output=args.output,
+                fmt=args.format,
+                compress=args.compress
+            )
+        except ValueError as e:
+            parser.error(str(e))
+        sys.stdout.write(json.dumps(summary, indent=4))
+        sys.stdout.write(os.linesep)
+        return
+
     if args.command == "new":
         wallet = PaperWallet.new_wallet(
             mnemonic_length=args.mnemonic_len,
@@ -295,12 +565,66 @@ def main():
         parser.print_help()
         parser.exit(status=1)
 
-    data = wallet.generate(account=args.account, interval=args.interval)
-    if args.paranoia:
-        data = paranoia_mode(data=data)
+    # paranoia mode - secret data are never computed
+    private = not args.paranoia
+    if args.paranoia and args.fields and "wif" in args.fields:
+        parser.error("wif field cannot be used with --paranoia")
+    if args.compress and not args.file:
+        parser.error("--compress requires --file")
+    if args.shard_plan:
+        if args.fields and "wif" in args.fields:
+            parser.error("wif field cannot be used with --shard-plan")
+        try:
+            job = plan_job(
+                wallet=wallet,
+                specs=specs_from_args(args),
+                shard_size=args.shard_size,
+                fields=args.fields
+            )
+        except ValueError as e:
+            parser.error(str(e))
+        wallet.export_to_file(
+            file_path=args.shard_plan,
+            contents=json.dumps(job, indent=4)
+        )
+        return
+    if args.resume:
+        if args.file:
+            parser.error("--resume cannot be used with --file")
+        wallet.resume_export(file_path=args.resume, workers=args.workers)
+        return
+    if args.checkpoint:
+        if not args.file:
+            parser.error("--checkpoint requires --file")
+        wallet.export_checkpointed(
+            file_path=args.file,
+            specs=specs_from_args(args),
+            workers=args.workers,
+            private=private,
+            fields=args.fields,
+            compress=args.compress
+        )
+        return
+    if args.spec:
+        data = wallet.plan(
+            specs=args.spec,
+            workers=args.workers,
+            private=private,
+            fields=args.fields
+        )
+    else:
+        data = wallet.generate(
+            account=args.account,
+            interval=args.interval,
+            chains=args.chains,
+            private=private,
+            fields=args.fields
+        )
 
     if args.file:
-        wallet.export_wallet(file_path=args.file, data=data)
+        wallet.export_wallet(
+            file_path=args.file, data=data, compress=args.compress
+        )
     else:
         wallet.pprint(data=data)
 
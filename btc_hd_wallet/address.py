@@ -0,0 +1,221 @@
+from typing import Dict, Iterable, List, Optional
+
+from btc_hd_wallet import bech32
+from btc_hd_wallet.helper import BASE58_ALPHABET, decode_base58_checksum
+
+
+# base58 version byte -> (network, script type). Regtest and signet share
+# testnet version bytes - such addresses are reported as testnet
+BASE58_VERSIONS = {
+    0x00: ("mainnet", "p2pkh"),
+    0x05: ("mainnet", "p2sh"),
+    0x6f: ("testnet", "p2pkh"),
+    0xc4: ("testnet", "p2sh"),
+}
+# first characters of base58 addresses with above version bytes
+BASE58_LEADING = frozenset("13mn2")
+BASE58_CHARSET = frozenset(BASE58_ALPHABET)
+# length of base58 address of version byte + 20 byte hash + checksum
+BASE58_LENGTH = (26, 35)
+# bech32 human readable part -> network (signet shares testnet hrp)
+BECH32_HRPS = {
+    "bc": "mainnet",
+    "tb": "testnet",
+    "bcrt": "regtest",
+}
+BECH32_CHARSET = frozenset(bech32.CHARSET)
+# shortest (2 byte program) and longest bech32 segwit address
+BECH32_LENGTH = (14, 90)
+NETWORKS = ("mainnet", "testnet", "regtest")
+# (witness version, program length) -> script type
+WITNESS_TYPES = {
+    (0, 20): "p2wpkh",
+    (0, 32): "p2wsh",
+    (1, 32): "p2tr",
+}
+
+
+class DecodedAddress(object):
+
+    __slots__ = (
+        "address",
+        "network",
+        "script_type",
+        "witness_version",
+        "program"
+    )
+
+    def __init__(self, address: str, network: str, script_type: str,
+                 program: bytes, witness_version: int = None):
+        """
+        Initializes decoded address.
+
+        :param address: bitcoin address
+        :param network: one of mainnet, testnet, regtest
+        :param script_type: p2pkh, p2sh, p2wpkh, p2wsh, p2tr
+                            or witness_unknown
+        :param program: hash160 (base58) or witness program (bech32)
+        :param witness_version: witness version (default=None - base58)
+        """
+        self.address = address
+        self.network = network
+        self.script_type = script_type
+        self.program = program
+        self.witness_version = witness_version
+
+    def __eq__(self, other: "DecodedAddress") -> bool:
+        return self.address == other.address and \
+            self.network == other.network and \
+            self.script_type == other.script_type and \
+            self.program == other.program and \
+            self.witness_version == other.witness_version
+
+    def __repr__(self) -> str:
+        return "{} {} {}".format(self.network, self.script_type, self.address)
+
+    @property
+    def testnet(self) -> bool:
+        return self.network != "mainnet"
+
+    def script_pubkey(self) -> bytes:
+        """
+        Raw scriptPubKey (without length prefix) paying to address.
+
+        :return: raw scriptPubKey
+        """
+        if self.script_type == "p2pkh":
+            return b"\x76\xa9\x14" + self.program + b"\x88\xac"
+        if self.script_type == "p2sh":
+            return b"\xa9\x14" + self.program + b"\x87"
+        # OP_0 or OP_1 - OP_16 followed by program push
+        op = 0x50 + self.witness_version if self.witness_version else 0
+        return bytes([op, len(self.program)]) + self.program
+
+
+def decode_base58_address(address: str) -> DecodedAddress:
+    """
+    Decodes base58 (p2pkh or p2sh) address. Length, leading character
+    and charset are checked before checksum is calculated.
+
+    :param address: base58 address
+    :return: decoded address
+    """
+    if not BASE58_LENGTH[0] <= len(address) <= BASE58_LENGTH[1]:
+        raise ValueError("invalid base58 address length")
+    if address[0] not in BASE58_LEADING:
+        raise ValueError("unknown base58 address prefix")
+    if not BASE58_CHARSET.issuperset(address):
+        raise ValueError("invalid base58 character")
+    data = decode_base58_checksum(s=address)
+    if len(data) != 21:
+        raise ValueError("invalid base58 address payload length")
+    try:
+        network, script_type = BASE58_VERSIONS[data[0]]
+    except KeyError:
+        raise ValueError(
+            "unknown base58 address version {}".format(data[0])
+        )
+    return DecodedAddress(
+        address=address,
+        network=network,
+        script_type=script_type,
+        program=data[1:]
+    )
+
+
+def decode_bech32_address(address: str) -> DecodedAddress:
+    """
+    Decodes bech32 (witness v0) or bech32m (witness v1+) address.
+    Length, human readable part and charset are checked before
+    checksum is calculated.
+
+    :param address: bech32/bech32m address
+    :return: decoded address
+    """
+    if not BECH32_LENGTH[0] <= len(address) <= BECH32_LENGTH[1]:
+        raise ValueError("invalid bech32 address length")
+    lower = address.lower()
+    if lower != address and address.upper() != address:
+        raise ValueError("mixed case bech32 address")
+    pos = lower.rfind("1")
+    hrp = lower[:pos]
+    if hrp not in BECH32_HRPS:
+        raise ValueError("unknown bech32 human readable part")
+    if not BECH32_CHARSET.issuperset(lower[pos + 1:]):
+        raise ValueError("invalid bech32 character")
+    witver, program = bech32.decode(hrp=hrp, addr=lower)
+    if witver is None:
+        raise ValueError("invalid bech32 address")
+    program = bytes(program)
+    return DecodedAddress(
+        address=address,
+        network=BECH32_HRPS[hrp],
+        script_type=WITNESS_TYPES.get(
+            (witver, len(program)), "witness_unknown"
+        ),
+        program=program,
+        witness_version=witver
+    )
+
+
+def decode_address(address: str, network: str = None) -> DecodedAddress:
+    """
+    Decodes bitcoin address of any standard type and network. Encoding
+    is chosen by prefix - base58 addresses of known versions never start
+    with "bc1", "tb1" or "bcrt1".
+
+    :param address: bitcoin address
+    :param network: required network - one of mainnet, testnet, regtest
+                    (default=None - any). Base58 regtest addresses
+                    are accepted as testnet.
+    :return: decoded address
+    """
+    if network is not None and network not in NETWORKS:
+        raise ValueError(
+            "unknown network {}. Allowed {}".format(network, list(NETWORKS))
+        )
+    if not isinstance(address, str) or not address:
+        raise ValueError("address has to be non-empty string")
+    prefix = address[:5].lower()
+    if prefix.startswith(("bc1", "tb1", "bcrt1")):
+        decoded = decode_bech32_address(address)
+    else:
+        decoded = decode_base58_address(address)
+    if network is not None and decoded.network != network and \
+            not (network == "regtest" and decoded.witness_version is None
+                 and decoded.network == "testnet"):
+        raise ValueError(
+            "{} address on {} network".format(decoded.network, network)
+        )
+    return decoded
+
+
+def decode_many(addresses: Iterable[str],
+                network: str = None) -> List[Optional[DecodedAddress]]:
+    """
+    Decodes many addresses - invalid ones are reported as None instead
+    of raising. Repeated addresses are decoded only once.
+
+    :param addresses: bitcoin addresses
+    :param network: required network (default=None - any)
+    :return: decoded address or None for every address
+    """
+    if network is not None and network not in NETWORKS:
+        raise ValueError(
+            "unknown network {}. Allowed {}".format(network, list(NETWORKS))
+        )
+    seen = {}  # type: Dict[str, Optional[DecodedAddress]]
+    result = []
+    for address in addresses:
+        if not isinstance(address, str):
+            result.append(None)
+            continue
+        if address not in seen:
+            try:
+                seen[address] = decode_address(
+                    address=address, network=network
+                )
+            except ValueError:
+                seen[address] = None
+        result.append(seen[address])
+    return result
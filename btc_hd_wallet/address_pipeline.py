@@ -0,0 +1,218 @@
+import hashlib
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Tuple, Iterable, Iterator
+
+from btc_hd_wallet.helper import (
+    h160_to_p2pkh_address, h160_to_p2sh_address, h160_to_p2wpkh_address,
+    h256_to_p2wsh_address, xonly_to_p2tr_address
+)
+from btc_hd_wallet.keys import taproot_tweak_many
+from btc_hd_wallet.bip32 import PubKeyNode
+from btc_hd_wallet.script import (
+    P2WPKH_TEMPLATE, P2WSH_TEMPLATE, MULTISIG_1OF1_TEMPLATE
+)
+
+
+SEC_LENGTH = 33
+
+# number of children derived by one worker task
+CHUNK_SIZE = 5000
+
+# order of programs emitted by pipeline
+SCRIPT_TYPES = (
+    "p2pkh",
+    "p2wpkh",
+    "p2sh_p2wpkh",
+    "p2wsh",
+    "p2sh_p2wsh"
+)
+
+ADDRESS_ENCODERS = {
+    "p2pkh": h160_to_p2pkh_address,
+    "p2wpkh": h160_to_p2wpkh_address,
+    "p2sh_p2wpkh": h160_to_p2sh_address,
+    "p2wsh": h256_to_p2wsh_address,
+    "p2sh_p2wsh": h160_to_p2sh_address,
+    "p2tr": xonly_to_p2tr_address,
+}
+
+
+def sec_buffer(keys: Iterable[bytes]) -> bytes:
+    """
+    Packs SEC encoded (compressed) public keys to one contiguous buffer.
+
+    :param keys: SEC encoded public keys
+    :return: contiguous buffer of keys
+    """
+    buffer = b"".join(keys)
+    if len(buffer) % SEC_LENGTH:
+        raise ValueError("only compressed SEC public keys are supported")
+    return buffer
+
+
+def iter_sec(buffer: bytes) -> Iterator[memoryview]:
+    """
+    Iterates over contiguous buffer of SEC public keys without copying.
+
+    :param buffer: contiguous buffer of keys
+    :return: SEC public key views
+    """
+    view = memoryview(buffer)
+    for i in range(0, len(view), SEC_LENGTH):
+        yield view[i:i + SEC_LENGTH]
+
+
+def derive_sec_chunk(task: Tuple[bytes, bytes, bool, tuple]) -> bytes:
+    """
+    Derives children of public key node and packs their public keys
+    to contiguous buffer.
+
+    :param task: node key, chain code, testnet and interval
+    :return: contiguous buffer of SEC public keys ordered by index
+    """
+    key, chain_code, testnet, interval = task
+    node = PubKeyNode(key=key, chain_code=chain_code, testnet=testnet)
+    return sec_buffer(
+        node.ckd(index=i).key for i in range(*interval)
+    )
+
+
+def derive_sec_buffers(nodes: List[PubKeyNode], interval: tuple,
+                       workers: int = None,
+                       chunk_size: int = CHUNK_SIZE,
+                       executor: Executor = None) -> List[bytes]:
+    """
+    Derives children of many public key nodes in batch. Interval is split
+    into chunks, chunks of all nodes are executed either serially or
+    on process pool.
+
+    :param nodes: public key nodes (usually chain nodes)
+    :param interval: interval of child indexes
+    :param workers: number of worker processes (default=None - serial)
+    :param chunk_size: number of children derived by one task
+                        (default=CHUNK_SIZE)
+    :param executor: already running executor to use instead of
+                        creating process pool (default=None)
+    :return: contiguous buffer of SEC public keys for each node
+    """
+    start, end = interval
+    chunks = [
+        (i, min(i + chunk_size, end))
+        for i in range(start, end, chunk_size)
+    ]
+    if not chunks:
+        return [b"" for _ in nodes]
+    tasks = [
+        (node.key, node.chain_code, node.testnet, chunk)
+        for node in nodes
+        for chunk in chunks
+    ]
+    if executor is not None and len(tasks) > 1:
+        results = list(executor.map(derive_sec_chunk, tasks))
+    elif workers and workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(derive_sec_chunk, tasks))
+    else:
+        results = [derive_sec_chunk(task) for task in tasks]
+    return [
+        b"".join(results[i:i + len(chunks)])
+        for i in range(0, len(results), len(chunks))
+    ]
+
+
+def script_programs(buffer: bytes,
+                    script_types: Tuple[str, ...] = SCRIPT_TYPES
+                    ) -> List[Tuple[bytes, ...]]:
+    """
+    Computes script programs for each key in contiguous buffer of SEC
+    public keys in one pass. Programs are hash160 for p2pkh/p2wpkh,
+    hash160 of redeem script for p2sh wrapped types and sha256 of witness
+    script for p2wsh. Scripts are built by splicing key (or hash) bytes
+    into constant templates - no Script objects are created. Program
+    for p2tr (not in default script types) is BIP86 tweaked x-only output
+    key - all keys are tweaked in one batch.
+
+    Witness script is 1 of 1 multisig [OP_1, sec, OP_1, OP_CHECKMULTISIG]
+    same as in BaseWallet.p2wsh_address.
+
+    :param buffer: contiguous buffer of SEC public keys
+    :param script_types: script types to compute and their order
+                            (default=SCRIPT_TYPES)
+    :return: tuple of programs (ordered as script_types) for each key
+    """
+    for script_type in script_types:
+        if script_type not in ADDRESS_ENCODERS:
+            raise ValueError("Unsupported script type {}".format(script_type))
+    need_h160 = {"p2pkh", "p2wpkh", "p2sh_p2wpkh"}.intersection(script_types)
+    need_wsh = {"p2wsh", "p2sh_p2wsh"}.intersection(script_types)
+    sha256 = hashlib.sha256
+    new = hashlib.new
+    wpkh_prefix = P2WPKH_TEMPLATE[0]
+    wsh_prefix = P2WSH_TEMPLATE[0]
+    ms_prefix, ms_suffix = MULTISIG_1OF1_TEMPLATE
+    if "p2tr" in script_types:
+        tweaked = iter(taproot_tweak_many(sec[1:] for sec in iter_sec(buffer)))
+    result = []
+    for sec in iter_sec(buffer):
+        programs = {}
+        if "p2tr" in script_types:
+            programs["p2tr"] = next(tweaked)
+        if need_h160:
+            h160 = new("ripemd160", sha256(sec).digest()).digest()
+            programs["p2pkh"] = programs["p2wpkh"] = h160
+            if "p2sh_p2wpkh" in script_types:
+                programs["p2sh_p2wpkh"] = new(
+                    "ripemd160",
+                    sha256(wpkh_prefix + h160).digest()
+                ).digest()
+        if need_wsh:
+            h256 = sha256(ms_prefix + sec + ms_suffix).digest()
+            programs["p2wsh"] = h256
+            if "p2sh_p2wsh" in script_types:
+                programs["p2sh_p2wsh"] = new(
+                    "ripemd160",
+                    sha256(wsh_prefix + h256).digest()
+                ).digest()
+        result.append(tuple(programs[t] for t in script_types))
+    return result
+
+
+def program_to_address(script_type: str, program: bytes,
+                       testnet: bool = False) -> str:
+    """
+    Encodes script program to address.
+
+    :param script_type: script type - one of SCRIPT_TYPES
+    :param program: script program (hash)
+    :param testnet: whether to encode as a testnet address (default=False)
+    :return: bitcoin address
+    """
+    try:
+        encoder = ADDRESS_ENCODERS[script_type]
+    except KeyError:
+        raise ValueError("Unsupported script type {}".format(script_type))
+    return encoder(program, testnet=testnet)
+
+
+def addresses(buffer: bytes, script_type: str = "p2wpkh",
+              testnet: bool = False) -> List[str]:
+    """
+    Generates addresses of one script type for contiguous buffer
+    of SEC public keys.
+
+    :param buffer: contiguous buffer of SEC public keys
+    :param script_type: script type - one of SCRIPT_TYPES (default=p2wpkh)
+    :param testnet: whether to encode as a testnet address (default=False)
+    :return: list of addresses
+    """
+    return [
+        program_to_address(
+            script_type=script_type,
+            program=programs[0],
+            testnet=testnet
+        )
+        for programs in script_programs(
+            buffer=buffer,
+            script_types=(script_type,)
+        )
+    ]
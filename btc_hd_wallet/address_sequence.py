@@ -0,0 +1,234 @@
+from collections import OrderedDict
+from collections.abc import Sequence
+from concurrent.futures import Executor
+from typing import Iterator, List, Optional, Union
+
+from btc_hd_wallet.bip32 import (
+    PubKeyNode, Prv_or_PubKeyNode, HARDENED
+)
+from btc_hd_wallet.address_pipeline import (
+    ADDRESS_ENCODERS, addresses, derive_sec_buffers, sec_buffer
+)
+
+
+# number of addresses derived at once when scanning or iterating
+SCAN_CHUNK_SIZE = 1000
+
+
+class AddressSequence(Sequence):
+
+    __slots__ = (
+        "node",
+        "script_type",
+        "testnet",
+        "cache_size",
+        "cache",
+        "reverse",
+        "reverse_limit",
+        "search_limit",
+        "workers",
+        "executor"
+    )
+
+    def __init__(self, node: Prv_or_PubKeyNode, script_type: str = "p2wpkh",
+                 cache_size: int = 1024, reverse_index: bool = False,
+                 reverse_limit: int = None, search_limit: int = 10000,
+                 workers: int = None,
+                 executor: Executor = None):
+        """
+        Initializes random access view over addresses of all non-hardened
+        children of node (usually chain node).
+
+        Children are independent, therefore any index is derived directly
+        and slices are derived in batch. Sequence derives from its own
+        public copy of node (private node is neutered), so that node
+        of the caller is never modified.
+
+        :param node: parent node
+        :param script_type: script type - one of address pipeline
+                            ADDRESS_ENCODERS (default=p2wpkh)
+        :param cache_size: number of recently derived addresses kept
+                            in LRU cache (default=1024)
+        :param reverse_index: whether to record index of every derived
+                            address for index lookups (default=False)
+        :param reverse_limit: maximum number of addresses kept in reverse
+                            index - least recently derived are dropped
+                            first (default=None - unbounded)
+        :param search_limit: maximum number of addresses derived by index
+                            lookup of unknown address (default=10000)
+        :param workers: number of worker processes used for slices
+                            (default=None - serial)
+        :param executor: already running (shared) executor used for slices
+                            instead of workers (default=None)
+        """
+        if script_type not in ADDRESS_ENCODERS:
+            raise ValueError("Unsupported script type {}".format(script_type))
+        self.node = PubKeyNode(
+            key=node.public_key_sec(),
+            chain_code=node.chain_code,
+            index=node.index,
+            depth=node.depth,
+            testnet=node.testnet
+        )
+        self.script_type = script_type
+        self.testnet = node.testnet
+        self.cache_size = cache_size
+        # index -> address (least recently used first)
+        self.cache = OrderedDict()
+        # address -> index (least recently derived first)
+        self.reverse = OrderedDict() if reverse_index else None
+        self.reverse_limit = reverse_limit
+        self.search_limit = search_limit
+        self.workers = workers
+        self.executor = executor
+
+    def __len__(self) -> int:
+        return HARDENED
+
+    def __getitem__(self, item: Union[int, slice]) -> Union[str, List[str]]:
+        """
+        Address at index or list of addresses for slice.
+
+        :param item: index or slice
+        :return: address or list of addresses
+        """
+        if isinstance(item, slice):
+            indexes = range(len(self))[item]
+            if indexes.step == 1:
+                return self.derive(interval=(indexes.start, indexes.stop))
+            return [self.address(index=i) for i in indexes]
+        return self.address(index=range(len(self))[item])
+
+    def __iter__(self) -> Iterator[str]:
+        for start in range(0, len(self), SCAN_CHUNK_SIZE):
+            yield from self.derive(
+                interval=(start, min(start + SCAN_CHUNK_SIZE, len(self)))
+            )
+
+    def __contains__(self, address: str) -> bool:
+        try:
+            self.index(address)
+        except ValueError:
+            return False
+        return True
+
+    def remember(self, index: int, address: str) -> None:
+        """
+        Stores derived address in LRU cache and reverse index.
+
+        :param index: child index
+        :param address: address
+        :return: None
+        """
+        self.cache[index] = address
+        self.cache.move_to_end(index)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        if self.reverse is not None:
+            self.remember_index(index=index, address=address)
+
+    def remember_index(self, index: int, address: str) -> None:
+        """
+        Stores index of derived address in reverse index.
+
+        :param index: child index
+        :param address: address
+        :return: None
+        """
+        self.reverse[address] = index
+        self.reverse.move_to_end(address)
+        if self.reverse_limit is not None and \
+                len(self.reverse) > self.reverse_limit:
+            self.reverse.popitem(last=False)
+
+    def address(self, index: int) -> str:
+        """
+        Derives address of child at index (cached).
+
+        :param index: child index (non-hardened)
+        :return: address
+        """
+        try:
+            address = self.cache[index]
+            self.cache.move_to_end(index)
+            return address
+        except KeyError:
+            pass
+        child = self.node.ckd(index=index)
+        # do not grow children list of long lived (own) node
+        self.node.children.clear()
+        address = addresses(
+            buffer=sec_buffer([child.key]),
+            script_type=self.script_type,
+            testnet=self.testnet
+        )[0]
+        self.remember(index=index, address=address)
+        return address
+
+    def derive(self, interval: tuple) -> List[str]:
+        """
+        Derives addresses of consecutive children in batch.
+
+        :param interval: interval of child indexes
+        :return: addresses ordered by index
+        """
+        start, end = interval
+        if end <= start:
+            return []
+        buffer = derive_sec_buffers(
+            nodes=[self.node],
+            interval=interval,
+            workers=self.workers,
+            executor=self.executor
+        )[0]
+        result = addresses(
+            buffer=buffer,
+            script_type=self.script_type,
+            testnet=self.testnet
+        )
+        # only the tail of large batch would survive in cache anyway
+        offset = max(0, len(result) - self.cache_size)
+        if self.reverse is not None:
+            for i in range(offset):
+                self.remember_index(index=start + i, address=result[i])
+        for i in range(offset, len(result)):
+            self.remember(index=start + i, address=result[i])
+        return result
+
+    def lookup(self, address: str) -> Optional[int]:
+        """
+        Looks up index of already derived address in reverse index.
+
+        :param address: address
+        :return: child index or None if address was not derived yet
+        """
+        if self.reverse is None:
+            raise RuntimeError("reverse index is not enabled")
+        return self.reverse.get(address)
+
+    def index(self, address: str, start: int = 0, stop: int = None) -> int:
+        """
+        Index of address. Reverse index (if enabled) is checked first,
+        then at most search limit addresses from start are derived
+        in batches and searched.
+
+        :param address: address
+        :param start: first index to search (default=0)
+        :param stop: index where search stops (default=None - start
+                        plus search limit)
+        :return: child index
+        """
+        if self.reverse is not None:
+            index = self.reverse.get(address)
+            end = len(self) if stop is None else stop
+            if index is not None and start <= index < end:
+                return index
+        limit = min(start + self.search_limit, len(self))
+        stop = limit if stop is None else min(stop, limit)
+        for i in range(start, stop, SCAN_CHUNK_SIZE):
+            chunk = self.derive(interval=(i, min(i + SCAN_CHUNK_SIZE, stop)))
+            try:
+                return i + chunk.index(address)
+            except ValueError:
+                continue
+        raise ValueError("{} is not in sequence".format(address))
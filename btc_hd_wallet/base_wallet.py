@@ -7,11 +7,9 @@ from btc_hd_wallet.bip39 import (
     mnemonic_from_entropy, mnemonic_from_entropy_bits, bip39_seed_from_mnemonic,
     MNEMONIC_LENGTH_TO_ENTROPY_BITS
 )
-from btc_hd_wallet.helper import (
-    hash160, sha256, h160_to_p2sh_address, h256_to_p2wsh_address
-)
+from btc_hd_wallet.helper import decode_base58_checksum, big_endian_to_int
 from btc_hd_wallet.wallet_utils import Bip32Path, Version, Key
-from btc_hd_wallet.script import Script, p2wpkh_script, p2wsh_script
+from btc_hd_wallet.address_pipeline import addresses
 from btc_hd_wallet.bip85 import BIP85DeterministicEntropy
 
 
@@ -174,14 +172,13 @@ class BaseWallet(object):
         :param extended_key: extended public or private key
         :return: wallet
         """
-        # just need version, key type does not matter in here
-        version_int = PrvKeyNode.parse(s=extended_key).parsed_version
-        version = Version.parse(version_int=version_int)
+        # decode only once - version is first 4 bytes of serialized node
+        serialized = decode_base58_checksum(s=extended_key)
+        version = Version.parse(version_int=big_endian_to_int(serialized[:4]))
         if version.key_type == Key.PRV:
-            node = PrvKeyNode.parse(extended_key, testnet=version.testnet)
+            node = PrvKeyNode.parse(serialized, testnet=version.testnet)
         else:
-            # is this just assuming? or really pub if not priv
-            node = PubKeyNode.parse(extended_key, testnet=version.testnet)
+            node = PubKeyNode.parse(serialized, testnet=version.testnet)
         return cls(testnet=version.testnet, master=node)
 
     def determine_node_version_int(self,
@@ -224,21 +221,38 @@ class BaseWallet(object):
         version = self.determine_node_version_int(node=node, key_type=Key.PRV)
         return node.extended_private_key(version=int(version))
 
-    def node_extended_keys(self, node: Prv_or_PubKeyNode) -> dict:
+    def node_extended_keys(self, node: Prv_or_PubKeyNode,
+                           private: bool = True) -> dict:
         """
         Gets node's extended keys.
 
         :param node: key node
+        :param private: whether to include extended private key
+                        (default=True)
         :return: extended keys mapping
         """
-        prv = None if self.watch_only else self.node_extended_private_key(
-            node=node
-        )
-        return {
+        result = {
             "path": str(node),
-            "pub": self.node_extended_public_key(node=node),
-            "prv": prv
+            "pub": self.node_extended_public_key(node=node)
         }
+        if private:
+            result["prv"] = None if self.watch_only else \
+                self.node_extended_private_key(node=node)
+        return result
+
+    def node_address(self, node: Prv_or_PubKeyNode, script_type: str) -> str:
+        """
+        Generates address of script type from node.
+
+        :param node: key node
+        :param script_type: script type - one of address_pipeline.SCRIPT_TYPES
+        :return: address
+        """
+        return addresses(
+            buffer=node.public_key.sec(),
+            script_type=script_type,
+            testnet=self.testnet
+        )[0]
 
     def p2pkh_address(self, node: Prv_or_PubKeyNode) -> str:
         """
@@ -265,12 +279,7 @@ class BaseWallet(object):
         :param node: key node
         :return: p2sh-p2wpkh address
         """
-        return h160_to_p2sh_address(
-            h160=hash160(
-                p2wpkh_script(h160=node.public_key.h160()).raw_serialize()
-            ),
-            testnet=self.testnet
-        )
+        return self.node_address(node=node, script_type="p2sh_p2wpkh")
 
     def p2wsh_address(self, node: Prv_or_PubKeyNode) -> str:
         """
@@ -284,12 +293,7 @@ class BaseWallet(object):
         # TODO [sec, OP_CHECKSIG]
         # TODO witness_script = Script([node.public_key.sec(), 0xac])
         # [OP_1, sec, OP_1, OP_CHECKMULTISIG]
-        witness_script = Script([0x51, node.public_key.sec(), 0x51, 0xae])
-        sha256_witness_script = sha256(witness_script.raw_serialize())
-        return h256_to_p2wsh_address(
-            h256=sha256_witness_script,
-            testnet=self.testnet
-        )
+        return self.node_address(node=node, script_type="p2wsh")
 
     def p2sh_p2wsh_address(self, node: Prv_or_PubKeyNode) -> str:
         """
@@ -299,13 +303,16 @@ class BaseWallet(object):
         :return: p2sh-p2wsh address
         """
         # [OP_1, sec, OP_1, OP_CHECKMULTISIG]
-        witness_script = Script([0x51, node.public_key.sec(), 0x51, 0xae])
-        sha256_witness_script = sha256(witness_script.raw_serialize())
-        redeem_script = p2wsh_script(h256=sha256_witness_script).raw_serialize()
-        return h160_to_p2sh_address(
-            h160=hash160(redeem_script),
-            testnet=self.testnet
-        )
+        return self.node_address(node=node, script_type="p2sh_p2wsh")
+
+    def p2tr_address(self, node: Prv_or_PubKeyNode) -> str:
+        """
+        Generates p2tr (BIP86 key path only) address from node.
+
+        :param node: key node
+        :return: p2tr address
+        """
+        return self.node_address(node=node, script_type="p2tr")
 
     def address_generator(self, node: Prv_or_PubKeyNode,
                           addr_fnc: Callable[[Prv_or_PubKeyNode], str] = None
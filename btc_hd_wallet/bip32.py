@@ -1,11 +1,15 @@
-import ecdsa
+import struct
 from io import BytesIO
 from typing import List, Union
 
-from btc_hd_wallet.keys import PrivateKey, PublicKey
+from btc_hd_wallet.keys import PrivateKey, PublicKey, encode_wif, sec_many
+from btc_hd_wallet.secp256k1 import (
+    CURVE_ORDER, decompress, compress, to_affine, jacobian_add_affine,
+    fixed_base_mul
+)
 from btc_hd_wallet.helper import (
     encode_base58_checksum, big_endian_to_int, int_to_big_endian,
-    decode_base58_checksum, hash160, hmac_sha512
+    decode_base58_checksum, hash160, hmac_sha512_state, hmac_sha512_copy
 )
 
 
@@ -13,11 +17,8 @@ HARDENED = 2 ** 31
 
 Prv_or_PubKeyNode = Union["PrvKeyNode", "PubKeyNode"]
 
-SECP256k1 = ecdsa.curves.SECP256k1
-CURVE_GEN = ecdsa.ecdsa.generator_secp256k1
-CURVE_ORDER = CURVE_GEN.order()
-FIELD_ORDER = SECP256k1.curve.p()
-INFINITY = ecdsa.ellipticcurve.INFINITY
+# keyed HMAC-SHA512 state of master key derivation
+MASTER_HMAC_STATE = hmac_sha512_state(key=b"Bitcoin seed")
 
 
 class InvalidKeyError(Exception):
@@ -39,7 +40,9 @@ class PubKeyNode(object):
         "parsed_parent_fingerprint",
         "parsed_version",
         "testnet",
-        "children"
+        "children",
+        "hmac_state",
+        "sec_cache"
     )
 
     def __init__(self, key: bytes, chain_code: bytes, index: int = 0,
@@ -66,6 +69,34 @@ class PubKeyNode(object):
         self.parsed_version = None
         self.testnet = testnet
         self.children = []
+        # keyed by chain code and reused for all children (lazy,
+        # never pickled)
+        self.hmac_state = None
+        # serP(K) of private key node (lazy)
+        self.sec_cache = None
+
+    def __getstate__(self) -> dict:
+        """
+        Node state for pickle and copy - keyed HMAC state cannot
+        be pickled and is recreated lazily.
+
+        :return: state
+        """
+        return {
+            name: getattr(self, name)
+            for name in PubKeyNode.__slots__ if name != "hmac_state"
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        """
+        Restores node state from __getstate__.
+
+        :param state: state
+        :return: None
+        """
+        for name, value in state.items():
+            setattr(self, name, value)
+        self.hmac_state = None
 
     def __eq__(self, other) -> bool:
         """
@@ -93,6 +124,14 @@ class PubKeyNode(object):
         """
         return PublicKey.parse(key_bytes=self.key)
 
+    def public_key_sec(self) -> bytes:
+        """
+        Compressed SEC public key of node.
+
+        :return: SEC public key
+        """
+        return self.key
+
     @property
     def parent_fingerprint(self) -> bytes:
         """
@@ -248,6 +287,23 @@ class PubKeyNode(object):
         """
         return encode_base58_checksum(self.serialize_public(version=version))
 
+    def ckd_hmac(self, index: int) -> bytes:
+        """
+        Computes I = HMAC-SHA512(Key=cpar, Data=serP(Kpar) || ser32(i))
+        for non-hardened child. Keyed HMAC state is created once
+        per parent and copied for every child, message is built per call
+        so that derivation from shared node is thread safe.
+
+        :param index: derivation index (non-hardened)
+        :return: 64 bytes I
+        """
+        if self.hmac_state is None:
+            self.hmac_state = hmac_sha512_state(key=self.chain_code)
+        return hmac_sha512_copy(
+            state=self.hmac_state,
+            msg=self.public_key_sec() + struct.pack(">L", index)
+        )
+
     def ckd(self, index: int) -> "PubKeyNode":
         """
         The function CKDpub((Kpar, cpar), i) → (Ki, ci) computes a child
@@ -271,23 +327,22 @@ class PubKeyNode(object):
         """
         if index >= HARDENED:
             raise RuntimeError("failure: hardened child for public ckd")
-        I = hmac_sha512(
-            key=self.chain_code,
-            msg=self.key + int_to_big_endian(index, 4)
-        )
-        IL, IR = I[:32], I[32:]
+        I = self.ckd_hmac(index=index)
+        IL, IR = memoryview(I)[:32], I[32:]
         if big_endian_to_int(IL) >= CURVE_ORDER:
-            InvalidKeyError(
+            raise InvalidKeyError(
                 "public key {} is greater/equal to curve order".format(
                     big_endian_to_int(IL)
                 )
             )
-        point = PrivateKey.parse(IL).K.point + self.public_key.point
-        if point == INFINITY:
+        X, Y, Z = jacobian_add_affine(
+            *fixed_base_mul(big_endian_to_int(IL)),
+            *decompress(self.key)
+        )
+        if not Z:
             raise InvalidKeyError("public key is a point at infinity")
-        Ki = PublicKey.from_point(point=point)
         child = self.__class__(
-            key=Ki.sec(),
+            key=compress(*to_affine(X, Y, Z)),
             chain_code=IR,
             index=index,
             depth=self.depth + 1,
@@ -345,6 +400,28 @@ class PrvKeyNode(PubKeyNode):
         """
         return self.private_key.K
 
+    def public_key_sec(self) -> bytes:
+        """
+        Compressed SEC public key of node. Computed once and cached.
+
+        :return: SEC public key
+        """
+        if self.sec_cache is None:
+            self.sec_cache = self.public_key.sec()
+        return self.sec_cache
+
+    def wif(self) -> str:
+        """
+        Encodes node's private key into wallet import/export format
+        without constructing private key object.
+
+        :return: WIF encoded private key
+        """
+        return encode_wif(
+            secret=int_to_big_endian(big_endian_to_int(self.key), 32),
+            testnet=self.testnet
+        )
+
     @property
     def prv_version(self) -> int:
         """
@@ -372,7 +449,7 @@ class PrvKeyNode(PubKeyNode):
         :param testnet: whether this node is testnet node (default=False)
         :return: master private key node
         """
-        I = hmac_sha512(key=b"Bitcoin seed", msg=bip39_seed)
+        I = hmac_sha512_copy(state=MASTER_HMAC_STATE, msg=bip39_seed)
         # private key
         IL = I[:32]
         # In case IL is 0 or ≥ n, the master key is invalid
@@ -415,6 +492,25 @@ class PrvKeyNode(PubKeyNode):
         """
         return encode_base58_checksum(self.serialize_private(version=version))
 
+    def ckd_hmac(self, index: int) -> bytes:
+        """
+        Computes I = HMAC-SHA512(Key=cpar, Data) for child, where data is
+        0x00 || ser256(kpar) || ser32(i) for hardened child
+        and serP(point(kpar)) || ser32(i) for non-hardened child.
+
+        :param index: derivation index
+        :return: 64 bytes I
+        """
+        if index < HARDENED:
+            return super().ckd_hmac(index=index)
+        if self.hmac_state is None:
+            self.hmac_state = hmac_sha512_state(key=self.chain_code)
+        # parsed extended private key is already 0x00 padded
+        data = b"\x00" + int_to_big_endian(
+            big_endian_to_int(self.key), 32
+        ) + int_to_big_endian(index, 4)
+        return hmac_sha512_copy(state=self.hmac_state, msg=data)
+
     def ckd(self, index: int) -> "PrvKeyNode":
         """
         The function CKDpriv((kpar, cpar), i) → (ki, ci) computes
@@ -436,23 +532,18 @@ class PrvKeyNode(PubKeyNode):
         :param index: derivation index
         :return: derived child
         """
-        if index >= HARDENED:
-            # hardened
-            data = b"\x00"+bytes(self.private_key) + int_to_big_endian(index, 4)
-        else:
-            data = self.public_key.sec() + int_to_big_endian(index, 4)
-        I = hmac_sha512(key=self.chain_code, msg=data)
-        IL, IR = I[:32], I[32:]
+        I = self.ckd_hmac(index=index)
+        IL, IR = memoryview(I)[:32], I[32:]
         if big_endian_to_int(IL) >= CURVE_ORDER:
-            InvalidKeyError(
+            raise InvalidKeyError(
                 "private key {} is greater/equal to curve order".format(
                     big_endian_to_int(IL)
                 )
             )
-        ki = (int.from_bytes(IL, "big") +
-              big_endian_to_int(bytes(self.private_key))) % CURVE_ORDER
+        ki = (big_endian_to_int(IL) +
+              big_endian_to_int(self.key)) % CURVE_ORDER
         if ki == 0:
-            InvalidKeyError("private key is zero")
+            raise InvalidKeyError("private key is zero")
         child = self.__class__(
             key=int_to_big_endian(ki, 32),
             chain_code=IR,
@@ -463,3 +554,59 @@ class PrvKeyNode(PubKeyNode):
         )
         self.children.append(child)
         return child
+
+    def derive_range(self, interval: tuple = (0, 20)) -> List["PrvKeyNode"]:
+        """
+        Derives children for interval of indexes in batch.
+
+        Parent public key is serialized only once, child private keys
+        are computed by modular addition only and child public keys
+        are computed together with batched fixed base multiplication
+        (single field inversion). Child public keys are kept in children
+        so that they are never recomputed.
+
+        :param interval: specific interval of integers
+                        from which to derive children (default=(0, 20))
+        :return: list of derived children
+        """
+        kpar = big_endian_to_int(self.key)
+        indexes = range(*interval)
+        secrets, chain_codes = [], []
+        for index in indexes:
+            I = self.ckd_hmac(index=index)
+            il = big_endian_to_int(memoryview(I)[:32])
+            if il >= CURVE_ORDER:
+                raise InvalidKeyError(
+                    "private key {} is greater/equal to curve order".format(il)
+                )
+            ki = (il + kpar) % CURVE_ORDER
+            if ki == 0:
+                raise InvalidKeyError("private key is zero")
+            secrets.append(ki)
+            chain_codes.append(I[32:])
+        result = []
+        for index, ki, chain_code, sec in zip(
+                indexes, secrets, chain_codes, sec_many(secrets)):
+            child = self.__class__(
+                key=int_to_big_endian(ki, 32),
+                chain_code=chain_code,
+                index=index,
+                depth=self.depth + 1,
+                testnet=self.testnet,
+                parent=self
+            )
+            child.sec_cache = sec
+            result.append(child)
+        self.children.extend(result)
+        return result
+
+    def generate_children(self, interval: tuple = (0, 20)
+                          ) -> List["PrvKeyNode"]:
+        """
+        Generates children of current node (in batch).
+
+        :param interval: specific interval of integers
+                        from which to generate children (default=(0, 20))
+        :return: list of generated children
+        """
+        return self.derive_range(interval=interval)
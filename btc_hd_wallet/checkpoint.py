@@ -0,0 +1,399 @@
+import os
+import json
+import hashlib
+import functools
+import collections
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, List, Tuple
+
+from btc_hd_wallet.planner import (
+    DerivationPlanner, DerivationSpec, LeafTask, derive_leaf
+)
+from btc_hd_wallet.compression import StreamWriter, codec_from_path
+
+
+# number of address indexes in one checkpointed chunk
+CHUNK_SIZE = 10000
+# suffix of sidecar manifest file
+MANIFEST_SUFFIX = ".manifest"
+# version of manifest format
+MANIFEST_VERSION = 2
+# maximum number of chunks derived ahead of writer per worker process
+CHUNKS_AHEAD = 2
+
+
+def manifest_path(file_path: str) -> str:
+    """
+    Path of sidecar manifest of export file.
+
+    :param file_path: path to export file
+    :return: path to manifest file
+    """
+    return file_path + MANIFEST_SUFFIX
+
+
+def load_manifest(file_path: str) -> dict:
+    """
+    Loads sidecar manifest of export file.
+
+    Manifest is JSON lines file - first line is header (job description,
+    completion and file checksum), every following line is one chunk
+    record. Torn last line (interrupted append) is ignored.
+
+    :param file_path: path to export file
+    :return: manifest
+    """
+    with open(manifest_path(file_path), "r") as f:
+        lines = f.read().split("\n")
+    try:
+        manifest = json.loads(lines[0])
+    except ValueError:
+        raise ValueError("corrupted manifest header")
+    if not isinstance(manifest, dict) or \
+            manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(
+            "unsupported manifest version {}".format(
+                manifest.get("version") if isinstance(manifest, dict)
+                else None
+            )
+        )
+    manifest["chunks"] = []
+    records = [line for line in lines[1:] if line]
+    for i, line in enumerate(records):
+        try:
+            manifest["chunks"].append(json.loads(line))
+        except ValueError:
+            if i != len(records) - 1:
+                raise ValueError("corrupted manifest chunk record")
+    return manifest
+
+
+def write_manifest(file_path: str, manifest: dict) -> None:
+    """
+    Atomically replaces sidecar manifest of export file.
+
+    :param file_path: path to export file
+    :param manifest: manifest
+    :return: None
+    """
+    path = manifest_path(file_path)
+    tmp_path = path + ".tmp"
+    header = {k: v for k, v in manifest.items() if k != "chunks"}
+    with open(tmp_path, "w") as f:
+        f.write(json.dumps(header) + "\n")
+        for record in manifest.get("chunks", []):
+            f.write(json.dumps(record) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def append_chunk_record(file_path: str, record: dict) -> None:
+    """
+    Appends chunk record to sidecar manifest of export file - manifest
+    is never rewritten while export runs.
+
+    :param file_path: path to export file
+    :param record: chunk record
+    :return: None
+    """
+    with open(manifest_path(file_path), "a") as f:
+        f.write(json.dumps(record) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def verify_export(file_path: str) -> bool:
+    """
+    Verifies finished checkpointed export against its manifest - chunks
+    have to be contiguous, match their checksums and whole file has to
+    match its checksum.
+
+    :param file_path: path to export file
+    :return: whether export is complete and consistent
+    """
+    try:
+        manifest = load_manifest(file_path)
+    except (OSError, ValueError):
+        return False
+    if not manifest["complete"]:
+        return False
+    file_hash = hashlib.sha256()
+    end = 0
+    with open(file_path, "rb") as f:
+        for chunk in manifest["chunks"]:
+            if chunk["offset"] != end:
+                return False
+            data = f.read(chunk["length"])
+            if hashlib.sha256(data).hexdigest() != chunk["sha256"]:
+                return False
+            file_hash.update(data)
+            end += chunk["length"]
+        if f.read(1):
+            return False
+    return file_hash.hexdigest() == manifest["sha256"]
+
+
+class CheckpointedExport(object):
+
+    __slots__ = (
+        "wallet",
+        "file_path",
+        "specs",
+        "chunk_size",
+        "private",
+        "codec",
+        "planner"
+    )
+
+    def __init__(self, wallet, file_path: str, specs: List[DerivationSpec],
+                 chunk_size: int = CHUNK_SIZE, workers: int = None,
+                 private: bool = True, fields: tuple = None,
+                 codec: str = None):
+        """
+        Initializes checkpointed export of address rows.
+
+        Rows are written as JSON lines (one JSON array of requested fields
+        per address) in chunks of consecutive indexes. After every chunk
+        is written and synced to disk, sidecar manifest records its index
+        range, byte range and sha256 checksum. Interrupted export is
+        resumed from the last verified chunk. If compressed, every chunk
+        is independent stream (gzip member, xz/bz2 stream, zstd frame),
+        so that the whole file is valid concatenation of streams.
+
+        :param wallet: paper wallet
+        :param file_path: path to export file
+        :param specs: derivation specifications
+        :param chunk_size: number of address indexes in one chunk
+                            (default=CHUNK_SIZE)
+        :param workers: number of worker processes (default=None - serial)
+        :param private: whether to include private data (default=True)
+        :param fields: row fields to generate (default=None - all available)
+        :param codec: compression codec (default=None - determined
+                        by file extension)
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk size has to be positive")
+        self.wallet = wallet
+        self.file_path = file_path
+        self.specs = list(specs)
+        self.chunk_size = chunk_size
+        self.private = private
+        self.codec = codec or codec_from_path(file_path)
+        self.planner = DerivationPlanner(
+            wallet=wallet, workers=workers, private=private, fields=fields
+        )
+
+    @classmethod
+    def resume(cls, wallet, file_path: str,
+               workers: int = None) -> "CheckpointedExport":
+        """
+        Initializes export from manifest of interrupted export.
+
+        :param wallet: paper wallet the export was started with
+        :param file_path: path to export file
+        :param workers: number of worker processes (default=None - serial)
+        :return: checkpointed export
+        """
+        manifest = load_manifest(file_path)
+        export = cls(
+            wallet=wallet,
+            file_path=file_path,
+            specs=[DerivationSpec.parse(s) for s in manifest["specs"]],
+            chunk_size=manifest["chunk_size"],
+            workers=workers,
+            private=manifest["private"],
+            fields=manifest["fields"],
+            codec=manifest["codec"]
+        )
+        if export.job() != {k: manifest[k] for k in export.job()}:
+            raise ValueError("wallet does not match export manifest")
+        return export
+
+    def job(self) -> dict:
+        """
+        Description of export job stored in manifest. Contains no
+        secret data - wallet is identified by master key fingerprint.
+
+        :return: job description
+        """
+        return {
+            "version": MANIFEST_VERSION,
+            "fingerprint": self.wallet.master.fingerprint().hex(),
+            "testnet": self.wallet.testnet,
+            "specs": [repr(spec) for spec in self.specs],
+            "fields": list(self.planner.fields),
+            "private": self.private,
+            "chunk_size": self.chunk_size,
+            "codec": self.codec,
+        }
+
+    def chunks(self) -> List[Tuple[int, int, int, tuple]]:
+        """
+        All chunks of export job in output order.
+
+        :return: list of (purpose, account, chain, interval)
+        """
+        result = []
+        for spec in self.specs:
+            start, end = spec.interval
+            for account in range(*spec.accounts):
+                for chain in spec.chains:
+                    for i in range(start, end, self.chunk_size):
+                        result.append((
+                            spec.purpose, account, chain,
+                            (i, min(i + self.chunk_size, end))
+                        ))
+        return result
+
+    def recover(self, manifest: dict, file_hash) -> List[dict]:
+        """
+        Verifies chunks recorded in manifest against export file
+        and truncates file after the last good chunk.
+
+        :param manifest: manifest of interrupted export
+        :param file_hash: running sha256 updated with good chunks
+        :return: good chunk records
+        """
+        chunks = self.chunks()
+        good = []
+        end = 0
+        with open(self.file_path, "r+b") as f:
+            for i, record in enumerate(manifest["chunks"]):
+                expected = chunks[i] if i < len(chunks) else None
+                if expected is None or record["offset"] != end or \
+                        (record["purpose"], record["account"],
+                         record["chain"], tuple(record["interval"])
+                         ) != expected:
+                    break
+                data = f.read(record["length"])
+                if hashlib.sha256(data).hexdigest() != record["sha256"]:
+                    break
+                file_hash.update(data)
+                good.append(record)
+                end += record["length"]
+            f.truncate(end)
+        return good
+
+    def record(self, f: BinaryIO, manifest: dict, file_hash,
+               chunk: Tuple[int, int, int, tuple], data: bytes) -> None:
+        """
+        Syncs written chunk to disk and records it in manifest.
+
+        :param f: export file
+        :param manifest: manifest being built
+        :param file_hash: running sha256 of export file
+        :param chunk: (purpose, account, chain, interval)
+        :param data: written (compressed) chunk bytes
+        :return: None
+        """
+        f.flush()
+        os.fsync(f.fileno())
+        file_hash.update(data)
+        purpose, account, chain, interval = chunk
+        last = manifest["chunks"][-1] if manifest["chunks"] else None
+        record = {
+            "purpose": purpose,
+            "account": account,
+            "chain": chain,
+            "interval": list(interval),
+            "offset": last["offset"] + last["length"] if last else 0,
+            "length": len(data),
+            "sha256": hashlib.sha256(data).hexdigest(),
+        }
+        manifest["chunks"].append(record)
+        append_chunk_record(file_path=self.file_path, record=record)
+
+    def task(self, chunk: Tuple[int, int, int, tuple]) -> LeafTask:
+        """
+        Leaf task deriving rows of chunk.
+
+        :param chunk: (purpose, account, chain, interval)
+        :return: leaf task
+        """
+        purpose, account, chain, interval = chunk
+        return self.planner.tasks(specs=[DerivationSpec(
+            purpose=purpose,
+            accounts=(account, account + 1),
+            chains=(chain,),
+            interval=interval
+        )])[0][1]
+
+    def run(self, resume: bool = False) -> dict:
+        """
+        Runs (or resumes) export. Chunks are derived in one pool
+        of worker processes (started once for whole export) at most
+        CHUNKS_AHEAD chunks per worker ahead of writer.
+
+        Every finished chunk appends one record to manifest, so that
+        manifest cost per chunk is constant.
+
+        :param resume: whether to continue interrupted export
+                        (default=False)
+        :return: final manifest
+        """
+        file_hash = hashlib.sha256()
+        manifest = self.job()
+        if resume:
+            previous = load_manifest(self.file_path)
+            manifest["chunks"] = self.recover(
+                manifest=previous, file_hash=file_hash
+            )
+        else:
+            if os.path.exists(self.file_path):
+                raise ValueError(
+                    "File {} already exists".format(self.file_path)
+                )
+            open(self.file_path, "wb").close()
+            manifest["chunks"] = []
+        manifest["complete"] = False
+        manifest["sha256"] = None
+        write_manifest(file_path=self.file_path, manifest=manifest)
+
+        pending = self.chunks()[len(manifest["chunks"]):]
+        workers = self.planner.workers or 1
+        executor = None
+        if workers > 1 and len(pending) > 1:
+            executor = ProcessPoolExecutor(max_workers=workers)
+        running = collections.deque()
+        try:
+            with open(self.file_path, "ab") as f:
+                # chunks are compressed (as independent streams), written
+                # and recorded in compression thread while next chunks
+                # are derived
+                with StreamWriter(file=f, codec=self.codec,
+                                  members=True) as writer:
+
+                    def write(chunk, groups):
+                        writer.write(
+                            data="".join(
+                                json.dumps(group) + "\n" for group in groups
+                            ).encode(),
+                            callback=functools.partial(
+                                self.record, f, manifest, file_hash, chunk
+                            )
+                        )
+
+                    for chunk in pending:
+                        task = self.task(chunk=chunk)
+                        if executor is None:
+                            write(chunk, derive_leaf(task))
+                            continue
+                        running.append(
+                            (chunk, executor.submit(derive_leaf, task))
+                        )
+                        if len(running) >= CHUNKS_AHEAD * workers:
+                            chunk, future = running.popleft()
+                            write(chunk, future.result())
+                    while running:
+                        chunk, future = running.popleft()
+                        write(chunk, future.result())
+        finally:
+            if executor is not None:
+                for _, future in running:
+                    future.cancel()
+                executor.shutdown()
+        manifest["complete"] = True
+        manifest["sha256"] = file_hash.hexdigest()
+        write_manifest(file_path=self.file_path, manifest=manifest)
+        return manifest
@@ -0,0 +1,145 @@
+import json
+import socket
+from typing import List, Optional
+
+
+class DaemonClient(object):
+
+    __slots__ = (
+        "socket_path",
+        "timeout",
+        "sock",
+        "rfile"
+    )
+
+    def __init__(self, socket_path: str, timeout: float = None):
+        """
+        Initializes thin client of derivation daemon. Connection
+        is opened lazily and reused for all requests.
+
+        :param socket_path: path of daemon Unix domain socket
+        :param timeout: socket timeout in seconds (default=None - blocking)
+        """
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.sock = None
+        self.rfile = None
+
+    def __enter__(self) -> "DaemonClient":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def connect(self) -> None:
+        """
+        Connects to daemon (if not connected yet).
+
+        :return: None
+        """
+        if self.sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self.sock = sock
+            self.rfile = sock.makefile("rb")
+
+    def close(self) -> None:
+        """
+        Closes connection to daemon.
+
+        :return: None
+        """
+        if self.sock is not None:
+            self.rfile.close()
+            self.sock.close()
+            self.sock = None
+            self.rfile = None
+
+    def batch(self, requests: List[dict]) -> List[dict]:
+        """
+        Sends batch of operations in one request. Daemon coalesces
+        operations on the same parent node.
+
+        :param requests: operations
+        :return: response for each operation - {"result": ...}
+                 or {"error": ...}
+        """
+        self.connect()
+        self.sock.sendall(json.dumps(requests).encode() + b"\n")
+        line = self.rfile.readline()
+        if not line:
+            self.close()
+            raise RuntimeError("connection closed by daemon")
+        response = json.loads(line.decode())
+        if isinstance(response, dict):
+            # whole request rejected
+            raise ValueError(response["error"])
+        return response
+
+    def request(self, request: dict):
+        """
+        Sends single operation.
+
+        :param request: operation
+        :return: operation result
+        """
+        response = self.batch(requests=[request])[0]
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response["result"]
+
+    def derive(self, xpub: str, interval: tuple, chain: int = 0,
+               script_type: str = None) -> List[str]:
+        """
+        Derives addresses of chain.
+
+        :param xpub: account extended public key
+        :param interval: interval of address indexes
+        :param chain: chain number (default=0)
+        :param script_type: script type (default=None - determined
+                            by extended key version)
+        :return: addresses ordered by index
+        """
+        request = {
+            "op": "derive",
+            "xpub": xpub,
+            "chain": chain,
+            "interval": list(interval),
+        }
+        if script_type:
+            request["script_type"] = script_type
+        return self.request(request=request)
+
+    def address(self, xpub: str, path: str, script_type: str = None) -> str:
+        """
+        Derives address for path relative to account.
+
+        :param xpub: account extended public key
+        :param path: relative path, for example '0/5'
+        :param script_type: script type (default=None - determined
+                            by extended key version)
+        :return: address
+        """
+        request = {"op": "address", "xpub": xpub, "path": path}
+        if script_type:
+            request["script_type"] = script_type
+        return self.request(request=request)
+
+    def lookup(self, address: str) -> Optional[dict]:
+        """
+        Looks up already derived address.
+
+        :param address: bitcoin address
+        :return: account extended public key, relative path and script type
+                 or None if address was not derived yet
+        """
+        return self.request(request={"op": "lookup", "address": address})
+
+    def stats(self) -> dict:
+        """
+        Daemon latency and throughput statistics.
+
+        :return: statistics
+        """
+        return self.request(request={"op": "stats"})
@@ -0,0 +1,236 @@
+import io
+import bz2
+import gzip
+import zlib
+import lzma
+import queue
+import threading
+from typing import BinaryIO, Callable, Iterable, List, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# supported codecs (zstd only if zstandard package is installed)
+CODECS = ("gzip", "xz", "bz2", "zstd")
+# file extension -> codec
+EXTENSIONS = {
+    ".gz": "gzip",
+    ".xz": "xz",
+    ".bz2": "bz2",
+    ".zst": "zstd",
+}
+# maximum number of blocks waiting for compression thread
+QUEUE_SIZE = 16
+# size of text blocks handed over to compression thread
+BLOCK_SIZE = 1 << 16
+
+
+def available_codecs() -> List[str]:
+    """
+    Codecs usable in this environment.
+
+    :return: codec names
+    """
+    return [c for c in CODECS if c != "zstd" or zstandard is not None]
+
+
+def codec_from_path(file_path: str) -> Optional[str]:
+    """
+    Determines codec from file extension.
+
+    :param file_path: file path
+    :return: codec name or None if file is not compressed
+    """
+    for extension, codec in EXTENSIONS.items():
+        if file_path.endswith(extension):
+            return codec
+    return None
+
+
+def new_compressor(codec: str):
+    """
+    Creates incremental compressor with compress and flush methods.
+    Output of every compressor (from compress calls to flush) is one
+    complete stream - gzip member, xz stream, bz2 stream or zstd frame.
+
+    :param codec: codec name
+    :return: compressor
+    """
+    if codec not in CODECS:
+        raise ValueError(
+            "unknown codec {}. Allowed {}".format(codec, list(CODECS))
+        )
+    if codec == "gzip":
+        return zlib.compressobj(wbits=31)
+    if codec == "xz":
+        return lzma.LZMACompressor(format=lzma.FORMAT_XZ)
+    if codec == "bz2":
+        return bz2.BZ2Compressor()
+    if zstandard is None:
+        raise ValueError("zstd codec requires zstandard package")
+    return zstandard.ZstdCompressor().compressobj()
+
+
+def compress(codec: str, data: bytes) -> bytes:
+    """
+    Compresses data to one complete stream.
+
+    :param codec: codec name
+    :param data: data
+    :return: compressed data
+    """
+    compressor = new_compressor(codec)
+    return compressor.compress(data) + compressor.flush()
+
+
+def decompress(codec: str, data: bytes) -> bytes:
+    """
+    Decompresses data - concatenated streams are decompressed
+    one after another.
+
+    :param codec: codec name
+    :param data: compressed data
+    :return: data
+    """
+    if codec == "gzip":
+        return gzip.decompress(data)
+    if codec == "xz":
+        return lzma.decompress(data)
+    if codec == "bz2":
+        return bz2.decompress(data)
+    new_compressor(codec)
+    return zstandard.ZstdDecompressor().stream_reader(
+        io.BytesIO(data), read_across_frames=True
+    ).read()
+
+
+def text_blocks(chunks: Iterable[str],
+                block_size: int = BLOCK_SIZE) -> Iterable[bytes]:
+    """
+    Joins small text chunks (for example from JSON encoder) to encoded
+    blocks of at least block size.
+
+    :param chunks: text chunks
+    :param block_size: minimal block size (default=BLOCK_SIZE)
+    :return: encoded blocks
+    """
+    buffer = []
+    size = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= block_size:
+            yield "".join(buffer).encode()
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+class StreamWriter(object):
+
+    __slots__ = (
+        "file",
+        "codec",
+        "members",
+        "compressor",
+        "queue",
+        "thread",
+        "error"
+    )
+
+    def __init__(self, file: BinaryIO, codec: str = None,
+                 members: bool = False, queue_size: int = QUEUE_SIZE):
+        """
+        Initializes writer which compresses and writes blocks in separate
+        thread, so that compression overlaps with derivation of next
+        blocks (stdlib codecs release GIL while compressing).
+
+        :param file: binary file object
+        :param codec: codec name (default=None - no compression)
+        :param members: whether every block is compressed as independent
+                        stream (default=False - one stream for all blocks)
+        :param queue_size: maximum number of blocks waiting for compression
+                        (default=QUEUE_SIZE)
+        """
+        if codec is not None:
+            new_compressor(codec)
+        self.file = file
+        self.codec = codec
+        self.members = members
+        self.compressor = None
+        if codec is not None and not members:
+            self.compressor = new_compressor(codec)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.error = None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def __enter__(self) -> "StreamWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def run(self) -> None:
+        """
+        Compression thread - compresses and writes queued blocks in order.
+        After failure remaining blocks are discarded.
+
+        :return: None
+        """
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            if self.error is not None:
+                continue
+            data, callback = item
+            try:
+                if self.codec is None:
+                    out = data
+                elif self.members:
+                    out = compress(self.codec, data)
+                else:
+                    out = self.compressor.compress(data)
+                if out:
+                    self.file.write(out)
+                if callback is not None:
+                    callback(out)
+            except Exception as e:
+                self.error = e
+        if self.error is None and self.compressor is not None:
+            try:
+                self.file.write(self.compressor.flush())
+            except Exception as e:
+                self.error = e
+
+    def write(self, data: bytes,
+              callback: Callable[[bytes], None] = None) -> None:
+        """
+        Queues block for compression and writing.
+
+        :param data: block
+        :param callback: called in compression thread with written
+                        (compressed) bytes after block is written
+                        (default=None)
+        :return: None
+        """
+        if self.error is not None:
+            raise RuntimeError("compression failed: {}".format(self.error))
+        self.queue.put((data, callback))
+
+    def close(self) -> None:
+        """
+        Waits until all queued blocks are written and finishes stream.
+
+        :return: None
+        """
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        if self.error is not None:
+            raise RuntimeError("compression failed: {}".format(self.error))
@@ -0,0 +1,526 @@
+import os
+import json
+import stat
+import time
+import socket
+import threading
+import socketserver
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from btc_hd_wallet.bip32 import PubKeyNode, HARDENED
+from btc_hd_wallet.wallet_utils import Key
+from btc_hd_wallet.importer import parse_extended_key
+from btc_hd_wallet.registry import BIP_SCRIPT_TYPES
+from btc_hd_wallet.address_sequence import AddressSequence
+from btc_hd_wallet.address_pipeline import ADDRESS_ENCODERS
+
+
+# operations accepted by daemon
+OPERATIONS = ("derive", "address", "lookup", "stats")
+# maximum number of addresses returned by one derive operation
+MAX_DERIVE = 100000
+# number of recently derived addresses kept for every parent node
+CACHE_SIZE = 100000
+# number of derived addresses kept in reverse index of every parent node
+REVERSE_LIMIT = 1000000
+
+
+def parse_relative_path(path: str) -> Tuple[int, ...]:
+    """
+    Parses path relative to account extended public key, for example '0/5'.
+    Only non-hardened indexes are allowed.
+
+    :param path: relative path
+    :return: index tuple
+    """
+    try:
+        indexes = tuple(int(i) for i in path.split("/"))
+    except ValueError:
+        raise ValueError("invalid relative path {}".format(path))
+    for index in indexes:
+        if not 0 <= index < HARDENED:
+            raise ValueError(
+                "relative path {} has to be non-hardened".format(path)
+            )
+    return indexes
+
+
+def merge_intervals(intervals: List[tuple]) -> List[tuple]:
+    """
+    Merges overlapping and adjacent intervals.
+
+    :param intervals: half-open intervals
+    :return: sorted disjoint intervals
+    """
+    result = []
+    for start, end in sorted(intervals):
+        if result and start <= result[-1][1]:
+            result[-1] = (result[-1][0], max(result[-1][1], end))
+        else:
+            result.append((start, end))
+    return result
+
+
+class DaemonStats(object):
+
+    __slots__ = (
+        "started",
+        "requests",
+        "operations",
+        "errors",
+        "addresses",
+        "busy",
+        "lock"
+    )
+
+    def __init__(self):
+        """
+        Initializes latency and throughput statistics of daemon.
+        """
+        self.started = time.monotonic()
+        self.requests = 0
+        self.operations = {op: 0 for op in OPERATIONS}
+        self.errors = 0
+        self.addresses = 0
+        # seconds spent handling requests
+        self.busy = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, ops: List[str], errors: int, addresses: int,
+               elapsed: float) -> None:
+        """
+        Records handled request (batch).
+
+        :param ops: names of valid operations in batch
+        :param errors: number of failed operations
+        :param addresses: number of addresses returned
+        :param elapsed: request handling time in seconds
+        :return: None
+        """
+        with self.lock:
+            self.requests += 1
+            for op in ops:
+                self.operations[op] += 1
+            self.errors += errors
+            self.addresses += addresses
+            self.busy += elapsed
+
+    def as_dict(self) -> dict:
+        """
+        Statistics as JSON serializable mapping.
+
+        :return: statistics
+        """
+        with self.lock:
+            return {
+                "uptime": time.monotonic() - self.started,
+                "requests": self.requests,
+                "operations": dict(self.operations),
+                "errors": self.errors,
+                "addresses": self.addresses,
+                "mean_latency": (
+                    self.busy / self.requests if self.requests else 0.0
+                ),
+                "throughput": (
+                    self.addresses / self.busy if self.busy else 0.0
+                ),
+            }
+
+
+class DerivationDaemon(object):
+
+    __slots__ = (
+        "workers",
+        "cache_size",
+        "reverse_limit",
+        "executor",
+        "accounts",
+        "nodes",
+        "sequences",
+        "locks",
+        "lock",
+        "stats"
+    )
+
+    def __init__(self, workers: int = None, cache_size: int = CACHE_SIZE,
+                 reverse_limit: int = REVERSE_LIMIT):
+        """
+        Initializes long running derivation state shared by all clients.
+
+        Account extended public keys are parsed once, every intermediate
+        node is derived once and addresses of every parent node are
+        served from one address sequence (with LRU cache and reverse
+        index). Worker pool (if any) is created once and shared.
+
+        :param workers: number of worker processes (default=None - serial)
+        :param cache_size: number of recently derived addresses kept
+                            for every parent node (default=CACHE_SIZE)
+        :param reverse_limit: number of derived addresses kept in reverse
+                            index of every parent node - lookup does not
+                            find addresses dropped from it
+                            (default=REVERSE_LIMIT)
+        """
+        self.workers = workers
+        self.cache_size = cache_size
+        self.reverse_limit = reverse_limit
+        self.executor = None
+        if workers and workers > 1:
+            self.executor = ProcessPoolExecutor(max_workers=workers)
+        # xpub -> (account node, default script type)
+        self.accounts = {}
+        # (xpub, relative path) -> node
+        self.nodes = {}
+        # (xpub, relative path, script type) -> address sequence
+        self.sequences = {}
+        # (xpub, relative path, script type) -> lock
+        self.locks = {}
+        self.lock = threading.Lock()
+        self.stats = DaemonStats()
+
+    def close(self) -> None:
+        """
+        Shuts down shared process pool.
+
+        :return: None
+        """
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def account(self, xpub: str) -> Tuple[PubKeyNode, str]:
+        """
+        Parses account extended public key (once).
+
+        :param xpub: account extended public key
+        :return: account node and its default script type
+        """
+        try:
+            return self.accounts[xpub]
+        except KeyError:
+            pass
+        node, key_type, bip_type, _ = parse_extended_key(xpub)
+        if key_type != Key.PUB:
+            raise ValueError("only extended public keys are accepted")
+        account = node, BIP_SCRIPT_TYPES.get(bip_type, "p2wpkh")
+        with self.lock:
+            return self.accounts.setdefault(xpub, account)
+
+    def node(self, xpub: str, path: Tuple[int, ...]) -> PubKeyNode:
+        """
+        Derives node from account node. Nodes on path are cached
+        and derivation starts from the longest cached prefix.
+
+        :param xpub: account extended public key
+        :param path: relative path
+        :return: derived node
+        """
+        node, _ = self.account(xpub)
+        with self.lock:
+            i = len(path)
+            while i and (xpub, path[:i]) not in self.nodes:
+                i -= 1
+            if i:
+                node = self.nodes[(xpub, path[:i])]
+            for j in range(i, len(path)):
+                child = node.ckd(index=path[j])
+                # do not grow children list of long lived node
+                node.children.clear()
+                node = child
+                self.nodes[(xpub, path[:j + 1])] = node
+            return node
+
+    def sequence(self, xpub: str, path: Tuple[int, ...],
+                 script_type: str = None
+                 ) -> Tuple[AddressSequence, threading.Lock]:
+        """
+        Address sequence of parent node and lock guarding it.
+
+        :param xpub: account extended public key
+        :param path: relative path of parent node
+        :param script_type: script type (default=None - determined
+                            by extended key version)
+        :return: address sequence and its lock
+        """
+        _, default_script_type = self.account(xpub)
+        script_type = script_type or default_script_type
+        if script_type not in ADDRESS_ENCODERS:
+            raise ValueError("Unsupported script type {}".format(script_type))
+        key = (xpub, path, script_type)
+        try:
+            return self.sequences[key], self.locks[key]
+        except KeyError:
+            pass
+        sequence = AddressSequence(
+            node=self.node(xpub=xpub, path=path),
+            script_type=script_type,
+            cache_size=self.cache_size,
+            reverse_index=True,
+            reverse_limit=self.reverse_limit,
+            executor=self.executor
+        )
+        with self.lock:
+            if key not in self.sequences:
+                self.locks[key] = threading.Lock()
+                self.sequences[key] = sequence
+            return self.sequences[key], self.locks[key]
+
+    def derive(self, sequence: AddressSequence, lock: threading.Lock,
+               intervals: List[tuple]) -> Dict[tuple, List[str]]:
+        """
+        Derives addresses for all intervals requested from one parent node.
+        Overlapping and adjacent intervals are coalesced and derived once.
+        Intervals already present in cache (for example derived
+        by concurrent request) are not derived again.
+
+        :param sequence: address sequence of parent node
+        :param lock: lock guarding sequence
+        :param intervals: requested intervals
+        :return: mapping interval -> addresses
+        """
+        merged = {}
+        with lock:
+            for start, end in merge_intervals(intervals):
+                if all(i in sequence.cache for i in range(start, end)):
+                    merged[(start, end)] = [
+                        sequence.address(index=i) for i in range(start, end)
+                    ]
+                else:
+                    merged[(start, end)] = sequence.derive(
+                        interval=(start, end)
+                    )
+        result = {}
+        for start, end in intervals:
+            for (m_start, m_end), addrs in merged.items():
+                if m_start <= start and end <= m_end:
+                    result[(start, end)] = addrs[start - m_start:end - m_start]
+                    break
+        return result
+
+    def lookup(self, address: str) -> Optional[dict]:
+        """
+        Looks up already derived address in reverse indexes of all
+        parent nodes.
+
+        :param address: bitcoin address
+        :return: account extended public key, relative path and script type
+                 or None if address was not derived yet
+        """
+        with self.lock:
+            items = list(self.sequences.items())
+        for (xpub, path, script_type), sequence in items:
+            index = sequence.reverse.get(address)
+            if index is not None:
+                return {
+                    "xpub": xpub,
+                    "path": "/".join(str(i) for i in path + (index,)),
+                    "script_type": script_type,
+                }
+        return None
+
+    def prepare(self, request: dict) -> tuple:
+        """
+        Validates operation and resolves its parent node.
+
+        :param request: operation
+        :return: (sequence key, interval) for derive and address
+                 operations, None otherwise
+        """
+        op = request.get("op")
+        if op not in OPERATIONS:
+            raise ValueError("unknown operation {}".format(op))
+        if op == "derive":
+            start, end = request["interval"]
+            start, end = int(start), int(end)
+            if start < 0 or end <= start or end > HARDENED:
+                raise ValueError("invalid interval {}".format([start, end]))
+            if end - start > MAX_DERIVE:
+                raise ValueError(
+                    "at most {} addresses per operation".format(MAX_DERIVE)
+                )
+            path = parse_relative_path(str(request.get("chain", 0)))
+            return (request["xpub"], path, request.get("script_type")), \
+                (start, end)
+        if op == "address":
+            path = parse_relative_path(str(request["path"]))
+            return (request["xpub"], path[:-1], request.get("script_type")), \
+                (path[-1], path[-1] + 1)
+        if op == "lookup" and not isinstance(request.get("address"), str):
+            raise ValueError("address has to be string")
+        return None
+
+    def handle(self, requests: List[dict]) -> List[dict]:
+        """
+        Handles batch of operations. Derive and address operations
+        on the same parent node are coalesced.
+
+        Operations:
+            derive - {"op": "derive", "xpub": XPUB, "chain": 0,
+                      "interval": [START, END], "script_type": optional}
+            address - {"op": "address", "xpub": XPUB, "path": "0/5",
+                       "script_type": optional}
+            lookup - {"op": "lookup", "address": ADDRESS}
+            stats - {"op": "stats"}
+
+        :param requests: operations
+        :return: response for each operation (in order) - either
+                 {"result": ...} or {"error": ...}
+        """
+        started = time.monotonic()
+        responses = [None] * len(requests)
+        prepared = {}
+        groups = {}
+        for i, request in enumerate(requests):
+            try:
+                if not isinstance(request, dict):
+                    raise ValueError("operation has to be JSON object")
+                prepared[i] = self.prepare(request)
+                if prepared[i] is not None:
+                    key, interval = prepared[i]
+                    groups.setdefault(key, []).append(interval)
+            except (KeyError, TypeError, ValueError) as e:
+                responses[i] = {"error": "{}: {}".format(type(e).__name__, e)}
+        derived = {}
+        for key, intervals in groups.items():
+            try:
+                sequence, lock = self.sequence(*key)
+                derived[key] = self.derive(
+                    sequence=sequence, lock=lock, intervals=intervals
+                )
+            except (KeyError, TypeError, ValueError) as e:
+                derived[key] = e
+        count = 0
+        for i, request in enumerate(requests):
+            if responses[i] is not None:
+                continue
+            op = request["op"]
+            if op in ("derive", "address"):
+                key, interval = prepared[i]
+                result = derived[key]
+                if isinstance(result, Exception):
+                    responses[i] = {
+                        "error": "{}: {}".format(type(result).__name__, result)
+                    }
+                    continue
+                addrs = result[interval]
+                count += len(addrs)
+                responses[i] = {
+                    "result": addrs if op == "derive" else addrs[0]
+                }
+            elif op == "lookup":
+                responses[i] = {"result": self.lookup(request["address"])}
+            else:
+                responses[i] = {"result": self.stats.as_dict()}
+        self.stats.record(
+            ops=[r["op"] for i, r in enumerate(requests) if i in prepared],
+            errors=sum(1 for r in responses if "error" in r),
+            addresses=count,
+            elapsed=time.monotonic() - started
+        )
+        return responses
+
+    def handle_line(self, line: bytes) -> bytes:
+        """
+        Handles one line of line delimited JSON protocol. Line is either
+        JSON array of operations (batch) or single operation object.
+
+        :param line: request line
+        :return: response line
+        """
+        try:
+            request = json.loads(line.decode())
+        except ValueError as e:
+            response = {"error": "ValueError: {}".format(e)}
+        else:
+            if isinstance(request, list):
+                response = self.handle(requests=request)
+            else:
+                response = self.handle(requests=[request])[0]
+        return json.dumps(response).encode() + b"\n"
+
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            if line.strip():
+                self.wfile.write(self.server.derivation.handle_line(line))
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, derivation: DerivationDaemon):
+        """
+        Initializes Unix domain socket server. Every connection is handled
+        in its own thread, all connections share derivation state.
+
+        :param socket_path: path of Unix domain socket
+        :param derivation: shared derivation state
+        """
+        self.derivation = derivation
+        super().__init__(socket_path, DaemonRequestHandler)
+
+
+def remove_stale_socket(socket_path: str) -> None:
+    """
+    Removes socket file left by daemon that is no longer running.
+    Socket with live daemon is never removed.
+
+    :param socket_path: path of Unix domain socket
+    :return: None
+    """
+    if not os.path.exists(socket_path):
+        return
+    if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+        raise ValueError("{} exists and is not socket".format(socket_path))
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except ConnectionRefusedError:
+        # nobody listens - stale socket of dead daemon
+        os.remove(socket_path)
+        return
+    finally:
+        sock.close()
+    raise RuntimeError("daemon already listening on {}".format(socket_path))
+
+
+def serve(socket_path: str, workers: int = None,
+          cache_size: int = CACHE_SIZE,
+          reverse_limit: int = REVERSE_LIMIT) -> None:
+    """
+    Runs derivation daemon on Unix domain socket until interrupted.
+    Stale socket file left by previous daemon is removed, running
+    daemon is never replaced.
+
+    :param socket_path: path of Unix domain socket
+    :param workers: number of worker processes (default=None - serial)
+    :param cache_size: number of recently derived addresses kept
+                        for every parent node (default=CACHE_SIZE)
+    :param reverse_limit: number of derived addresses kept in reverse
+                        index of every parent node (default=REVERSE_LIMIT)
+    :return: None
+    """
+    remove_stale_socket(socket_path)
+    derivation = DerivationDaemon(
+        workers=workers,
+        cache_size=cache_size,
+        reverse_limit=reverse_limit
+    )
+    try:
+        server = DaemonServer(socket_path, derivation)
+    except Exception:
+        derivation.close()
+        raise
+    try:
+        with server:
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+    finally:
+        derivation.close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
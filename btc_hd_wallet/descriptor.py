@@ -0,0 +1,535 @@
+import hashlib
+from typing import Dict, List, Optional, Tuple, Union
+
+from btc_hd_wallet.bip32 import PrvKeyNode, PubKeyNode, HARDENED
+from btc_hd_wallet.wallet_utils import Key
+from btc_hd_wallet.keys import taproot_tweak_many
+from btc_hd_wallet.importer import parse_extended_key
+from btc_hd_wallet.script import (
+    P2PKH_TEMPLATE, P2SH_TEMPLATE, P2WPKH_TEMPLATE, P2WSH_TEMPLATE,
+    multisig_template, classify, classified_address
+)
+from btc_hd_wallet.address_pipeline import SEC_LENGTH, derive_sec_buffers
+
+
+INPUT_CHARSET = (
+    "0123456789()[],'/*abcdefgh@:$%{}"
+    "IJKLMNOPQRSTUVWXYZ&+-.;<=>?!^_|~"
+    "ijklmnopqrstuvwxyzABCDEFGH`#\"\\ "
+)
+CHECKSUM_CHARSET = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
+CHECKSUM_LENGTH = 8
+GENERATOR = (0xf5dee51989, 0xa9fdca3312, 0x1bab10e32d, 0x3706b1677a,
+             0x644d626ffd)
+
+# [OP_1, 32-byte x-only output key]
+P2TR_PREFIX = b"\x51\x20"
+
+# script expressions allowed at top level and inside sh() and wsh()
+TOP_LEVEL = ("pkh", "wpkh", "sh", "wsh", "tr")
+INSIDE_SH = ("wpkh", "wsh", "multi", "sortedmulti")
+INSIDE_WSH = ("multi", "sortedmulti")
+
+
+def _polymod(c: int, val: int) -> int:
+    """
+    Descriptor checksum polymod step.
+
+    :param c: checksum state
+    :param val: 5-bit value
+    :return: new checksum state
+    """
+    c0 = c >> 35
+    c = ((c & 0x7ffffffff) << 5) ^ val
+    for i, g in enumerate(GENERATOR):
+        if (c0 >> i) & 1:
+            c ^= g
+    return c
+
+
+def descriptor_checksum(desc: str) -> str:
+    """
+    Computes descriptor checksum (BIP380).
+
+    :param desc: descriptor without checksum
+    :return: 8 character checksum
+    """
+    c = 1
+    cls = 0
+    cls_count = 0
+    for ch in desc:
+        pos = INPUT_CHARSET.find(ch)
+        if pos == -1:
+            raise ValueError("invalid character {} in descriptor".format(ch))
+        c = _polymod(c, pos & 31)
+        cls = cls * 3 + (pos >> 5)
+        cls_count += 1
+        if cls_count == 3:
+            c = _polymod(c, cls)
+            cls = 0
+            cls_count = 0
+    if cls_count:
+        c = _polymod(c, cls)
+    for _ in range(CHECKSUM_LENGTH):
+        c = _polymod(c, 0)
+    c ^= 1
+    return "".join(
+        CHECKSUM_CHARSET[(c >> (5 * (7 - i))) & 31]
+        for i in range(CHECKSUM_LENGTH)
+    )
+
+
+def add_checksum(desc: str) -> str:
+    """
+    Appends checksum to descriptor.
+
+    :param desc: descriptor without checksum
+    :return: descriptor with checksum
+    """
+    return "{}#{}".format(desc, descriptor_checksum(desc))
+
+
+def split_checksum(desc: str) -> Tuple[str, Optional[str]]:
+    """
+    Splits descriptor to its body and checksum. If checksum is present
+    it is verified.
+
+    :param desc: descriptor with or without checksum
+    :return: descriptor body and checksum (None if not present)
+    """
+    if "#" not in desc:
+        return desc, None
+    body, checksum = desc.rsplit("#", 1)
+    if len(checksum) != CHECKSUM_LENGTH:
+        raise ValueError(
+            "checksum has to be {} characters long".format(CHECKSUM_LENGTH)
+        )
+    if descriptor_checksum(body) != checksum:
+        raise ValueError("invalid descriptor checksum")
+    return body, checksum
+
+
+def parse_path(s: str) -> List[int]:
+    """
+    Parses derivation path steps separated by '/'. Hardened steps are
+    marked with ' or h.
+
+    :param s: path steps (without leading m/)
+    :return: list of indexes
+    """
+    result = []
+    if not s:
+        return result
+    for step in s.split("/"):
+        hardened = step[-1:] in ("'", "h")
+        if hardened:
+            step = step[:-1]
+        if not step.isdigit():
+            raise ValueError("invalid path step {}".format(step))
+        index = int(step)
+        if index >= HARDENED:
+            raise ValueError("path index {} out of range".format(index))
+        result.append(index + HARDENED if hardened else index)
+    return result
+
+
+def split_args(s: str) -> List[str]:
+    """
+    Splits arguments of script expression by top level commas.
+
+    :param s: arguments
+    :return: list of arguments
+    """
+    args = []
+    depth = 0
+    start = 0
+    for i, ch in enumerate(s):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            args.append(s[start:i])
+            start = i + 1
+    args.append(s[start:])
+    return args
+
+
+class KeyExpression(object):
+
+    __slots__ = (
+        "text",
+        "fingerprint",
+        "origin_path",
+        "key",
+        "node",
+        "path",
+        "wildcard",
+        "cached_node"
+    )
+
+    def __init__(self, text: str, key: bytes,
+                 node: Union[PrvKeyNode, PubKeyNode] = None,
+                 path: List[int] = None, wildcard: bool = False,
+                 fingerprint: bytes = None, origin_path: List[int] = None):
+        """
+        Initializes key expression.
+
+        :param text: key expression as written in descriptor
+        :param key: SEC encoded public key (or x-only key prefixed with 0x02)
+        :param node: extended key node (default=None - plain public key)
+        :param path: derivation steps after extended key (default=None)
+        :param wildcard: whether expression ends with /* (default=False)
+        :param fingerprint: key origin master fingerprint (default=None)
+        :param origin_path: key origin derivation path (default=None)
+        """
+        self.text = text
+        self.key = key
+        self.node = node
+        self.path = path or []
+        self.wildcard = wildcard
+        self.fingerprint = fingerprint
+        self.origin_path = origin_path or []
+        self.cached_node = None
+
+    def __repr__(self) -> str:
+        return self.text
+
+    @classmethod
+    def parse(cls, s: str, xonly: bool = False) -> "KeyExpression":
+        """
+        Parses key expression - optional key origin [fingerprint/path]
+        followed by hex public key or extended key with optional
+        derivation steps and /* wildcard.
+
+        :param s: key expression
+        :param xonly: whether x-only hex keys are allowed (default=False)
+        :return: key expression
+        """
+        text = s
+        fingerprint, origin_path = None, None
+        if s.startswith("["):
+            end = s.find("]")
+            if end == -1:
+                raise ValueError("key origin is not closed")
+            origin, s = s[1:end], s[end + 1:]
+            fp, _, origin_steps = origin.partition("/")
+            if len(fp) != 8:
+                raise ValueError("fingerprint has to be 4 bytes")
+            fingerprint = bytes.fromhex(fp)
+            origin_path = parse_path(origin_steps)
+        key, *steps = s.split("/")
+        if len(key) in (64, 66) and all(c in "0123456789abcdef" for c in key):
+            if steps:
+                raise ValueError("hex public key cannot be derived")
+            if len(key) == 64:
+                if not xonly:
+                    raise ValueError("x-only keys are allowed only in tr()")
+                key = "02" + key
+            sec = bytes.fromhex(key)
+            if sec[0] not in (2, 3):
+                raise ValueError("public key has to be compressed")
+            return cls(
+                text=text,
+                key=sec,
+                fingerprint=fingerprint,
+                origin_path=origin_path
+            )
+        node, key_type, _, _ = parse_extended_key(key)
+        wildcard = False
+        if steps and steps[-1] in ("*", "*'", "*h"):
+            if steps[-1] != "*":
+                raise ValueError("hardened wildcard is not supported")
+            wildcard = True
+            steps = steps[:-1]
+        path = parse_path("/".join(steps))
+        if key_type == Key.PUB and any(i >= HARDENED for i in path):
+            raise ValueError("hardened derivation requires private key")
+        return cls(
+            text=text,
+            key=b"",
+            node=node,
+            path=path,
+            wildcard=wildcard,
+            fingerprint=fingerprint,
+            origin_path=origin_path
+        )
+
+    @property
+    def testnet(self) -> bool:
+        return self.node is not None and self.node.testnet
+
+    def base_node(self) -> PubKeyNode:
+        """
+        Public key node after all fixed derivation steps (cached).
+        For ranged expressions this is the node children are derived from.
+
+        :return: public key node
+        """
+        if self.cached_node is None:
+            node = self.node.derive_path(index_list=self.path)
+            if isinstance(node, PrvKeyNode):
+                node = PubKeyNode(
+                    key=node.public_key.sec(),
+                    chain_code=node.chain_code,
+                    index=node.index,
+                    depth=node.depth,
+                    testnet=node.testnet
+                )
+            self.cached_node = node
+        return self.cached_node
+
+    def sec(self) -> bytes:
+        """
+        SEC public key of non ranged expression.
+
+        :return: SEC encoded public key
+        """
+        if self.wildcard:
+            raise ValueError("ranged key expression needs index")
+        if self.node is None:
+            return self.key
+        return self.base_node().key
+
+
+class Descriptor(object):
+
+    __slots__ = (
+        "name",
+        "args"
+    )
+
+    def __init__(self, name: str,
+                 args: List[Union[int, KeyExpression, "Descriptor"]]):
+        """
+        Initializes output descriptor (script expression).
+
+        :param name: script expression name (pkh, wpkh, sh, wsh, multi,
+                     sortedmulti, tr)
+        :param args: threshold, key expressions or inner script expression
+        """
+        self.name = name
+        self.args = args
+
+    def __repr__(self) -> str:
+        return add_checksum(self.body())
+
+    def __eq__(self, other: "Descriptor") -> bool:
+        return self.body() == other.body()
+
+    def body(self) -> str:
+        """
+        Descriptor string without checksum.
+
+        :return: descriptor
+        """
+        args = [
+            arg.body() if isinstance(arg, Descriptor) else str(arg)
+            for arg in self.args
+        ]
+        return "{}({})".format(self.name, ",".join(args))
+
+    @classmethod
+    def parse(cls, desc: str) -> "Descriptor":
+        """
+        Parses output descriptor. Supported script expressions are
+        pkh(KEY), wpkh(KEY), sh(wpkh(KEY)), sh(multi(...)),
+        wsh(multi/sortedmulti(...)), sh(wsh(...)) and key path only tr(KEY).
+        Checksum is verified when present.
+
+        :param desc: output descriptor
+        :return: descriptor
+        """
+        body, _ = split_checksum(desc.strip())
+        return cls._parse(body, allowed=TOP_LEVEL)
+
+    @classmethod
+    def _parse(cls, s: str, allowed: Tuple[str, ...]) -> "Descriptor":
+        """
+        Parses script expression.
+
+        :param s: script expression
+        :param allowed: script expressions allowed in this context
+        :return: descriptor
+        """
+        start = s.find("(")
+        if start == -1 or not s.endswith(")"):
+            raise ValueError("invalid script expression {}".format(s))
+        name, inner = s[:start], s[start + 1:-1]
+        if name not in allowed:
+            raise ValueError("{} is not allowed here".format(name))
+        if name in ("sh", "wsh"):
+            return cls(
+                name=name,
+                args=[
+                    cls._parse(
+                        inner,
+                        allowed=INSIDE_SH if name == "sh" else INSIDE_WSH
+                    )
+                ]
+            )
+        if name in ("multi", "sortedmulti"):
+            threshold, *keys = split_args(inner)
+            if not threshold.isdigit():
+                raise ValueError("invalid multisig threshold")
+            keys = [KeyExpression.parse(key) for key in keys]
+            # validates threshold and number of keys
+            multisig_template(m=int(threshold), n=len(keys))
+            return cls(name=name, args=[int(threshold)] + keys)
+        if "," in inner:
+            raise ValueError("{} takes single key expression".format(name))
+        return cls(
+            name=name,
+            args=[KeyExpression.parse(inner, xonly=name == "tr")]
+        )
+
+    def keys(self) -> List[KeyExpression]:
+        """
+        All key expressions of descriptor (in order of appearance).
+
+        :return: key expressions
+        """
+        result = []
+        for arg in self.args:
+            if isinstance(arg, Descriptor):
+                result.extend(arg.keys())
+            elif isinstance(arg, KeyExpression):
+                result.append(arg)
+        return result
+
+    @property
+    def is_range(self) -> bool:
+        return any(key.wildcard for key in self.keys())
+
+    @property
+    def testnet(self) -> bool:
+        return any(key.testnet for key in self.keys())
+
+    def key_buffers(self, interval: tuple, workers: int = None
+                    ) -> Dict[int, bytes]:
+        """
+        Derives public keys of all key expressions for index range.
+        Children of all ranged expressions are derived in one batch from
+        cached base nodes, non ranged keys are repeated.
+
+        :param interval: interval of indexes
+        :param workers: number of worker processes (default=None - serial)
+        :return: mapping id(key expression) -> contiguous buffer of SEC keys
+        """
+        keys = self.keys()
+        ranged = [key for key in keys if key.wildcard]
+        buffers = derive_sec_buffers(
+            nodes=[key.base_node() for key in ranged],
+            interval=interval,
+            workers=workers
+        )
+        result = {id(key): buffer for key, buffer in zip(ranged, buffers)}
+        count = interval[1] - interval[0]
+        for key in keys:
+            if not key.wildcard:
+                result[id(key)] = key.sec() * count
+        return result
+
+    def _scripts(self, buffers: Dict[int, bytes], count: int) -> List[bytes]:
+        """
+        Builds raw scripts of this script expression.
+
+        :param buffers: derived SEC keys of every key expression
+        :param count: number of indexes
+        :return: raw scripts ordered by index
+        """
+        sha256 = hashlib.sha256
+        new = hashlib.new
+        if self.name in ("sh", "wsh"):
+            inner = self.args[0]._scripts(buffers=buffers, count=count)
+            if self.name == "sh":
+                prefix, suffix = P2SH_TEMPLATE
+                return [
+                    prefix + new("ripemd160", sha256(s).digest()).digest()
+                    + suffix
+                    for s in inner
+                ]
+            prefix, suffix = P2WSH_TEMPLATE
+            return [prefix + sha256(s).digest() + suffix for s in inner]
+        if self.name in ("multi", "sortedmulti"):
+            threshold, *keys = self.args
+            prefix, separator, suffix = multisig_template(
+                m=threshold, n=len(keys)
+            )
+            prefix += separator
+            key_buffers = [buffers[id(key)] for key in keys]
+            result = []
+            for offset in range(0, count * SEC_LENGTH, SEC_LENGTH):
+                secs = [b[offset:offset + SEC_LENGTH] for b in key_buffers]
+                if self.name == "sortedmulti":
+                    secs.sort()
+                result.append(prefix + separator.join(secs) + suffix)
+            return result
+        buffer = buffers[id(self.args[0])]
+        secs = [
+            buffer[offset:offset + SEC_LENGTH]
+            for offset in range(0, count * SEC_LENGTH, SEC_LENGTH)
+        ]
+        if self.name == "tr":
+            return [
+                P2TR_PREFIX + xonly
+                for xonly in taproot_tweak_many(sec[1:] for sec in secs)
+            ]
+        if self.name == "pkh":
+            prefix, suffix = P2PKH_TEMPLATE
+        else:
+            prefix, suffix = P2WPKH_TEMPLATE
+        return [
+            prefix + new("ripemd160", sha256(sec).digest()).digest() + suffix
+            for sec in secs
+        ]
+
+    def script_pubkeys(self, interval: tuple = (0, 20),
+                       workers: int = None) -> List[bytes]:
+        """
+        Expands descriptor to raw scriptPubKeys. Non ranged descriptor
+        expands to single script regardless of interval.
+
+        :param interval: interval of indexes (default=(0, 20))
+        :param workers: number of worker processes (default=None - serial)
+        :return: raw scriptPubKeys ordered by index
+        """
+        if not self.is_range:
+            interval = (0, 1)
+        buffers = self.key_buffers(interval=interval, workers=workers)
+        return self._scripts(
+            buffers=buffers,
+            count=max(interval[1] - interval[0], 0)
+        )
+
+    def addresses(self, interval: tuple = (0, 20), testnet: bool = None,
+                  workers: int = None) -> List[str]:
+        """
+        Expands descriptor to addresses. Non ranged descriptor
+        expands to single address regardless of interval.
+
+        :param interval: interval of indexes (default=(0, 20))
+        :param testnet: whether to encode as testnet addresses
+                        (default=None - determined by extended keys)
+        :param workers: number of worker processes (default=None - serial)
+        :return: addresses ordered by index
+        """
+        if testnet is None:
+            testnet = self.testnet
+        return [
+            classified_address(*classify(script), testnet=testnet)
+            for script in self.script_pubkeys(
+                interval=interval, workers=workers
+            )
+        ]
+
+    def address(self, index: int = 0, testnet: bool = None) -> str:
+        """
+        Address at index.
+
+        :param index: index (default=0)
+        :param testnet: whether to encode as testnet address
+                        (default=None - determined by extended keys)
+        :return: address
+        """
+        return self.addresses(interval=(index, index + 1), testnet=testnet)[0]
@@ -1,12 +1,13 @@
 import hmac
 import hashlib
 from io import BytesIO
-from typing import List, Any, Generator
+from typing import List, Any, Generator, Tuple
 
 import btc_hd_wallet.bech32 as bech32
 
 
 BASE58_ALPHABET = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+BASE58_INDEX = {c: i for i, c in enumerate(BASE58_ALPHABET)}
 TWO_WEEKS = 60 * 60 * 24 * 14
 
 
@@ -57,12 +58,12 @@ def decode_base58(s: str) -> bytes:
     """
     num = 0
     for c in s:
-        if c not in BASE58_ALPHABET:
+        try:
+            num = num * 58 + BASE58_INDEX[c]
+        except KeyError:
             raise ValueError(
                 "character {} is not valid base58 character".format(c)
             )
-        num *= 58
-        num += BASE58_ALPHABET.index(c)
 
     h = hex(num)[2:]
     h = '0' + h if len(h) % 2 else h
@@ -122,6 +123,29 @@ def read_varint(s: BytesIO) -> int:
         return i
 
 
+def read_varint_from(view: memoryview, offset: int = 0) -> Tuple[int, int]:
+    """
+    Reads variable integer from buffer at offset.
+
+    :param view: buffer
+    :param offset: position of varint in buffer (default=0)
+    :return: integer and offset right after varint
+    """
+    i = view[offset]
+    if i == 0xfd:
+        size = 2
+    elif i == 0xfe:
+        size = 4
+    elif i == 0xff:
+        size = 8
+    else:
+        return i, offset + 1
+    start = offset + 1
+    if start + size > len(view):
+        raise ValueError("varint out of buffer bounds")
+    return little_endian_to_int(view[start:start + size]), start + size
+
+
 def encode_varint(i: int) -> bytes:
     """
     Encode variable integer.
@@ -181,6 +205,18 @@ def sha256(s: bytes) -> bytes:
     return hashlib.sha256(s).digest()
 
 
+def tagged_hash(tag: str, msg: bytes) -> bytes:
+    """
+    BIP340 tagged hash - sha256(sha256(tag) || sha256(tag) || msg)
+
+    :param tag: tag
+    :param msg: message
+    :return: hashed data
+    """
+    tag_hash = hashlib.sha256(tag.encode()).digest()
+    return hashlib.sha256(tag_hash + tag_hash + msg).digest()
+
+
 def hmac_sha512(key: bytes, msg: bytes) -> bytes:
     """
     Hash-based message authentication code with sha512
@@ -192,6 +228,30 @@ def hmac_sha512(key: bytes, msg: bytes) -> bytes:
     return hmac.new(key=key, msg=msg, digestmod=hashlib.sha512).digest()
 
 
+def hmac_sha512_state(key: bytes) -> "hmac.HMAC":
+    """
+    Keyed HMAC-SHA512 state (inner and outer pads already absorbed).
+    Copy of state is cheaper than keying new HMAC for every message.
+
+    :param key: secret key
+    :return: keyed HMAC object - to be copied, never updated directly
+    """
+    return hmac.new(key=key, digestmod=hashlib.sha512)
+
+
+def hmac_sha512_copy(state: "hmac.HMAC", msg: bytes) -> bytes:
+    """
+    Hash-based message authentication code with sha512 from keyed state.
+
+    :param state: keyed HMAC state from hmac_sha512_state
+    :param msg: message
+    :return: digest bytes
+    """
+    h = state.copy()
+    h.update(msg)
+    return h.digest()
+
+
 def little_endian_to_int(b: bytes) -> int:
     """
     Little endian representation to integer.
@@ -286,6 +346,18 @@ def h256_to_p2wsh_address(h256: bytes, testnet: bool = False,
     return bech32.encode(hrp=hrp, witver=witver, witprog=h256)
 
 
+def xonly_to_p2tr_address(xonly: bytes, testnet: bool = False) -> str:
+    """
+    p2tr address from x-only (32 bytes) taproot output key.
+
+    :param xonly: x-only output key
+    :param testnet: whether to encode as a testnet address (default=False)
+    :return: p2tr bitcoin address
+    """
+    hrp = "tb" if testnet else "bc"
+    return bech32.encode(hrp=hrp, witver=1, witprog=xonly)
+
+
 def bech32_decode_address(addr: str) -> bytes:
     """
     Decodes bech32 address.
@@ -293,7 +365,9 @@ def bech32_decode_address(addr: str) -> bytes:
     :param addr: bech32 address
     :return: decoded address
     """
-    return bytes(bech32.decode(hrp=addr[:2], addr=addr)[1])
+    # human readable part is everything before last "1" (bc, tb, bcrt)
+    hrp = addr[:addr.rfind("1")].lower()
+    return bytes(bech32.decode(hrp=hrp, addr=addr)[1])
 
 
 def merkle_parent(hash1: bytes, hash2: bytes) -> bytes:
@@ -317,17 +391,18 @@ def merkle_parent_level(hashes: List[bytes]) -> List[bytes]:
     # if the list has exactly 1 element raise an error
     if len(hashes) == 1:
         raise ValueError("Cannot take a parent level with only 1 item")
-    # if the list has an odd number of elements, duplicate the last one
-    # and put it at the end so it has an even number of elements
-    if len(hashes) % 2 == 1:
-        hashes.append(hashes[-1])
+    # if the list has an odd number of elements, the last one is paired
+    # with itself (caller's list is not modified)
+    last = len(hashes) - 1
     # initialize next level
     parent_level = []
     # loop over every pair
     for i in range(0, len(hashes), 2):
         # get the merkle parent of the hashes at index i and i+1
         # append parent to parent level
-        parent_level.append(merkle_parent(hashes[i], hashes[i + 1]))
+        parent_level.append(
+            merkle_parent(hashes[i], hashes[min(i + 1, last)])
+        )
     # return parent level
     return parent_level
 
@@ -0,0 +1,192 @@
+import sys
+from typing import Iterable, Iterator, List, Tuple, Union, TextIO
+
+from btc_hd_wallet.bip32 import PrvKeyNode, PubKeyNode, Prv_or_PubKeyNode
+from btc_hd_wallet.helper import decode_base58_checksum, big_endian_to_int
+from btc_hd_wallet.wallet_utils import VERSION_TABLE, Key, Bip
+from btc_hd_wallet.base_wallet import BaseWallet
+
+
+# version (4) + depth (1) + fingerprint (4) + index (4) + chain code (32)
+# + key (33)
+SERIALIZED_NODE_LENGTH = 78
+
+
+class ImportFailure(object):
+
+    __slots__ = (
+        "position",
+        "value",
+        "reason"
+    )
+
+    def __init__(self, position: int, value: str, reason: str):
+        """
+        Initializes import failure diagnostic.
+
+        :param position: position of extended key in input
+        :param value: extended key as provided
+        :param reason: why import failed
+        """
+        self.position = position
+        self.value = value
+        self.reason = reason
+
+    def __repr__(self) -> str:
+        return "{}: {} ({})".format(self.position, self.reason, self.value)
+
+
+class ImportedKey(object):
+
+    __slots__ = (
+        "position",
+        "node",
+        "key_type",
+        "bip_type",
+        "testnet"
+    )
+
+    def __init__(self, position: int, node: Prv_or_PubKeyNode,
+                 key_type: Key, bip_type: Bip, testnet: bool):
+        """
+        Initializes successfully imported extended key.
+
+        :param position: position of extended key in input
+        :param node: parsed key node
+        :param key_type: type of key PRV/PUB
+        :param bip_type: bip type determined from version
+        :param testnet: whether this is testnet key
+        """
+        self.position = position
+        self.node = node
+        self.key_type = key_type
+        self.bip_type = bip_type
+        self.testnet = testnet
+
+    def wallet(self, wallet_cls: type = BaseWallet) -> BaseWallet:
+        """
+        Creates wallet with imported node as its master.
+
+        :param wallet_cls: wallet class (default=BaseWallet)
+        :return: wallet
+        """
+        return wallet_cls(master=self.node, testnet=self.testnet)
+
+
+class ImportResult(object):
+
+    __slots__ = (
+        "keys",
+        "failures"
+    )
+
+    def __init__(self, keys: List[ImportedKey] = None,
+                 failures: List[ImportFailure] = None):
+        """
+        Initializes bulk import result.
+
+        :param keys: successfully imported keys (default=None)
+        :param failures: import failures (default=None)
+        """
+        self.keys = keys or []
+        self.failures = failures or []
+
+    def nodes(self) -> List[Prv_or_PubKeyNode]:
+        """
+        Imported key nodes (in input order).
+
+        :return: key nodes
+        """
+        return [key.node for key in self.keys]
+
+    def wallets(self, wallet_cls: type = BaseWallet) -> List[BaseWallet]:
+        """
+        Wallets created from imported key nodes (in input order).
+
+        :param wallet_cls: wallet class (default=BaseWallet)
+        :return: wallets
+        """
+        return [key.wallet(wallet_cls=wallet_cls) for key in self.keys]
+
+
+def parse_extended_key(extended_key: str
+                       ) -> Tuple[Prv_or_PubKeyNode, Key, Bip, bool]:
+    """
+    Decodes extended key exactly once and classifies it by version
+    with precomputed version table.
+
+    :param extended_key: extended public or private key
+    :return: key node, key type, bip type and network (testnet)
+    """
+    serialized = decode_base58_checksum(s=extended_key)
+    if len(serialized) != SERIALIZED_NODE_LENGTH:
+        raise ValueError(
+            "serialized key has to be {} bytes long".format(
+                SERIALIZED_NODE_LENGTH
+            )
+        )
+    version = big_endian_to_int(serialized[:4])
+    try:
+        key_type, bip_type, testnet = VERSION_TABLE[version]
+    except KeyError:
+        raise ValueError("unsupported version {}".format(hex(version)))
+    key_prefix = serialized[45]
+    if key_type == Key.PRV:
+        if key_prefix != 0:
+            raise ValueError("private key has to be prefixed with 0x00")
+        node = PrvKeyNode.parse(serialized, testnet=testnet)
+    else:
+        if key_prefix not in (2, 3):
+            raise ValueError("public key has to be compressed")
+        node = PubKeyNode.parse(serialized, testnet=testnet)
+    return node, key_type, bip_type, testnet
+
+
+def bulk_import(extended_keys: Iterable[str]) -> ImportResult:
+    """
+    Imports many extended keys (xpub/ypub/zpub/tpub/.../xprv...).
+    Invalid keys do not stop the import and are reported as failures.
+
+    :param extended_keys: extended keys
+    :return: import result with imported keys and failures
+    """
+    result = ImportResult()
+    for position, extended_key in enumerate(extended_keys):
+        value = extended_key.strip()
+        try:
+            node, key_type, bip_type, testnet = parse_extended_key(value)
+        except ValueError as e:
+            result.failures.append(
+                ImportFailure(position=position, value=value, reason=str(e))
+            )
+            continue
+        result.keys.append(
+            ImportedKey(
+                position=position,
+                node=node,
+                key_type=key_type,
+                bip_type=bip_type,
+                testnet=testnet
+            )
+        )
+    return result
+
+
+def read_extended_keys(source: Union[str, TextIO]) -> Iterator[str]:
+    """
+    Reads extended keys (one per line) from file path, '-' (standard input)
+    or open text stream. Blank lines and lines starting with '#' are skipped.
+
+    :param source: file path, '-' or text stream
+    :return: extended keys
+    """
+    if source == "-":
+        source = sys.stdin
+    if isinstance(source, str):
+        with open(source, "r") as f:
+            yield from read_extended_keys(f)
+        return
+    for line in source:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield line
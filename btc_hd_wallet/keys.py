@@ -1,39 +1,97 @@
+import hmac
 import ecdsa
-from typing import Union
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Tuple, Union
 
 from btc_hd_wallet.helper import (
     encode_base58_checksum, decode_base58_checksum, big_endian_to_int,
-    hash160, h160_to_p2wpkh_address, h160_to_p2pkh_address
+    hash160, h160_to_p2wpkh_address, h160_to_p2pkh_address, int_to_big_endian,
+    h160_to_p2sh_address, xonly_to_p2tr_address
+)
+from btc_hd_wallet.secp256k1 import (
+    CURVE_ORDER, FIELD_ORDER, lift_x, decompress, compress, to_affine,
+    jacobian_add_affine, fixed_base_mul, double_mul, batch_inverse,
+    batch_to_affine
 )
 
 
 SECP256k1 = ecdsa.curves.SECP256k1
+CURVE_GEN = ecdsa.ecdsa.generator_secp256k1
+# sha256 state after absorbing sha256("TapTweak") twice (BIP340 tagged hash)
+TAPTWEAK_STATE = hashlib.sha256(2 * hashlib.sha256(b"TapTweak").digest())
 Point_or_PointJacobi = Union[
     ecdsa.ellipticcurve.Point,
     ecdsa.ellipticcurve.PointJacobi
 ]
 
 
+def encode_wif(secret: bytes, compressed: bool = True,
+               testnet: bool = False) -> str:
+    """
+    Encodes 32 bytes secret into wallet import/export format.
+
+    :param secret: 32 bytes big endian secret exponent
+    :param compressed: whether public key is compressed (default=True)
+    :param testnet: whether to encode as a testnet key (default=False)
+    :return: WIF encoded private key
+    """
+    prefix = b"\xef" if testnet else b"\x80"
+    suffix = b"\x01" if compressed else b""
+    return encode_base58_checksum(prefix + secret + suffix)
+
+
 class PrivateKey(object):
 
     __slots__ = (
         "sec_exp",
-        "k",
-        "K"
+        "signing_key",
+        "public_key"
     )
 
     def __init__(self, sec_exp: int):
         """
-        Initializes private key from secret exponent.
+        Initializes private key from secret exponent. Public key
+        and ecdsa signing key are computed lazily.
 
         :param sec_exp: secret
         """
+        if not 1 <= sec_exp < CURVE_ORDER:
+            raise ecdsa.MalformedPointError(
+                "Invalid value for secexp, expected integer "
+                "between 1 and {0}".format(CURVE_ORDER)
+            )
         self.sec_exp = sec_exp
-        self.k = ecdsa.SigningKey.from_secret_exponent(
-            secexp=sec_exp,
-            curve=SECP256k1
-        )
-        self.K = PublicKey(key=self.k.get_verifying_key())
+        self.signing_key = None
+        self.public_key = None
+
+    @property
+    def k(self) -> ecdsa.SigningKey:
+        """
+        Ecdsa signing key.
+
+        :return: signing key
+        """
+        if self.signing_key is None:
+            self.signing_key = ecdsa.SigningKey.from_secret_exponent(
+                secexp=self.sec_exp,
+                curve=SECP256k1
+            )
+        return self.signing_key
+
+    @property
+    def K(self) -> "PublicKey":
+        """
+        Public key - computed with in package secp256k1 fixed base
+        multiplication.
+
+        :return: public key
+        """
+        if self.public_key is None:
+            self.public_key = PublicKey.from_xy(
+                *to_affine(*fixed_base_mul(self.sec_exp))
+            )
+        return self.public_key
 
     def __bytes__(self) -> bytes:
         """
@@ -41,7 +99,7 @@ class PrivateKey(object):
 
         :return: byte representation of PrivateKey object
         """
-        return self.k.to_string()
+        return int_to_big_endian(self.sec_exp, 32)
 
     def __eq__(self, other: "PrivateKey") -> bool:
         """
@@ -59,9 +117,32 @@ class PrivateKey(object):
         :param testnet: whether to encode as a testnet key (default=False)
         :return: WIF encoded private key
         """
-        prefix = b"\xef" if testnet else b"\x80"
-        suffix = b"\x01" if compressed else b""
-        return encode_base58_checksum(prefix + bytes(self) + suffix)
+        return encode_wif(
+            secret=bytes(self), compressed=compressed, testnet=testnet
+        )
+
+    def sign(self, digest: bytes, low_s: bool = True) -> "Signature":
+        """
+        Signs 32 bytes digest with deterministic nonce (RFC6979).
+
+        :param digest: 32 bytes message digest
+        :param low_s: whether to normalize s to lower half of curve order
+                        (default=True)
+        :return: signature
+        """
+        return sign_batch([(self, digest)], low_s=low_s)[0]
+
+    def sign_many(self, digests: Iterable[bytes],
+                  low_s: bool = True) -> List["Signature"]:
+        """
+        Signs many 32 bytes digests with this key in one batch.
+
+        :param digests: 32 bytes message digests
+        :param low_s: whether to normalize s to lower half of curve order
+                        (default=True)
+        :return: signatures in order of digests
+        """
+        return sign_batch(((self, digest) for digest in digests), low_s=low_s)
 
     @classmethod
     def from_wif(cls, wif_str: str) -> "PrivateKey":
@@ -139,7 +220,7 @@ class PublicKey(object):
         :param key_bytes: byte representation of public key
         :return: public key
         """
-        return cls(ecdsa.VerifyingKey.from_string(key_bytes, curve=SECP256k1))
+        return cls.from_xy(*decompress(bytes(key_bytes)))
 
     @classmethod
     def from_point(cls, point: Point_or_PointJacobi) -> "PublicKey":
@@ -151,6 +232,54 @@ class PublicKey(object):
         """
         return cls(ecdsa.VerifyingKey.from_public_point(point, curve=SECP256k1))
 
+    @classmethod
+    def from_xy(cls, x: int, y: int) -> "PublicKey":
+        """
+        Initializes public key from affine coordinates of point
+        (point has to be on curve).
+
+        :param x: x coordinate
+        :param y: y coordinate
+        :return: public key
+        """
+        return cls.from_point(
+            point=ecdsa.ellipticcurve.Point(SECP256k1.curve, x, y)
+        )
+
+    def xonly(self) -> bytes:
+        """
+        X-only (32 bytes) encoding of public key (BIP340).
+
+        :return: x-only public key
+        """
+        return self.sec()[1:]
+
+    def verify(self, digest: bytes, signature: "Signature") -> bool:
+        """
+        Verifies ECDSA signature of 32 bytes digest.
+
+        :param digest: 32 bytes message digest
+        :param signature: signature
+        :return: whether signature is valid
+        """
+        return verify_batch([(self, digest, signature)])[0]
+
+    def verify_many(self, digests: Iterable[bytes],
+                    signatures: Iterable["Signature"],
+                    workers: int = None) -> List[bool]:
+        """
+        Verifies many signatures made by this key.
+
+        :param digests: 32 bytes message digests
+        :param signatures: signatures (in order of digests)
+        :param workers: number of worker processes (default=None - serial)
+        :return: verification results in order of digests
+        """
+        return verify_batch(
+            [(self, d, sig) for d, sig in zip(digests, signatures)],
+            workers=workers
+        )
+
     def h160(self, compressed: bool = True) -> bytes:
         """
         SHA256 followed by RIPEMD160 of public key.
@@ -170,11 +299,357 @@ class PublicKey(object):
         :param addr_type: which address type to generate:
                             1. p2pkh
                             2. p2wpkh (default)
+                            3. p2sh_p2wpkh
+                            4. p2tr (BIP86 key path only)
         :return: bitcoin address
         """
+        if addr_type == "p2tr":
+            return xonly_to_p2tr_address(
+                xonly=taproot_tweak(self.xonly()),
+                testnet=testnet
+            )
         h160 = self.h160(compressed=compressed)
         if addr_type == "p2pkh":
             return h160_to_p2pkh_address(h160=h160, testnet=testnet)
         elif addr_type == "p2wpkh":
             return h160_to_p2wpkh_address(h160=h160, testnet=testnet)
+        elif addr_type == "p2sh_p2wpkh":
+            # [OP_0, 20-byte element]
+            return h160_to_p2sh_address(
+                h160=hash160(b"\x00\x14" + h160),
+                testnet=testnet
+            )
         raise ValueError("Unsupported address type.")
+
+
+def sec_many(secrets: Iterable[int]) -> List[bytes]:
+    """
+    Compressed SEC public keys of many private keys. k * G uses
+    precomputed 4-bit window generator table in jacobian coordinates
+    and all points are normalized with one field inversion.
+
+    :param secrets: secret exponents (0 < k < n)
+    :return: SEC public keys in order of secrets
+    """
+    points = []
+    for k in secrets:
+        point = fixed_base_mul(k % CURVE_ORDER)
+        if not point[2]:
+            raise ValueError("public key is a point at infinity")
+        points.append(point)
+    if not points:
+        return []
+    return [compress(x, y) for x, y in batch_to_affine(points)]
+
+
+def taproot_tweak_many(xonlys: Iterable[bytes], merkle_root: bytes = b""
+                       ) -> List[bytes]:
+    """
+    Tweaks many x-only internal keys to taproot output keys (BIP341).
+
+    Q = P + int(hash_TapTweak(P || merkle_root)) * G where P is point
+    with even y coordinate. Without merkle root this is key path only
+    output key as in BIP86.
+
+    Tagged hash prefix state is precomputed and copied for each key,
+    t * G uses precomputed 4-bit window generator table in jacobian
+    coordinates and all resulting points are normalized with one field
+    inversion.
+
+    :param xonlys: x-only (32 bytes) internal keys
+    :param merkle_root: script tree merkle root (default=b"" - no scripts)
+    :return: x-only output keys
+    """
+    points = []
+    for xonly in xonlys:
+        if len(xonly) != 32:
+            raise ValueError("x-only key has to be 32 bytes long")
+        sha = TAPTWEAK_STATE.copy()
+        sha.update(xonly)
+        sha.update(merkle_root)
+        t = big_endian_to_int(sha.digest())
+        if t >= CURVE_ORDER:
+            raise ValueError("tweak is greater/equal to curve order")
+        X, Y, Z = jacobian_add_affine(
+            *fixed_base_mul(t),
+            *lift_x(big_endian_to_int(xonly))
+        )
+        if not Z:
+            raise ValueError("output key is a point at infinity")
+        points.append((X, Y, Z))
+    if not points:
+        return []
+    return [int_to_big_endian(x, 32) for x, _ in batch_to_affine(points)]
+
+
+def taproot_tweak(xonly: bytes, merkle_root: bytes = b"") -> bytes:
+    """
+    Tweaks x-only internal key to taproot output key (BIP341).
+
+    :param xonly: x-only (32 bytes) internal key
+    :param merkle_root: script tree merkle root (default=b"" - no scripts)
+    :return: x-only output key
+    """
+    return taproot_tweak_many([xonly], merkle_root=merkle_root)[0]
+
+
+class Signature(object):
+
+    __slots__ = (
+        "r",
+        "s",
+        "recid"
+    )
+
+    def __init__(self, r: int, s: int, recid: int = None):
+        """
+        Initializes ECDSA signature.
+
+        :param r: r value
+        :param s: s value
+        :param recid: public key recovery id 0-3 (default=None - unknown)
+        """
+        self.r = r
+        self.s = s
+        self.recid = recid
+
+    def __eq__(self, other: "Signature") -> bool:
+        """
+        Checks whether two signatures are equal (recovery id is ignored).
+
+        :param other: other signature
+        """
+        return self.r == other.r and self.s == other.s
+
+    def __repr__(self) -> str:
+        return "Signature({:x},{:x})".format(self.r, self.s)
+
+    @staticmethod
+    def _der_int(n: int) -> bytes:
+        """
+        Encodes DER integer.
+
+        :param n: non negative integer
+        :return: DER integer
+        """
+        b = n.to_bytes((n.bit_length() + 7) // 8 or 1, "big")
+        if b[0] & 0x80:
+            b = b"\x00" + b
+        return b"\x02" + bytes([len(b)]) + b
+
+    def der(self) -> bytes:
+        """
+        Encodes signature in DER format.
+
+        :return: DER encoded signature
+        """
+        body = self._der_int(self.r) + self._der_int(self.s)
+        return b"\x30" + bytes([len(body)]) + body
+
+    @classmethod
+    def parse_der(cls, der: bytes) -> "Signature":
+        """
+        Initializes signature from DER encoding.
+
+        :param der: DER encoded signature
+        :return: signature
+        """
+        if len(der) < 8 or der[0] != 0x30 or der[1] != len(der) - 2:
+            raise ValueError("bad DER signature")
+        result = []
+        offset = 2
+        for _ in range(2):
+            if der[offset] != 0x02:
+                raise ValueError("bad DER signature")
+            length = der[offset + 1]
+            value = der[offset + 2:offset + 2 + length]
+            if not length or len(value) != length:
+                raise ValueError("bad DER signature")
+            result.append(big_endian_to_int(value))
+            offset += 2 + length
+        if offset != len(der):
+            raise ValueError("bad DER signature")
+        return cls(r=result[0], s=result[1])
+
+    def compact(self) -> bytes:
+        """
+        Encodes signature in compact format (32 bytes r || 32 bytes s).
+
+        :return: compact signature
+        """
+        return int_to_big_endian(self.r, 32) + int_to_big_endian(self.s, 32)
+
+    @classmethod
+    def parse_compact(cls, compact: bytes) -> "Signature":
+        """
+        Initializes signature from compact format.
+
+        :param compact: 64 bytes compact signature
+        :return: signature
+        """
+        if len(compact) != 64:
+            raise ValueError("compact signature has to be 64 bytes long")
+        return cls(
+            r=big_endian_to_int(compact[:32]),
+            s=big_endian_to_int(compact[32:])
+        )
+
+
+def rfc6979_nonce(secret: int, digest: bytes) -> int:
+    """
+    Generates deterministic nonce (RFC6979 with HMAC-SHA256).
+
+    :param secret: private key secret exponent
+    :param digest: 32 bytes message digest
+    :return: nonce
+    """
+    x = int_to_big_endian(secret, 32)
+    h = int_to_big_endian(big_endian_to_int(digest) % CURVE_ORDER, 32)
+    V = b"\x01" * 32
+    K = b"\x00" * 32
+    K = hmac.new(K, V + b"\x00" + x + h, hashlib.sha256).digest()
+    V = hmac.new(K, V, hashlib.sha256).digest()
+    K = hmac.new(K, V + b"\x01" + x + h, hashlib.sha256).digest()
+    V = hmac.new(K, V, hashlib.sha256).digest()
+    while True:
+        V = hmac.new(K, V, hashlib.sha256).digest()
+        k = big_endian_to_int(V)
+        if 1 <= k < CURVE_ORDER:
+            return k
+        K = hmac.new(K, V + b"\x00", hashlib.sha256).digest()
+        V = hmac.new(K, V, hashlib.sha256).digest()
+
+
+def sign_batch(items: Iterable[Tuple[PrivateKey, bytes]],
+               low_s: bool = True) -> List[Signature]:
+    """
+    Signs many digests. Nonces are deterministic (RFC6979), nonce * G is
+    computed with precomputed generator table in jacobian coordinates,
+    all R points are normalized with one field inversion and all nonces
+    are inverted with one scalar inversion.
+
+    :param items: (private key, 32 bytes digest) pairs
+    :param low_s: whether to normalize s to lower half of curve order
+                    (default=True)
+    :return: signatures (with recovery ids) in order of items
+    """
+    n = CURVE_ORDER
+    secrets = []
+    digests = []
+    nonces = []
+    points = []
+    for key, digest in items:
+        if len(digest) != 32:
+            raise ValueError("digest has to be 32 bytes long")
+        k = rfc6979_nonce(secret=key.sec_exp, digest=digest)
+        secrets.append(key.sec_exp)
+        digests.append(big_endian_to_int(digest))
+        nonces.append(k)
+        points.append(fixed_base_mul(k))
+    result = []
+    for d, z, (x, y), k_inv in zip(secrets, digests, batch_to_affine(points),
+                                   batch_inverse(nonces, n)):
+        r = x % n
+        s = k_inv * (z + r * d) % n
+        if not r or not s:
+            raise RuntimeError("invalid nonce - signature cannot be created")
+        recid = (y & 1) | (2 if x >= n else 0)
+        if low_s and s > n // 2:
+            s = n - s
+            recid ^= 1
+        result.append(Signature(r=r, s=s, recid=recid))
+    return result
+
+
+def verify_chunk(tasks: List[Tuple[int, int, int, int, int]]) -> List[bool]:
+    """
+    Verifies chunk of signatures. All s values are inverted with one
+    scalar inversion and R = u1 * G + u2 * Q is computed by double_mul
+    as two separate products added at the end - u1 * G from precomputed
+    generator table and u2 * Q with GLV split wNAF. Generator part is not
+    interleaved with Q - its table needs no doublings and only ~64 mixed
+    additions, while joint loop would pay wNAF additions of G on top of
+    the ~128 doublings GLV already needs for Q. R is compared to r
+    in jacobian coordinates (no field inversion).
+
+    :param tasks: (public key x, public key y, digest, r, s) integer tuples
+    :return: verification results
+    """
+    n = CURVE_ORDER
+    p = FIELD_ORDER
+    valid = [1 <= r < n and 1 <= s < n for _, _, _, r, s in tasks]
+    s_inv = batch_inverse([t[4] if ok else 1 for t, ok in zip(tasks, valid)], n)
+    result = []
+    for (x, y, z, r, _), ok, w in zip(tasks, valid, s_inv):
+        if not ok:
+            result.append(False)
+            continue
+        X, _, Z = double_mul(z * w % n, r * w % n, x, y)
+        if not Z:
+            result.append(False)
+            continue
+        ZZ = Z * Z % p
+        result.append(
+            X == r * ZZ % p or (r + n < p and X == (r + n) * ZZ % p)
+        )
+    return result
+
+
+def verify_batch(items: Iterable[Tuple[PublicKey, bytes, Signature]],
+                 workers: int = None,
+                 chunk_size: int = 256) -> List[bool]:
+    """
+    Verifies many signatures, either serially or in chunks distributed
+    among worker processes.
+
+    :param items: (public key, 32 bytes digest, signature) triplets
+    :param workers: number of worker processes (default=None - serial)
+    :param chunk_size: number of signatures in one worker task
+                        (default=256)
+    :return: verification results in order of items
+    """
+    tasks = []
+    for key, digest, sig in items:
+        if len(digest) != 32:
+            raise ValueError("digest has to be 32 bytes long")
+        point = key.point
+        tasks.append(
+            (point.x(), point.y(), big_endian_to_int(digest), sig.r, sig.s)
+        )
+    chunks = [
+        tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)
+    ]
+    if workers and workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(verify_chunk, chunks))
+    else:
+        results = [verify_chunk(chunk) for chunk in chunks]
+    return [ok for chunk in results for ok in chunk]
+
+
+def recover_public_key(digest: bytes, signature: Signature) -> PublicKey:
+    """
+    Recovers public key from digest and signature with recovery id.
+
+    Q = r^-1 * (s * R - z * G) where R is point with x coordinate
+    r (+ n) and y parity given by recovery id.
+
+    :param digest: 32 bytes message digest
+    :param signature: signature with recovery id
+    :return: public key
+    """
+    n = CURVE_ORDER
+    r, s, recid = signature.r, signature.s, signature.recid
+    if recid not in (0, 1, 2, 3):
+        raise ValueError("invalid recovery id")
+    if not (1 <= r < n and 1 <= s < n):
+        raise ValueError("invalid signature")
+    x, y = lift_x(r + (recid >> 1) * n)
+    if (y & 1) != (recid & 1):
+        y = FIELD_ORDER - y
+    r_inv = pow(r, n - 2, n)
+    z = big_endian_to_int(digest)
+    X, Y, Z = double_mul(-z * r_inv % n, s * r_inv % n, x, y)
+    if not Z:
+        raise ValueError("recovered public key is a point at infinity")
+    return PublicKey.from_xy(*to_affine(X, Y, Z))
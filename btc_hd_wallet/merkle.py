@@ -0,0 +1,256 @@
+import hashlib
+from typing import Iterable, List
+
+from btc_hd_wallet.helper import hash256, merkle_parent
+
+
+HASH_LENGTH = 32
+
+
+def address_leaf(address: str) -> bytes:
+    """
+    Merkle leaf committing to address - hash256 of its UTF-8 encoding.
+
+    :param address: bitcoin address
+    :return: leaf hash
+    """
+    return hash256(address.encode())
+
+
+def streaming_merkle_root(hashes: Iterable[bytes]) -> bytes:
+    """
+    Calculates merkle root (same as helper.merkle_root) from iterator
+    of hashes keeping only one pending node per level - O(log n) memory.
+
+    :param hashes: leaf hashes
+    :return: merkle root
+    """
+    # pending[level] - left node waiting for its right sibling
+    pending = []
+    for h in hashes:
+        level = 0
+        while level < len(pending) and pending[level] is not None:
+            h = merkle_parent(pending[level], h)
+            pending[level] = None
+            level += 1
+        if level == len(pending):
+            pending.append(h)
+        else:
+            pending[level] = h
+    if not pending:
+        raise ValueError("Cannot compute merkle root of empty list")
+    top = max(i for i, h in enumerate(pending) if h is not None)
+    # last node of every level below top is unpaired - it is paired
+    # either with pending left node or (odd level) with itself
+    carry = None
+    for level in range(top):
+        node = pending[level]
+        if carry is None:
+            if node is not None:
+                carry = merkle_parent(node, node)
+        elif node is None:
+            carry = merkle_parent(carry, carry)
+        else:
+            carry = merkle_parent(node, carry)
+    if carry is None:
+        return pending[top]
+    return merkle_parent(pending[top], carry)
+
+
+def verify_proof(leaf: bytes, index: int, proof: List[bytes],
+                 root: bytes, count: int = None) -> bool:
+    """
+    Verifies merkle inclusion proof.
+
+    Because the last node of odd level is paired with itself, proof
+    of the last leaf is also valid for the (nonexistent) next index.
+    Provide committed number of leaves to reject such indexes.
+
+    :param leaf: leaf hash
+    :param index: leaf index
+    :param proof: sibling hashes from leaf level up
+    :param root: expected merkle root
+    :param count: number of leaves in tree (default=None - not checked)
+    :return: whether leaf at index is included in tree with root
+    """
+    if count is not None and not 0 <= index < count:
+        return False
+    h = leaf
+    for sibling in proof:
+        if index & 1:
+            h = merkle_parent(sibling, h)
+        else:
+            h = merkle_parent(h, sibling)
+        index >>= 1
+    return index == 0 and h == root
+
+
+class MerkleTree(object):
+
+    __slots__ = (
+        "levels",
+    )
+
+    def __init__(self, leaves: Iterable[bytes] = ()):
+        """
+        Initializes merkle tree (bitcoin style - last node of odd level
+        is paired with itself, root equals helper.merkle_root).
+
+        Every level is one flat bytearray of 32 byte hashes - no per node
+        objects are created. Duplicated nodes are not stored.
+
+        :param leaves: leaf hashes (iterable is consumed once)
+        """
+        level = bytearray()
+        for leaf in leaves:
+            if len(leaf) != HASH_LENGTH:
+                raise ValueError(
+                    "leaf has to be {} bytes long".format(HASH_LENGTH)
+                )
+            level += leaf
+        self.levels = [level]
+        while len(level) > HASH_LENGTH:
+            level = self.parent_level(level)
+            self.levels.append(level)
+
+    def __len__(self) -> int:
+        return len(self.levels[0]) // HASH_LENGTH
+
+    @classmethod
+    def from_addresses(cls, addresses: Iterable[str]) -> "MerkleTree":
+        """
+        Initializes merkle tree committing to addresses.
+
+        :param addresses: bitcoin addresses
+        :return: merkle tree
+        """
+        return cls(leaves=(address_leaf(a) for a in addresses))
+
+    @staticmethod
+    def parent_level(level: bytearray) -> bytearray:
+        """
+        Calculates parent level of flat level.
+
+        :param level: child level
+        :return: parent level
+        """
+        data = bytes(level)
+        if len(data) % (2 * HASH_LENGTH):
+            # odd level - last node is paired with itself
+            data += data[-HASH_LENGTH:]
+        sha256 = hashlib.sha256
+        parent = bytearray()
+        # children pairs are adjacent - hash them directly from buffer
+        for i in range(0, len(data), 2 * HASH_LENGTH):
+            parent += sha256(
+                sha256(data[i:i + 2 * HASH_LENGTH]).digest()
+            ).digest()
+        return parent
+
+    def node(self, level: int, index: int) -> bytes:
+        """
+        Node hash at level and index.
+
+        :param level: level (0 - leaves)
+        :param index: index in level
+        :return: node hash
+        """
+        start = index * HASH_LENGTH
+        return bytes(self.levels[level][start:start + HASH_LENGTH])
+
+    def root(self) -> bytes:
+        """
+        Merkle root.
+
+        :return: merkle root
+        """
+        if not len(self):
+            raise ValueError("Cannot compute merkle root of empty tree")
+        return self.node(level=len(self.levels) - 1, index=0)
+
+    def leaf(self, index: int) -> bytes:
+        """
+        Leaf hash at index.
+
+        :param index: leaf index
+        :return: leaf hash
+        """
+        if not 0 <= index < len(self):
+            raise IndexError("leaf index out of range")
+        return self.node(level=0, index=index)
+
+    def proof(self, index: int) -> List[bytes]:
+        """
+        Inclusion proof of leaf at index - sibling hashes from leaf level
+        up. Sibling of the last node of odd level is the node itself.
+
+        :param index: leaf index
+        :return: proof
+        """
+        self.leaf(index)
+        result = []
+        for level in range(len(self.levels) - 1):
+            count = len(self.levels[level]) // HASH_LENGTH
+            sibling = index ^ 1
+            result.append(
+                self.node(level=level, index=min(sibling, count - 1))
+            )
+            index >>= 1
+        return result
+
+    def rehash(self, index: int) -> None:
+        """
+        Recalculates ancestors of leaf at index - O(log n) hashes. Tree
+        grows by a level if needed.
+
+        :param index: leaf index
+        :return: None
+        """
+        level = 0
+        while len(self.levels[level]) > HASH_LENGTH:
+            count = len(self.levels[level]) // HASH_LENGTH
+            left = index & ~1
+            right = min(left + 1, count - 1)
+            parent = merkle_parent(
+                self.node(level=level, index=left),
+                self.node(level=level, index=right)
+            )
+            if level + 1 == len(self.levels):
+                self.levels.append(bytearray())
+            index >>= 1
+            start = index * HASH_LENGTH
+            self.levels[level + 1][start:start + HASH_LENGTH] = parent
+            level += 1
+
+    def append(self, leaf: bytes) -> int:
+        """
+        Appends leaf and rehashes its path to root.
+
+        :param leaf: leaf hash
+        :return: index of appended leaf
+        """
+        if len(leaf) != HASH_LENGTH:
+            raise ValueError(
+                "leaf has to be {} bytes long".format(HASH_LENGTH)
+            )
+        index = len(self)
+        self.levels[0] += leaf
+        self.rehash(index=index)
+        return index
+
+    def update(self, index: int, leaf: bytes) -> None:
+        """
+        Replaces leaf at index and rehashes its path to root.
+
+        :param index: leaf index
+        :param leaf: new leaf hash
+        :return: None
+        """
+        self.leaf(index)
+        if len(leaf) != HASH_LENGTH:
+            raise ValueError(
+                "leaf has to be {} bytes long".format(HASH_LENGTH)
+            )
+        start = index * HASH_LENGTH
+        self.levels[0][start:start + HASH_LENGTH] = leaf
+        self.rehash(index=index)
@@ -0,0 +1,193 @@
+import base64
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Set, Tuple
+
+from btc_hd_wallet.address import decode_address
+from btc_hd_wallet.helper import encode_varint, hash160, hash256
+from btc_hd_wallet.keys import (
+    PrivateKey, PublicKey, Signature, recover_public_key
+)
+
+
+MESSAGE_MAGIC = b"Bitcoin Signed Message:\n"
+
+# BIP137 header base for each address type (header = base + recovery id)
+HEADER_BASE = {
+    "p2pkh_uncompressed": 27,
+    "p2pkh": 31,
+    "p2sh_p2wpkh": 35,
+    "p2wpkh": 39,
+}
+
+# address types of compressed keys
+COMPRESSED_ADDR_TYPES = ("p2pkh", "p2sh_p2wpkh", "p2wpkh")
+
+
+def message_digest(message: bytes) -> bytes:
+    """
+    Bitcoin signed message digest - double sha256 of magic prefix
+    and message, both prefixed with their length.
+
+    :param message: message
+    :return: 32 bytes digest
+    """
+    return hash256(
+        encode_varint(len(MESSAGE_MAGIC)) + MESSAGE_MAGIC +
+        encode_varint(len(message)) + message
+    )
+
+
+def sign_message(private_key: PrivateKey, message: bytes,
+                 addr_type: str = "p2pkh") -> str:
+    """
+    Signs message (BIP137).
+
+    :param private_key: private key
+    :param message: message
+    :param addr_type: address type - p2pkh (default), p2sh_p2wpkh, p2wpkh
+                        or p2pkh_uncompressed
+    :return: base64 encoded 65 bytes compact signature
+    """
+    try:
+        base = HEADER_BASE[addr_type]
+    except KeyError:
+        raise ValueError("Unsupported address type {}".format(addr_type))
+    sig = private_key.sign(message_digest(message))
+    header = bytes([base + sig.recid])
+    return base64.b64encode(header + sig.compact()).decode()
+
+
+def parse_message_signature(signature: str) -> Tuple[Signature, str]:
+    """
+    Parses base64 encoded BIP137 compact signature.
+
+    :param signature: base64 encoded signature
+    :return: signature (with recovery id) and address type
+    """
+    try:
+        raw = base64.b64decode(signature, validate=True)
+    except ValueError:
+        raise ValueError("signature is not valid base64")
+    if len(raw) != 65:
+        raise ValueError("signature has to be 65 bytes long")
+    header = raw[0]
+    for addr_type, base in HEADER_BASE.items():
+        if base <= header < base + 4:
+            break
+    else:
+        raise ValueError("invalid signature header {}".format(header))
+    sig = Signature.parse_compact(raw[1:])
+    sig.recid = header - base
+    return sig, addr_type
+
+
+def recover_message_key(message: bytes, signature: str
+                        ) -> Tuple[PublicKey, str]:
+    """
+    Recovers public key from message and its BIP137 signature.
+
+    :param message: message
+    :param signature: base64 encoded signature
+    :return: public key and address type from signature header
+    """
+    sig, addr_type = parse_message_signature(signature)
+    return recover_public_key(message_digest(message), sig), addr_type
+
+
+def message_addresses(key: PublicKey, addr_type: str,
+                      testnet: bool = False) -> List[str]:
+    """
+    Addresses which are proven by signature with address type header.
+    Compressed headers are not bound to single address type, as many
+    wallets sign segwit addresses with p2pkh header.
+
+    :param key: recovered public key
+    :param addr_type: address type from signature header
+    :param testnet: whether to encode as testnet addresses (default=False)
+    :return: addresses
+    """
+    if addr_type == "p2pkh_uncompressed":
+        return [key.address(compressed=False, testnet=testnet,
+                            addr_type="p2pkh")]
+    return [
+        key.address(testnet=testnet, addr_type=t)
+        for t in COMPRESSED_ADDR_TYPES
+    ]
+
+
+def message_programs(key: PublicKey, addr_type: str) -> Set[Tuple[str, bytes]]:
+    """
+    Script types and programs (as decoded from address) which are proven
+    by signature with address type header - network independent
+    counterpart of message_addresses.
+
+    :param key: recovered public key
+    :param addr_type: address type from signature header
+    :return: set of (script type, program) pairs
+    """
+    if addr_type == "p2pkh_uncompressed":
+        return {("p2pkh", key.h160(compressed=False))}
+    h160 = key.h160()
+    return {
+        ("p2pkh", h160),
+        ("p2wpkh", h160),
+        # p2sh_p2wpkh - [OP_0, 20-byte element] redeem script
+        ("p2sh", hash160(b"\x00\x14" + h160)),
+    }
+
+
+def verify_message(address: str, message: bytes, signature: str) -> bool:
+    """
+    Verifies BIP137 message signature against address. Signer public
+    key is recovered (recovery is valid only for valid signature) and
+    compared with program decoded from address, so that address
+    of any network (including regtest) is verified.
+
+    :param address: bitcoin address
+    :param message: message
+    :param signature: base64 encoded signature
+    :return: whether signature is valid for address
+    """
+    try:
+        decoded = decode_address(address)
+        key, addr_type = recover_message_key(message, signature)
+    except ValueError:
+        return False
+    return (decoded.script_type, decoded.program) in \
+        message_programs(key, addr_type)
+
+
+def verify_message_chunk(items: List[Tuple[str, bytes, str]]) -> List[bool]:
+    """
+    Verifies chunk of BIP137 message signatures.
+
+    :param items: (address, message, signature) triplets
+    :return: verification results
+    """
+    return [verify_message(*item) for item in items]
+
+
+def verify_messages(items: Iterable[Tuple[str, bytes, str]],
+                    workers: int = None,
+                    chunk_size: int = 256) -> List[bool]:
+    """
+    Verifies many BIP137 message signatures, either serially or in chunks
+    distributed among worker processes. Malformed signatures are reported
+    as invalid.
+
+    :param items: (address, message, signature) triplets
+    :param workers: number of worker processes (default=None - serial)
+    :param chunk_size: number of signatures in one worker task
+                        (default=256)
+    :return: verification results in order of items
+    """
+    items = list(items)
+    chunks = [
+        items[i:i + chunk_size] for i in range(0, len(items), chunk_size)
+    ]
+    if workers and workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(verify_message_chunk, chunks))
+    else:
+        results = [verify_message_chunk(chunk) for chunk in chunks]
+    return [ok for chunk in results for ok in chunk]
@@ -0,0 +1,154 @@
+import hashlib
+from typing import Iterable, List, Union
+
+from btc_hd_wallet.bip32 import PubKeyNode
+from btc_hd_wallet.wallet_utils import Key
+from btc_hd_wallet.importer import parse_extended_key
+from btc_hd_wallet.helper import h160_to_p2sh_address, h256_to_p2wsh_address
+from btc_hd_wallet.script import (
+    Script, P2WSH_TEMPLATE, multisig_template, sortedmulti_script
+)
+from btc_hd_wallet.address_pipeline import SEC_LENGTH, derive_sec_buffers
+
+
+MULTISIG_SCRIPT_TYPES = ("p2wsh", "p2sh_p2wsh")
+
+
+class MultisigAccount(object):
+
+    __slots__ = (
+        "threshold",
+        "cosigners",
+        "testnet",
+        "chain_nodes"
+    )
+
+    def __init__(self, threshold: int,
+                 cosigners: Iterable[Union[str, PubKeyNode]]):
+        """
+        Initializes k of n sortedmulti (BIP67) account from cosigner
+        account extended public keys.
+
+        :param threshold: number of required signatures
+        :param cosigners: cosigner account extended public keys or nodes
+        """
+        nodes = []
+        for cosigner in cosigners:
+            if isinstance(cosigner, str):
+                cosigner, key_type, _, _ = parse_extended_key(cosigner)
+                if key_type != Key.PUB:
+                    raise ValueError("only extended public keys are accepted")
+            if type(cosigner) != PubKeyNode:
+                raise ValueError("only public key nodes are accepted")
+            nodes.append(cosigner)
+        # validates threshold and number of cosigners
+        multisig_template(m=threshold, n=len(nodes))
+        if len({node.testnet for node in nodes}) != 1:
+            raise ValueError("cosigners have to be from the same network")
+        self.threshold = threshold
+        self.cosigners = nodes
+        self.testnet = nodes[0].testnet
+        # chain -> chain nodes of all cosigners
+        self.chain_nodes = {}
+
+    def chain(self, chain: int) -> List[PubKeyNode]:
+        """
+        Chain nodes of all cosigners (cached).
+
+        :param chain: chain number
+        :return: chain node for each cosigner
+        """
+        try:
+            return self.chain_nodes[chain]
+        except KeyError:
+            nodes = [cosigner.ckd(index=chain) for cosigner in self.cosigners]
+            self.chain_nodes[chain] = nodes
+            return nodes
+
+    def cosigner_keys(self, chain: int = 0, interval: tuple = (0, 20),
+                      workers: int = None) -> List[bytes]:
+        """
+        Derives child public keys of all cosigners in batch.
+
+        :param chain: chain number (default=0)
+        :param interval: interval of address indexes (default=(0, 20))
+        :param workers: number of worker processes (default=None - serial)
+        :return: contiguous buffer of SEC public keys for each cosigner
+        """
+        return derive_sec_buffers(
+            nodes=self.chain(chain=chain),
+            interval=interval,
+            workers=workers
+        )
+
+    def witness_scripts(self, chain: int = 0, interval: tuple = (0, 20),
+                        workers: int = None) -> List[bytes]:
+        """
+        Creates serialized sortedmulti witness scripts for index range.
+        Sorted keys are spliced into cached multisig template.
+
+        :param chain: chain number (default=0)
+        :param interval: interval of address indexes (default=(0, 20))
+        :param workers: number of worker processes (default=None - serial)
+        :return: serialized witness scripts ordered by index
+        """
+        buffers = self.cosigner_keys(
+            chain=chain, interval=interval, workers=workers
+        )
+        prefix, separator, suffix = multisig_template(
+            m=self.threshold, n=len(self.cosigners)
+        )
+        prefix += separator
+        result = []
+        for offset in range(0, len(buffers[0]), SEC_LENGTH):
+            end = offset + SEC_LENGTH
+            keys = sorted(buffer[offset:end] for buffer in buffers)
+            result.append(prefix + separator.join(keys) + suffix)
+        return result
+
+    def script(self, chain: int, index: int) -> Script:
+        """
+        Creates sortedmulti witness script for single index.
+
+        :param chain: chain number
+        :param index: address index
+        :return: witness script
+        """
+        return sortedmulti_script(
+            m=self.threshold,
+            keys=[node.ckd(index=index).key for node in self.chain(chain)]
+        )
+
+    def addresses(self, chain: int = 0, interval: tuple = (0, 20),
+                  script_type: str = "p2wsh",
+                  workers: int = None) -> List[str]:
+        """
+        Generates multisig addresses for index range.
+
+        :param chain: chain number (default=0)
+        :param interval: interval of address indexes (default=(0, 20))
+        :param script_type: p2wsh or p2sh_p2wsh (default=p2wsh)
+        :param workers: number of worker processes (default=None - serial)
+        :return: addresses ordered by index
+        """
+        if script_type not in MULTISIG_SCRIPT_TYPES:
+            raise ValueError("Unsupported script type {}".format(script_type))
+        sha256 = hashlib.sha256
+        new = hashlib.new
+        wsh_prefix = P2WSH_TEMPLATE[0]
+        result = []
+        for witness_script in self.witness_scripts(
+                chain=chain, interval=interval, workers=workers):
+            h256 = sha256(witness_script).digest()
+            if script_type == "p2wsh":
+                result.append(
+                    h256_to_p2wsh_address(h256=h256, testnet=self.testnet)
+                )
+            else:
+                h160 = new("ripemd160", sha256(wsh_prefix + h256).digest())
+                result.append(
+                    h160_to_p2sh_address(
+                        h160=h160.digest(), testnet=self.testnet
+                    )
+                )
+        return result
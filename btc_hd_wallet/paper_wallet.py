@@ -1,124 +1,207 @@
 import os
 import sys
 import json
-from typing import List, Callable
+from typing import List, Callable, Iterable, Union
 
-from btc_hd_wallet.bip32 import Prv_or_PubKeyNode, HARDENED
-from btc_hd_wallet.wallet_utils import Bip32Path
+from btc_hd_wallet.bip32 import Prv_or_PubKeyNode
 from btc_hd_wallet.base_wallet import BaseWallet
+from btc_hd_wallet.address_pipeline import addresses, sec_buffer
+from btc_hd_wallet.planner import DerivationPlanner, DerivationSpec, FIELDS
+from btc_hd_wallet.checkpoint import CHUNK_SIZE, CheckpointedExport
+from btc_hd_wallet.compression import (
+    StreamWriter, codec_from_path, text_blocks
+)
+
+
+# all sections of wallet mapping in output order
+SECTIONS = ("MASTER", "BIP85", "BIP44", "BIP49", "BIP84", "BIP86")
+# sections without secret data
+PUBLIC_SECTIONS = ("BIP44", "BIP49", "BIP84", "BIP86")
 
 
 class PaperWallet(BaseWallet):
 
-    def bip44_group(self, nodes: List[Prv_or_PubKeyNode]) -> List[List[str]]:
+    def bip44_group(self, nodes: List[Prv_or_PubKeyNode],
+                    fields: tuple = FIELDS) -> List[List[str]]:
         """
         Generates bip44 groups (path, address, sec, wif) from nodes.
 
         :param nodes: nodes for group generation
+        :param fields: row fields to generate (default=FIELDS - all)
         :return: generated groups
         """
-        return self.group(nodes=nodes, addr_fnc=self.p2pkh_address)
+        return self.group(nodes=nodes, script_type="p2pkh", fields=fields)
 
-    def bip49_group(self, nodes: List[Prv_or_PubKeyNode]) -> List[List[str]]:
+    def bip49_group(self, nodes: List[Prv_or_PubKeyNode],
+                    fields: tuple = FIELDS) -> List[List[str]]:
         """
         Generates bip49 groups (path, address, sec, wif) from nodes.
 
         :param nodes: nodes for group generation
+        :param fields: row fields to generate (default=FIELDS - all)
         :return: generated groups
         """
-        return self.group(nodes=nodes, addr_fnc=self.p2sh_p2wpkh_address)
+        return self.group(
+            nodes=nodes, script_type="p2sh_p2wpkh", fields=fields
+        )
 
-    def bip84_group(self, nodes: List[Prv_or_PubKeyNode]) -> List[List[str]]:
+    def bip84_group(self, nodes: List[Prv_or_PubKeyNode],
+                    fields: tuple = FIELDS) -> List[List[str]]:
         """
         Generates bip84 groups (path, address, sec, wif) from nodes.
 
         :param nodes: nodes for group generation
+        :param fields: row fields to generate (default=FIELDS - all)
         :return: generated groups
         """
-        return self.group(nodes=nodes, addr_fnc=self.p2wpkh_address)
+        return self.group(nodes=nodes, script_type="p2wpkh", fields=fields)
+
+    def bip86_group(self, nodes: List[Prv_or_PubKeyNode],
+                    fields: tuple = FIELDS) -> List[List[str]]:
+        """
+        Generates bip86 groups (path, address, sec, wif) from nodes.
+
+        :param nodes: nodes for group generation
+        :param fields: row fields to generate (default=FIELDS - all)
+        :return: generated groups
+        """
+        return self.group(nodes=nodes, script_type="p2tr", fields=fields)
 
     def group(self, nodes: List[Prv_or_PubKeyNode],
-              addr_fnc: Callable[[Prv_or_PubKeyNode], str]) -> List[List[str]]:
+              addr_fnc: Callable[[Prv_or_PubKeyNode], str] = None,
+              script_type: str = None,
+              fields: tuple = FIELDS) -> List[List[str]]:
         """
         Generates groups (path, address, sec, wif) from nodes.
 
+        If script type is provided, addresses are generated in batch
+        by address pipeline from SEC public keys of all nodes.
+        Only requested fields are computed (in requested order) -
+        addresses are not encoded and private keys are not touched
+        if not requested.
+
         :param nodes: nodes for group generation
         :param addr_fnc: function to use for address generation
+                            (default=None)
+        :param script_type: script type for batch address generation
+                            (default=None)
+        :param fields: row fields to generate (default=FIELDS - all)
         :return: generated groups
         """
-        return [
-            [
-                str(node),
-                addr_fnc(node),
-                node.public_key.sec().hex(),
-                None if self.watch_only else node.private_key.wif(
-                    testnet=self.testnet
-                )
-            ]
-            for node in nodes
-        ]
+        columns = []
+        secs = None
+        if "sec" in fields or ("address" in fields and script_type):
+            secs = [node.public_key_sec() for node in nodes]
+        for field in fields:
+            if field == "path":
+                columns.append([str(node) for node in nodes])
+            elif field == "address":
+                if script_type is None:
+                    columns.append([addr_fnc(node) for node in nodes])
+                else:
+                    columns.append(
+                        addresses(
+                            buffer=sec_buffer(secs),
+                            script_type=script_type,
+                            testnet=self.testnet
+                        )
+                    )
+            elif field == "sec":
+                columns.append([sec.hex() for sec in secs])
+            elif field == "wif":
+                columns.append([
+                    None if self.watch_only else node.wif()
+                    for node in nodes
+                ])
+            else:
+                raise ValueError("unknown field {}".format(field))
+        return [list(row) for row in zip(*columns)]
+
+    def account(self, purpose: int, account: int = 0,
+                interval: tuple = (0, 20), chains: tuple = (0,)) -> tuple:
+        """
+        Generates account keys and groups (address, sec, wif) for purpose.
 
-    def bip44(self, account: int = 0, interval: tuple = (0, 20)) -> tuple:
+        Account node is derived only once and all requested chains
+        are generated from it in one pass.
+
+        :param purpose: bip44 purpose (not hardened) - one of 44, 49, 84, 86
+        :param account: bip44 account number (default=0)
+        :param interval: specific interval of integers
+                        from which to generate children (default=(0, 20))
+        :param chains: chains to generate - 0 is external chain and 1 is
+                        internal (change) chain (default=(0,))
+        :return: account keys and groups
+        """
+        data = self.plan(specs=[
+            DerivationSpec(
+                purpose=purpose,
+                accounts=(account, account + 1),
+                chains=chains,
+                interval=interval
+            )
+        ])
+        acct = data["BIP{}".format(purpose)][0]
+        return acct["account_extended_keys"], acct["groups"]
+
+    def bip44(self, account: int = 0, interval: tuple = (0, 20),
+              chains: tuple = (0,)) -> tuple:
         """
         Generates bip44 account keys and groups (address, sec, wif)
 
         :param account: bip44 account number (default=0)
         :param interval: specific interval of integers
                         from which to generate children (default=(0, 20))
+        :param chains: chains to generate (default=(0,) - external only)
         :return: account keys and groups
         """
-        path = Bip32Path(
-            purpose=44 + HARDENED,
-            coin_type=1 + HARDENED if self.testnet else HARDENED,
-            account=account + HARDENED
-        )
-        acct_node = self.master.derive_path(index_list=path.to_list())
-        acct_ext_keys = self.node_extended_keys(node=acct_node)
-        external_chain_node = acct_node.derive_path(index_list=[0])
-        return acct_ext_keys, self.bip44_group(
-            nodes=external_chain_node.generate_children(interval=interval)
+        return self.account(
+            purpose=44, account=account, interval=interval, chains=chains
         )
 
-    def bip49(self, account: int = 0, interval: tuple = (0, 20)) -> tuple:
+    def bip49(self, account: int = 0, interval: tuple = (0, 20),
+              chains: tuple = (0,)) -> tuple:
         """
         Generates bip49 account keys and groups (address, sec, wif)
 
         :param account: bip44 account number (default=0)
         :param interval: specific interval of integers
                         from which to generate children (default=(0, 20))
+        :param chains: chains to generate (default=(0,) - external only)
         :return: account keys and groups
         """
-        path = Bip32Path(
-            purpose=49 + HARDENED,
-            coin_type=1 + HARDENED if self.testnet else HARDENED,
-            account=account + HARDENED
-        )
-        acct_node = self.master.derive_path(index_list=path.to_list())
-        acct_ext_keys = self.node_extended_keys(node=acct_node)
-        external_chain_node = acct_node.derive_path(index_list=[0])
-        return acct_ext_keys, self.bip49_group(
-            nodes=external_chain_node.generate_children(interval=interval)
+        return self.account(
+            purpose=49, account=account, interval=interval, chains=chains
         )
 
-    def bip84(self, account: int = 0, interval: tuple = (0, 20)) -> tuple:
+    def bip84(self, account: int = 0, interval: tuple = (0, 20),
+              chains: tuple = (0,)) -> tuple:
         """
         Generates bip84 account keys and group (address, sec, wif)
 
         :param account: bip44 account number (default=0)
         :param interval: specific interval of integers
                         from which to generate children (default=(0, 20))
+        :param chains: chains to generate (default=(0,) - external only)
         :return: account keys and groups
         """
-        path = Bip32Path(
-            purpose=84 + HARDENED,
-            coin_type=1 + HARDENED if self.testnet else HARDENED,
-            account=account + HARDENED
+        return self.account(
+            purpose=84, account=account, interval=interval, chains=chains
         )
-        acct_node = self.master.derive_path(index_list=path.to_list())
-        acct_ext_keys = self.node_extended_keys(node=acct_node)
-        external_chain_node = acct_node.derive_path(index_list=[0])
-        return acct_ext_keys, self.bip84_group(
-            nodes=external_chain_node.generate_children(interval=interval)
+
+    def bip86(self, account: int = 0, interval: tuple = (0, 20),
+              chains: tuple = (0,)) -> tuple:
+        """
+        Generates bip86 account keys and group (address, sec, wif)
+
+        :param account: bip44 account number (default=0)
+        :param interval: specific interval of integers
+                        from which to generate children (default=(0, 20))
+        :param chains: chains to generate (default=(0,) - external only)
+        :return: account keys and groups
+        """
+        return self.account(
+            purpose=86, account=account, interval=interval, chains=chains
         )
 
     def bip85_data(self):
@@ -151,25 +234,89 @@ class PaperWallet(BaseWallet):
             "password": self.password
         }
 
-    def generate(self, account: int = 0, interval: tuple = (0, 20)) -> dict:
+    def generate(self, account: int = 0, interval: tuple = (0, 20),
+                 chains: tuple = (0,), sections: Iterable[str] = None,
+                 private: bool = True, fields: tuple = None) -> dict:
         """
         Generates wallet mapping.
 
+        Only requested sections are computed - BIP85 entropy and master
+        data are not touched at all if not requested and only requested
+        purposes are derived. Without private data, secret sections
+        (MASTER, BIP85) are never produced, account keys are
+        (path, pub) and groups are (path, address, sec), derived
+        from neutered chain nodes without any private key math.
+
         :param account: bip44 account number (default=0)
         :param interval: specific interval of integers
                         from which to generate children (default=(0, 20))
+        :param chains: chains to generate - 0 is external chain and 1 is
+                        internal (change) chain (default=(0,))
+        :param sections: sections to generate - any of MASTER, BIP85, BIP44,
+                        BIP49, BIP84, BIP86 (default=None - all available)
+        :param private: whether to include private data (default=True)
+        :param fields: row fields to generate - any of path, address, sec,
+                        wif (default=None - all available)
         :return: wallet mapping
         """
-        acct_ext44, groups44 = self.bip44(account=account, interval=interval)
-        acct_ext49, groups49 = self.bip49(account=account, interval=interval)
-        acct_ext84, groups84 = self.bip84(account=account, interval=interval)
-        return {
-            "MASTER": self.master_data(),
-            "BIP85": self.bip85_data(),
-            "BIP44": {"account_extended_keys": acct_ext44, "groups": groups44},
-            "BIP49": {"account_extended_keys": acct_ext49, "groups": groups49},
-            "BIP84": {"account_extended_keys": acct_ext84, "groups": groups84},
-        }
+        if sections is None:
+            sections = SECTIONS if private else PUBLIC_SECTIONS
+        sections = list(sections)
+        for section in sections:
+            if section not in SECTIONS:
+                raise ValueError(
+                    "unknown section {}. Allowed {}".format(
+                        section, list(SECTIONS)
+                    )
+                )
+            if not private and section not in PUBLIC_SECTIONS:
+                raise ValueError(
+                    "section {} contains only private data".format(section)
+                )
+        purposes = [
+            int(section[3:]) for section in sections
+            if section in PUBLIC_SECTIONS
+        ]
+        data = self.plan(specs=[
+            DerivationSpec(
+                purpose=purpose,
+                accounts=(account, account + 1),
+                chains=chains,
+                interval=interval
+            )
+            for purpose in purposes
+        ], private=private, fields=fields) if purposes else {}
+        result = {}
+        for section in SECTIONS:
+            if section not in sections:
+                continue
+            if section == "MASTER":
+                result[section] = self.master_data()
+            elif section == "BIP85":
+                result[section] = self.bip85_data()
+            else:
+                result[section] = data[section][0]
+        return result
+
+    def plan(self, specs: List[DerivationSpec], workers: int = None,
+             private: bool = True, fields: tuple = None) -> dict:
+        """
+        Generates multi account wallet mapping from derivation specifications.
+
+        Common derivation prefixes are derived only once and address
+        generation is distributed among worker processes.
+
+        :param specs: derivation specifications
+        :param workers: number of worker processes (default=None - serial)
+        :param private: whether to include private data (default=True)
+        :param fields: row fields to generate - any of path, address, sec,
+                        wif (default=None - all available)
+        :return: mapping from BIP name to list of accounts
+        """
+        planner = DerivationPlanner(
+            wallet=self, workers=workers, private=private, fields=fields
+        )
+        return planner.run(specs=specs)
 
     def json(self, data: dict = None, indent: int = None) -> str:
         """
@@ -195,16 +342,32 @@ class PaperWallet(BaseWallet):
         sys.stdout.write(os.linesep)
 
     @staticmethod
-    def export_to_file(file_path: str, contents: str) -> None:
+    def export_to_file(file_path: str, contents: Union[str, Iterable[str]],
+                       compress: str = None) -> None:
         """
         Export contents to file at file path.
 
+        Compressed files (selected by compress or by file extension
+        .gz, .xz, .bz2, .zst) are compressed in separate thread while
+        contents are still being produced.
+
         :param file_path: path to target file
-        :param contents: contents
+        :param contents: contents or iterable of text chunks
+        :param compress: compression codec - one of gzip, xz, bz2, zstd
+                        (default=None - determined by file extension)
         :return: None
         """
-        with open(file_path, "w") as f:
-            f.write(contents)
+        if isinstance(contents, str):
+            contents = [contents]
+        codec = compress or codec_from_path(file_path)
+        if codec is None:
+            with open(file_path, "w") as f:
+                f.writelines(contents)
+            return
+        with open(file_path, "wb") as f:
+            with StreamWriter(file=f, codec=codec) as writer:
+                for block in text_blocks(contents):
+                    writer.write(data=block)
 
     def wasabi_json(self, indent: int = None):
         """
@@ -221,21 +384,71 @@ class PaperWallet(BaseWallet):
         }, indent=indent)
 
     def export_wallet(self, file_path: str, indent: int = 4,
-                      data: dict = None) -> None:
+                      data: dict = None, compress: str = None) -> None:
         """
-        Export wallet to file at file path.
+        Export wallet to file at file path. JSON is encoded incrementally
+        and streamed to (compressed) file - compression overlaps JSON
+        encoding only, rows are all generated before export starts.
 
         :param file_path: path to target file
         :param indent: indent width
         :param data: source dictionary
+        :param compress: compression codec - one of gzip, xz, bz2, zstd
+                        (default=None - determined by file extension)
         :return: None
         """
         data = data if data else self.generate()
         self.export_to_file(
             file_path=file_path,
-            contents=self.json(data=data, indent=indent)
+            contents=json.JSONEncoder(indent=indent).iterencode(data),
+            compress=compress
         )
 
+    def export_checkpointed(self, file_path: str,
+                            specs: List[DerivationSpec],
+                            chunk_size: int = CHUNK_SIZE, workers: int = None,
+                            private: bool = True, fields: tuple = None,
+                            compress: str = None) -> dict:
+        """
+        Export address rows of derivation specifications to file at file
+        path as JSON lines, written in chunks with sidecar manifest.
+        Interrupted export can be continued with resume_export.
+
+        :param file_path: path to target file
+        :param specs: derivation specifications
+        :param chunk_size: number of address indexes in one chunk
+                            (default=CHUNK_SIZE)
+        :param workers: number of worker processes (default=None - serial)
+        :param private: whether to include private data (default=True)
+        :param fields: row fields to generate - any of path, address, sec,
+                        wif (default=None - all available)
+        :param compress: compression codec - one of gzip, xz, bz2, zstd
+                        (default=None - determined by file extension)
+        :return: final manifest
+        """
+        return CheckpointedExport(
+            wallet=self,
+            file_path=file_path,
+            specs=specs,
+            chunk_size=chunk_size,
+            workers=workers,
+            private=private,
+            fields=fields,
+            codec=compress
+        ).run()
+
+    def resume_export(self, file_path: str, workers: int = None) -> dict:
+        """
+        Continue interrupted checkpointed export from the last good chunk.
+
+        :param file_path: path to target file
+        :param workers: number of worker processes (default=None - serial)
+        :return: final manifest
+        """
+        return CheckpointedExport.resume(
+            wallet=self, file_path=file_path, workers=workers
+        ).run(resume=True)
+
     def export_wasabi(self, file_path: str, indent: int = None) -> None:
         """
         Wasabi wallet JSON import format dumped to file at file path.
@@ -0,0 +1,373 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Tuple, Union
+
+from btc_hd_wallet.bip32 import (
+    PrvKeyNode, PubKeyNode, Prv_or_PubKeyNode, HARDENED
+)
+
+
+# purpose -> name of paper wallet group method used to build rows
+PURPOSE_GROUPS = {
+    44: "bip44_group",
+    49: "bip49_group",
+    84: "bip84_group",
+    86: "bip86_group",
+}
+
+# columns of address rows (groups) in default order
+FIELDS = ("path", "address", "sec", "wif")
+# columns without secret data
+PUBLIC_FIELDS = ("path", "address", "sec")
+
+
+def parse_fields(value: str) -> Tuple[str, ...]:
+    """
+    Parses comma separated row fields, for example 'path,address'.
+
+    :param value: fields string
+    :return: fields tuple
+    """
+    fields = tuple(field.strip() for field in value.split(","))
+    for field in fields:
+        if field not in FIELDS:
+            raise ValueError(
+                "unknown field {}. Allowed {}".format(field, list(FIELDS))
+            )
+    if len(set(fields)) != len(fields):
+        raise ValueError("duplicate fields in {}".format(value))
+    return fields
+
+
+def parse_range(value: str) -> Tuple[int, int]:
+    """
+    Parses range string. Both 'START-END' (half-open interval [START, END))
+    and single integer 'N' (equivalent of 'N-N+1') are accepted.
+
+    :param value: range string
+    :return: interval tuple
+    """
+    if "-" in value:
+        start, end = value.split("-", 1)
+        start, end = int(start), int(end)
+    else:
+        start = int(value)
+        end = start + 1
+    if start < 0 or end <= start:
+        raise ValueError("invalid range {}".format(value))
+    return start, end
+
+
+class DerivationSpec(object):
+
+    __slots__ = (
+        "purpose",
+        "accounts",
+        "chains",
+        "interval"
+    )
+
+    def __init__(self, purpose: int, accounts: tuple = (0, 1),
+                 chains: tuple = (0,), interval: tuple = (0, 20)):
+        """
+        Initializes derivation specification.
+
+        :param purpose: bip44 purpose (not hardened) - one of 44, 49, 84, 86
+        :param accounts: interval of account indexes (default=(0, 1))
+        :param chains: chains to generate (default=(0,) - external only)
+        :param interval: interval of address indexes (default=(0, 20))
+        """
+        if purpose not in PURPOSE_GROUPS:
+            raise ValueError(
+                "unsupported purpose {}. Allowed {}".format(
+                    purpose, list(PURPOSE_GROUPS)
+                )
+            )
+        for chain in chains:
+            if chain not in (0, 1):
+                raise ValueError("chain has to be 0 or 1")
+        self.purpose = purpose
+        self.accounts = tuple(accounts)
+        self.chains = tuple(chains)
+        self.interval = tuple(interval)
+
+    def __eq__(self, other: "DerivationSpec") -> bool:
+        """
+        Checks whether two specifications are equal.
+
+        :param other: other specification
+        """
+        return self.purpose == other.purpose and \
+            self.accounts == other.accounts and \
+            self.chains == other.chains and \
+            self.interval == other.interval
+
+    def __repr__(self) -> str:
+        return "{}:{}-{}:{}:{}-{}".format(
+            self.purpose,
+            self.accounts[0], self.accounts[1],
+            ",".join(str(c) for c in self.chains),
+            self.interval[0], self.interval[1]
+        )
+
+    @classmethod
+    def parse(cls, s: str) -> "DerivationSpec":
+        """
+        Initializes specification from its string representation
+        PURPOSE:ACCOUNTS:CHAINS:INDEXES, for example '84:0-10:0,1:0-20'.
+
+        :param s: specification string
+        :return: specification object
+        """
+        parts = s.split(":")
+        if len(parts) != 4:
+            raise ValueError(
+                "specification has to be PURPOSE:ACCOUNTS:CHAINS:INDEXES"
+            )
+        purpose, accounts, chains, interval = parts
+        return cls(
+            purpose=int(purpose),
+            accounts=parse_range(accounts),
+            chains=tuple(int(c) for c in chains.split(",")),
+            interval=parse_range(interval)
+        )
+
+
+class LeafTask(object):
+
+    __slots__ = (
+        "wallet_cls",
+        "purpose",
+        "path",
+        "key",
+        "chain_code",
+        "depth",
+        "index",
+        "private",
+        "testnet",
+        "interval",
+        "fields"
+    )
+
+    def __init__(self, wallet_cls: type, purpose: int,
+                 node: Prv_or_PubKeyNode, interval: tuple,
+                 fields: tuple = FIELDS):
+        """
+        Initializes leaf task - generation of address rows from chain node.
+
+        Only the data needed to rebuild the chain node is stored,
+        so that task can be cheaply sent to worker process. If wif
+        is not requested, private chain node is neutered - children
+        are derived with public derivation and no private keys are created.
+
+        :param wallet_cls: paper wallet class used to build rows
+        :param purpose: bip44 purpose (not hardened)
+        :param node: chain node
+        :param interval: interval of address indexes
+        :param fields: row fields to generate (default=FIELDS - all)
+        """
+        self.wallet_cls = wallet_cls
+        self.purpose = purpose
+        self.path = str(node)
+        self.private = "wif" in fields and isinstance(node, PrvKeyNode)
+        if isinstance(node, PrvKeyNode) and not self.private:
+            self.key = node.public_key.sec()
+        else:
+            self.key = node.key
+        self.chain_code = node.chain_code
+        self.depth = node.depth
+        self.index = node.index
+        self.testnet = node.testnet
+        self.interval = interval
+        self.fields = fields
+
+    def node(self) -> Prv_or_PubKeyNode:
+        """
+        Rebuilds chain node (as root node) from task data.
+
+        :return: chain node
+        """
+        cls = PrvKeyNode if self.private else PubKeyNode
+        return cls(
+            key=self.key,
+            chain_code=self.chain_code,
+            index=self.index,
+            depth=self.depth,
+            testnet=self.testnet
+        )
+
+
+def derive_leaf(task: LeafTask) -> List[List[str]]:
+    """
+    Generates groups (requested fields) for leaf task.
+
+    Chain node is rebuilt as root node, therefore paths of its children
+    start with mark only. Mark is replaced with full chain node path.
+
+    :param task: leaf task
+    :return: generated groups
+    """
+    node = task.node()
+    wallet = task.wallet_cls(master=node, testnet=task.testnet)
+    group_fnc = getattr(wallet, PURPOSE_GROUPS[task.purpose])
+    groups = group_fnc(
+        nodes=node.generate_children(interval=task.interval),
+        fields=task.fields
+    )
+    if "path" in task.fields:
+        i = task.fields.index("path")
+        for group in groups:
+            group[i] = task.path + group[i][1:]
+    return groups
+
+
+class DerivationPlanner(object):
+
+    __slots__ = (
+        "wallet",
+        "workers",
+        "private",
+        "fields",
+        "cache"
+    )
+
+    def __init__(self, wallet, workers: int = None, private: bool = True,
+                 fields: tuple = None):
+        """
+        Initializes derivation planner.
+
+        Planner derives every intermediate node (master -> purpose' ->
+        coin' -> account' -> chain) exactly once and shares it among all
+        specifications. Leaf work (address generation) is fanned out
+        to worker processes if workers is greater than 1.
+
+        :param wallet: paper wallet
+        :param workers: number of worker processes (default=None - serial)
+        :param private: whether to include private data - extended private
+                        keys and WIFs (default=True)
+        :param fields: row fields to generate (default=None - FIELDS
+                        with private data, PUBLIC_FIELDS without)
+        """
+        if fields is None:
+            fields = FIELDS if private else PUBLIC_FIELDS
+        fields = tuple(fields)
+        if not fields:
+            raise ValueError("at least one field is required")
+        for field in fields:
+            if field not in FIELDS:
+                raise ValueError(
+                    "unknown field {}. Allowed {}".format(field, list(FIELDS))
+                )
+        if not private and "wif" in fields:
+            raise ValueError("wif field requires private data")
+        self.wallet = wallet
+        self.workers = workers
+        self.private = private
+        self.fields = fields
+        self.cache = {(): wallet.master}
+
+    def coin_type(self) -> int:
+        """
+        Bip44 coin type based on wallet network.
+
+        :return: hardened coin type
+        """
+        return 1 + HARDENED if self.wallet.testnet else HARDENED
+
+    def node(self, index_list: List[int]) -> Prv_or_PubKeyNode:
+        """
+        Derives node from master node. Nodes on path are cached
+        and derivation starts from the longest cached prefix.
+
+        :param index_list: specific index list (or index path) for derivation
+        :return: derived node
+        """
+        key = tuple(index_list)
+        i = len(key)
+        while key[:i] not in self.cache:
+            i -= 1
+        node = self.cache[key[:i]]
+        for j in range(i, len(key)):
+            node = node.ckd(index=key[j])
+            self.cache[key[:j + 1]] = node
+        return node
+
+    def account_path(self, purpose: int, account: int) -> List[int]:
+        """
+        Index list of account node m/purpose'/coin_type'/account'.
+
+        :param purpose: bip44 purpose (not hardened)
+        :param account: account number (not hardened)
+        :return: index list
+        """
+        return [purpose + HARDENED, self.coin_type(), account + HARDENED]
+
+    def tasks(self, specs: List[DerivationSpec]
+              ) -> List[Tuple[Tuple[int, int], LeafTask]]:
+        """
+        Creates leaf tasks from specifications.
+
+        :param specs: derivation specifications
+        :return: list of ((purpose, account), leaf task) pairs
+        """
+        result = []
+        for spec in specs:
+            for account in range(*spec.accounts):
+                acct_path = self.account_path(
+                    purpose=spec.purpose,
+                    account=account
+                )
+                for chain in spec.chains:
+                    task = LeafTask(
+                        wallet_cls=type(self.wallet),
+                        purpose=spec.purpose,
+                        node=self.node(index_list=acct_path + [chain]),
+                        interval=spec.interval,
+                        fields=self.fields
+                    )
+                    result.append(((spec.purpose, account), task))
+        return result
+
+    def execute(self, tasks: List[LeafTask]) -> List[List[List[str]]]:
+        """
+        Executes leaf tasks either serially or in worker processes.
+
+        :param tasks: leaf tasks
+        :return: groups for each task (in order)
+        """
+        if self.workers and self.workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                return list(executor.map(derive_leaf, tasks))
+        return [derive_leaf(task) for task in tasks]
+
+    def run(self, specs: List[DerivationSpec]
+            ) -> Dict[str, List[Dict[str, Union[dict, list]]]]:
+        """
+        Runs derivation plan.
+
+        :param specs: derivation specifications
+        :return: mapping from BIP name to list of accounts, each with
+                 account extended keys and groups of all requested chains
+        """
+        pairs = self.tasks(specs=specs)
+        results = self.execute(tasks=[task for _, task in pairs])
+        accounts = {}
+        for ((purpose, account), _), groups in zip(pairs, results):
+            key = (purpose, account)
+            if key not in accounts:
+                accounts[key] = {
+                    "account_extended_keys": self.wallet.node_extended_keys(
+                        node=self.node(
+                            index_list=self.account_path(
+                                purpose=purpose,
+                                account=account
+                            )
+                        ),
+                        private=self.private
+                    ),
+                    "groups": []
+                }
+            accounts[key]["groups"] += groups
+        result = {}
+        for (purpose, _), value in accounts.items():
+            result.setdefault("BIP{}".format(purpose), []).append(value)
+        return result
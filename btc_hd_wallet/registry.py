@@ -0,0 +1,283 @@
+from itertools import zip_longest
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+
+from btc_hd_wallet.bip32 import PubKeyNode
+from btc_hd_wallet.wallet_utils import Bip, Key
+from btc_hd_wallet.importer import parse_extended_key
+from btc_hd_wallet.address_pipeline import addresses, sec_buffer
+
+
+# default script type of account based on its extended key version
+BIP_SCRIPT_TYPES = {
+    Bip.BIP44: "p2pkh",
+    Bip.BIP49: "p2sh_p2wpkh",
+    Bip.BIP84: "p2wpkh",
+}
+
+
+class ChunkTask(object):
+
+    __slots__ = (
+        "wallet_id",
+        "chain",
+        "key",
+        "chain_code",
+        "testnet",
+        "script_type",
+        "interval"
+    )
+
+    def __init__(self, wallet_id: str, chain: int, node: PubKeyNode,
+                 script_type: str, interval: tuple):
+        """
+        Initializes chunk of address derivation work for one chain.
+
+        :param wallet_id: registered wallet identifier
+        :param chain: chain number
+        :param node: chain node
+        :param script_type: script type of addresses
+        :param interval: interval of address indexes
+        """
+        self.wallet_id = wallet_id
+        self.chain = chain
+        self.key = node.key
+        self.chain_code = node.chain_code
+        self.testnet = node.testnet
+        self.script_type = script_type
+        self.interval = interval
+
+
+def derive_chunk(task: ChunkTask) -> List[str]:
+    """
+    Derives addresses for chunk task.
+
+    :param task: chunk task
+    :return: addresses ordered by index
+    """
+    node = PubKeyNode(
+        key=task.key,
+        chain_code=task.chain_code,
+        testnet=task.testnet
+    )
+    children = node.generate_children(interval=task.interval)
+    return addresses(
+        buffer=sec_buffer(child.key for child in children),
+        script_type=task.script_type,
+        testnet=task.testnet
+    )
+
+
+class RegisteredAccount(object):
+
+    __slots__ = (
+        "wallet_id",
+        "node",
+        "script_type",
+        "priority",
+        "chain_nodes",
+        "derived"
+    )
+
+    def __init__(self, wallet_id: str, node: PubKeyNode, script_type: str,
+                 chains: tuple, priority: int = 0):
+        """
+        Initializes watch only account registered in registry.
+
+        :param wallet_id: wallet identifier
+        :param node: account public key node
+        :param script_type: script type of account addresses
+        :param chains: chains to derive
+        :param priority: scheduling priority - higher goes first (default=0)
+        """
+        self.wallet_id = wallet_id
+        self.node = node
+        self.script_type = script_type
+        self.priority = priority
+        self.chain_nodes = {chain: node.ckd(index=chain) for chain in chains}
+        # chain -> number of derived addresses
+        self.derived = {chain: 0 for chain in chains}
+
+
+class WatchOnlyRegistry(object):
+
+    __slots__ = (
+        "chains",
+        "chunk_size",
+        "workers",
+        "accounts",
+        "identities",
+        "lookup_table",
+        "executor"
+    )
+
+    def __init__(self, chains: tuple = (0, 1), chunk_size: int = 500,
+                 workers: int = None):
+        """
+        Initializes registry of watch only accounts.
+
+        Derivation of all registered accounts is split into chunks which
+        are scheduled round robin (fair) among accounts and executed on
+        one shared process pool. All derived addresses end up
+        in one combined lookup table.
+
+        :param chains: chains to derive for each account (default=(0, 1))
+        :param chunk_size: number of addresses in one chunk (default=500)
+        :param workers: number of worker processes (default=None - serial)
+        """
+        self.chains = chains
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.accounts = {}
+        # (fingerprint, chain code) -> wallet id
+        self.identities = {}
+        # address -> (wallet id, chain, index)
+        self.lookup_table = {}
+        self.executor = None
+
+    def __len__(self) -> int:
+        return len(self.accounts)
+
+    def __enter__(self) -> "WatchOnlyRegistry":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Shuts down shared process pool.
+
+        :return: None
+        """
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def add(self, account: Union[str, PubKeyNode], wallet_id: str = None,
+            script_type: str = None, priority: int = 0) -> str:
+        """
+        Registers watch only account. Accounts are deduplicated by
+        fingerprint and chain code - registering same account twice
+        returns identifier of already registered account.
+
+        :param account: account extended public key or public key node
+        :param wallet_id: wallet identifier (default=None - fingerprint hex)
+        :param script_type: script type of addresses (default=None -
+                            determined by extended key version, p2wpkh
+                            for nodes)
+        :param priority: scheduling priority - higher goes first (default=0)
+        :return: wallet identifier
+        """
+        bip_type = None
+        if isinstance(account, str):
+            account, key_type, bip_type, _ = parse_extended_key(account)
+            if key_type != Key.PUB:
+                raise ValueError("only extended public keys are accepted")
+        if type(account) != PubKeyNode:
+            raise ValueError("only public key nodes are accepted")
+        identity = (account.fingerprint(), account.chain_code)
+        if identity in self.identities:
+            return self.identities[identity]
+        wallet_id = wallet_id or identity[0].hex()
+        if wallet_id in self.accounts:
+            raise ValueError("wallet id {} already registered".format(wallet_id))
+        if script_type is None:
+            script_type = BIP_SCRIPT_TYPES.get(bip_type, "p2wpkh")
+        self.accounts[wallet_id] = RegisteredAccount(
+            wallet_id=wallet_id,
+            node=account,
+            script_type=script_type,
+            chains=self.chains,
+            priority=priority
+        )
+        self.identities[identity] = wallet_id
+        return wallet_id
+
+    def schedule(self, n: int) -> List[ChunkTask]:
+        """
+        Creates chunk tasks needed to have addresses derived up to index n
+        (exclusive) for all registered accounts. Chunks are interleaved
+        round robin among accounts, in each round higher priority accounts
+        go first.
+
+        :param n: index up to which addresses are required
+        :return: scheduled chunk tasks
+        """
+        queues = []
+        for account in sorted(self.accounts.values(),
+                              key=lambda a: -a.priority):
+            queue = []
+            for chain, chain_node in account.chain_nodes.items():
+                for start in range(account.derived[chain], n, self.chunk_size):
+                    queue.append(
+                        ChunkTask(
+                            wallet_id=account.wallet_id,
+                            chain=chain,
+                            node=chain_node,
+                            script_type=account.script_type,
+                            interval=(start, min(start + self.chunk_size, n))
+                        )
+                    )
+            queues.append(queue)
+        return [
+            task
+            for round_ in zip_longest(*queues)
+            for task in round_
+            if task is not None
+        ]
+
+    def execute(self, tasks: List[ChunkTask]) -> List[List[str]]:
+        """
+        Executes chunk tasks on shared process pool (or serially).
+
+        :param tasks: chunk tasks
+        :return: addresses for each task (in order)
+        """
+        if self.workers and self.workers > 1 and len(tasks) > 1:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            return list(self.executor.map(derive_chunk, tasks))
+        return [derive_chunk(task) for task in tasks]
+
+    def ensure_derived(self, n: int) -> int:
+        """
+        Ensures that addresses are derived up to index n (exclusive)
+        for all registered accounts and their chains.
+
+        :param n: index up to which addresses are required
+        :return: number of newly derived addresses
+        """
+        tasks = self.schedule(n=n)
+        count = 0
+        for task, addrs in zip(tasks, self.execute(tasks=tasks)):
+            start = task.interval[0]
+            for i, address in enumerate(addrs):
+                self.lookup_table[address] = (
+                    task.wallet_id, task.chain, start + i
+                )
+            count += len(addrs)
+        for account in self.accounts.values():
+            for chain in account.derived:
+                account.derived[chain] = max(account.derived[chain], n)
+        return count
+
+    def lookup(self, address: str) -> Optional[Tuple[str, int, int]]:
+        """
+        Looks up address in combined lookup table.
+
+        :param address: bitcoin address
+        :return: (wallet id, chain, index) or None if address is unknown
+        """
+        return self.lookup_table.get(address)
+
+    def derived(self) -> Dict[str, Dict[int, int]]:
+        """
+        Number of derived addresses per account and chain.
+
+        :return: mapping wallet id -> chain -> count
+        """
+        return {
+            wallet_id: dict(account.derived)
+            for wallet_id, account in self.accounts.items()
+        }
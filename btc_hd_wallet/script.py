@@ -1,11 +1,330 @@
 from io import BytesIO
+from typing import (
+    Any, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+)
 
 from btc_hd_wallet.helper import (
-    encode_varint, read_varint, little_endian_to_int, int_to_little_endian
+    encode_varint, read_varint, read_varint_from, int_to_little_endian,
+    h160_to_p2pkh_address, h160_to_p2sh_address, h160_to_p2wpkh_address,
+    h256_to_p2wsh_address, xonly_to_p2tr_address
 )
 from btc_hd_wallet.op import OP_CODE_NAMES
 
 
+# serialized standard scripts are constant apart from single pushed element
+# template: (prefix bytes including push length, suffix bytes)
+# [OP_DUP, OP_HASH160, 20-byte element, OP_EQUALVERIFY, OP_CHECKSIG]
+P2PKH_TEMPLATE = (b"\x76\xa9\x14", b"\x88\xac")
+# [OP_HASH160, 20-byte element, OP_EQUAL]
+P2SH_TEMPLATE = (b"\xa9\x14", b"\x87")
+# [OP_0, 20-byte element]
+P2WPKH_TEMPLATE = (b"\x00\x14", b"")
+# [OP_0, 32-byte element]
+P2WSH_TEMPLATE = (b"\x00\x20", b"")
+# [OP_1, 33-byte compressed public key, OP_1, OP_CHECKMULTISIG]
+MULTISIG_1OF1_TEMPLATE = (b"\x51\x21", b"\x51\xae")
+
+# multisig templates (prefix, separator, suffix) cached by (m, n)
+MULTISIG_TEMPLATES = {}
+# OP_1 - OP_16 are the only small integer opcodes
+MAX_MULTISIG_KEYS = 16
+
+# mapping: template name -> (template, prefix commands, suffix commands)
+SCRIPT_TEMPLATES = {
+    "p2pkh": (P2PKH_TEMPLATE, [0x76, 0xa9], [0x88, 0xac]),
+    "p2sh": (P2SH_TEMPLATE, [0xa9], [0x87]),
+    "p2wpkh": (P2WPKH_TEMPLATE, [0x00], []),
+    "p2wsh": (P2WSH_TEMPLATE, [0x00], []),
+    "multisig_1of1": (MULTISIG_1OF1_TEMPLATE, [0x51], [0x51, 0xae]),
+}
+
+# single byte representation of every opcode
+OP_CODE_BYTES = [bytes([i]) for i in range(256)]
+
+MAX_ELEMENT_LENGTH = 520
+
+
+def push_header(length: int) -> bytes:
+    """
+    Creates push operation header for element of length.
+
+    * 1 - 75: length encoded as single byte
+    * 76 - 255: OP_PUSHDATA1 followed by length as single byte
+    * 256 - 520: OP_PUSHDATA2 followed by length as two bytes little endian
+
+    :param length: element length
+    :return: push header
+    """
+    if length <= 75:
+        return int_to_little_endian(length, 1)
+    elif length < 256:
+        return int_to_little_endian(76, 1) + int_to_little_endian(length, 1)
+    elif length <= MAX_ELEMENT_LENGTH:
+        return int_to_little_endian(77, 1) + int_to_little_endian(length, 2)
+    # Any element longer than 520 bytes cannot be serialized.
+    raise ValueError("too long an cmd")
+
+
+# push headers for every valid element length
+PUSH_HEADERS = [push_header(i) for i in range(MAX_ELEMENT_LENGTH + 1)]
+
+
+def iter_cmds(buf: Union[bytes, memoryview], offset: int = 0,
+              end: int = None
+              ) -> Iterator[Tuple[int, Optional[memoryview]]]:
+    """
+    Lazily decodes raw script (without length prefix) into
+    (opcode, data) pairs. Data is memoryview slice of buffer (no copy)
+    for push operations and None for other opcodes.
+
+    :param buf: buffer containing raw script
+    :param offset: start of script in buffer (default=0)
+    :param end: end of script in buffer (default=None - end of buffer)
+    :return: (opcode, data) pairs
+    """
+    view = memoryview(buf)
+    end = len(view) if end is None else end
+    while offset < end:
+        op_code = view[offset]
+        offset += 1
+        if 1 <= op_code <= 75:
+            n = op_code
+        # 76 OP_PUSHDATA1,  next byte tells us how many bytes to read.
+        elif op_code == 76 and offset + 1 <= end:
+            n = view[offset]
+            offset += 1
+        # 77 OP_PUSHDATA2, next two bytes tell us how many bytes to read.
+        elif op_code == 77 and offset + 2 <= end:
+            n = view[offset] | (view[offset + 1] << 8)
+            offset += 2
+        elif op_code in (76, 77):
+            raise SyntaxError("parsing script failed")
+        else:
+            yield op_code, None
+            continue
+        if offset + n > end:
+            raise SyntaxError("parsing script failed")
+        yield op_code, view[offset:offset + n]
+        offset += n
+
+
+def iter_scripts(buf: Union[bytes, memoryview]) -> Iterator[memoryview]:
+    """
+    Iterates over contiguous buffer of serialized (length prefixed) scripts
+    and yields raw scripts as memoryview slices of buffer (no copy).
+
+    :param buf: buffer of serialized scripts
+    :return: raw scripts
+    """
+    view = memoryview(buf)
+    offset = 0
+    while offset < len(view):
+        length, offset = read_varint_from(view, offset)
+        if offset + length > len(view):
+            raise SyntaxError("parsing script failed")
+        yield view[offset:offset + length]
+        offset += length
+
+
+def _classify_25(view: memoryview) -> Tuple[str, Optional[memoryview]]:
+    """
+    Classifies 25 bytes long script - p2pkh candidate.
+
+    :param view: raw script
+    :return: script type and program
+    """
+    if view[:3] == P2PKH_TEMPLATE[0] and view[23:] == P2PKH_TEMPLATE[1]:
+        return "p2pkh", view[3:23]
+    return "nonstandard", None
+
+
+def _classify_23(view: memoryview) -> Tuple[str, Optional[memoryview]]:
+    """
+    Classifies 23 bytes long script - p2sh candidate.
+
+    :param view: raw script
+    :return: script type and program
+    """
+    if view[:2] == P2SH_TEMPLATE[0] and view[22] == P2SH_TEMPLATE[1][0]:
+        return "p2sh", view[2:22]
+    return "nonstandard", None
+
+
+def _classify_22(view: memoryview) -> Tuple[str, Optional[memoryview]]:
+    """
+    Classifies 22 bytes long script - p2wpkh candidate.
+
+    :param view: raw script
+    :return: script type and program
+    """
+    if view[:2] == P2WPKH_TEMPLATE[0]:
+        return "p2wpkh", view[2:]
+    return "nonstandard", None
+
+
+def _classify_34(view: memoryview) -> Tuple[str, Optional[memoryview]]:
+    """
+    Classifies 34 bytes long script - p2wsh or p2tr candidate.
+
+    :param view: raw script
+    :return: script type and program
+    """
+    if view[:2] == P2WSH_TEMPLATE[0]:
+        return "p2wsh", view[2:]
+    # [OP_1, 32-byte element]
+    if view[0] == 0x51 and view[1] == 0x20:
+        return "p2tr", view[2:]
+    return "nonstandard", None
+
+
+# standard scriptPubKey templates by script length
+CLASSIFIERS = {
+    25: _classify_25,
+    23: _classify_23,
+    22: _classify_22,
+    34: _classify_34,
+}
+
+# mapping: classified script type -> address encoder
+CLASSIFIED_ADDRESS_ENCODERS = {
+    "p2pkh": h160_to_p2pkh_address,
+    "p2sh": h160_to_p2sh_address,
+    "p2wpkh": h160_to_p2wpkh_address,
+    "p2wsh": h256_to_p2wsh_address,
+    "p2tr": xonly_to_p2tr_address,
+}
+
+
+def classify(script_pubkey: Union[bytes, memoryview]
+             ) -> Tuple[str, Optional[memoryview]]:
+    """
+    Classifies raw scriptPubKey (without length prefix) by its length
+    and prefix/suffix bytes - no Script object is created.
+
+    Recognized types: p2pkh, p2sh, p2wpkh, p2wsh, p2tr. Anything else
+    is nonstandard with program None.
+
+    :param script_pubkey: raw scriptPubKey
+    :return: script type and program (memoryview of hash or witness program)
+    """
+    view = memoryview(script_pubkey)
+    classifier = CLASSIFIERS.get(len(view))
+    if classifier is None:
+        return "nonstandard", None
+    return classifier(view)
+
+
+def classify_many(scripts: Union[bytes, memoryview, Iterable[bytes]]
+                  ) -> List[Tuple[str, Optional[memoryview]]]:
+    """
+    Classifies many scriptPubKeys. Scripts are either provided as iterable
+    of raw scripts or as contiguous buffer of serialized (length prefixed)
+    scripts.
+
+    :param scripts: raw scripts or buffer of serialized scripts
+    :return: list of (script type, program) pairs
+    """
+    if isinstance(scripts, (bytes, bytearray, memoryview)):
+        scripts = iter_scripts(scripts)
+    return [classify(script) for script in scripts]
+
+
+def classified_address(script_type: str, program: Union[bytes, memoryview],
+                       testnet: bool = False) -> str:
+    """
+    Encodes classified script program to address.
+
+    :param script_type: classified script type
+    :param program: script program
+    :param testnet: whether to encode as a testnet address (default=False)
+    :return: bitcoin address
+    """
+    try:
+        encoder = CLASSIFIED_ADDRESS_ENCODERS[script_type]
+    except KeyError:
+        raise ValueError("No address for script type {}".format(script_type))
+    return encoder(bytes(program), testnet=testnet)
+
+
+def match_programs(scripts: Union[bytes, memoryview, Iterable[bytes]],
+                   lookup: Mapping[bytes, Any]
+                   ) -> List[Tuple[int, str, Any]]:
+    """
+    Matches scriptPubKeys against lookup table keyed by script program
+    (hash160, sha256 or witness program bytes).
+
+    :param scripts: raw scripts or buffer of serialized scripts
+    :param lookup: mapping from program to arbitrary value
+    :return: list of (script position, script type, lookup value) matches
+    """
+    result = []
+    for i, (script_type, program) in enumerate(classify_many(scripts)):
+        if program is None:
+            continue
+        value = lookup.get(program.tobytes())
+        if value is not None:
+            result.append((i, script_type, value))
+    return result
+
+
+def multisig_template(m: int, n: int) -> Tuple[bytes, bytes, bytes]:
+    """
+    Creates m of n multisig witness script template
+    [OP_m, n * 33-byte compressed public key, OP_n, OP_CHECKMULTISIG].
+
+    :param m: threshold (number of required signatures)
+    :param n: number of public keys
+    :return: template (prefix bytes, separator bytes, suffix bytes)
+    """
+    if not 1 <= m <= n <= MAX_MULTISIG_KEYS:
+        raise ValueError(
+            "multisig requires 1 <= m <= n <= {}".format(MAX_MULTISIG_KEYS)
+        )
+    try:
+        return MULTISIG_TEMPLATES[(m, n)]
+    except KeyError:
+        template = (
+            OP_CODE_BYTES[0x50 + m],
+            b"\x21",
+            OP_CODE_BYTES[0x50 + n] + b"\xae"
+        )
+        MULTISIG_TEMPLATES[(m, n)] = template
+        return template
+
+
+def sortedmulti_serialize(m: int, keys: Iterable[bytes]) -> bytes:
+    """
+    Serializes m of n multisig witness script with keys sorted
+    lexicographically (BIP67).
+
+    :param m: threshold (number of required signatures)
+    :param keys: SEC encoded (compressed) public keys
+    :return: serialized witness script (without length prefix)
+    """
+    keys = sorted(keys)
+    prefix, separator, suffix = multisig_template(m=m, n=len(keys))
+    for key in keys:
+        if len(key) != 33:
+            raise ValueError("only compressed SEC public keys are supported")
+    return prefix + separator + separator.join(keys) + suffix
+
+
+def sortedmulti_script(m: int, keys: Iterable[bytes]) -> "Script":
+    """
+    Creates m of n multisig witness script with keys sorted (BIP67).
+
+    :param m: threshold (number of required signatures)
+    :param keys: SEC encoded (compressed) public keys
+    :return: multisig script
+    """
+    keys = sorted(keys)
+    raw = sortedmulti_serialize(m=m, keys=keys)
+    return Script(
+        cmds=[0x50 + m] + keys + [0x50 + len(keys), 0xae],
+        raw=raw
+    )
+
+
 def p2wsh_script(h256: bytes) -> "Script":
     """
     Creates p2wsh script.
@@ -14,7 +333,7 @@ def p2wsh_script(h256: bytes) -> "Script":
     :return: p2wsh script
     """
     # [OP_0, 32-byte element]
-    return Script([0x00, h256])
+    return Script.from_template(script_type="p2wsh", data=h256)
 
 
 def p2wpkh_script(h160: bytes) -> "Script":
@@ -25,7 +344,7 @@ def p2wpkh_script(h160: bytes) -> "Script":
     :return: p2wpkh script
     """
     # [OP_0, 20-byte element]
-    return Script([0x00, h160])
+    return Script.from_template(script_type="p2wpkh", data=h160)
 
 
 def p2sh_script(h160: bytes) -> "Script":
@@ -36,7 +355,7 @@ def p2sh_script(h160: bytes) -> "Script":
     :return: p2sh script
     """
     # [OP_HASH160, 20-byte element, OP_EQUAL]
-    return Script([0xa9, h160, 0x87])
+    return Script.from_template(script_type="p2sh", data=h160)
 
 
 def p2pkh_script(h160: bytes) -> "Script":
@@ -47,20 +366,25 @@ def p2pkh_script(h160: bytes) -> "Script":
     :return: p2pkh script
     """
     # [OP_DUP, OP_HASH160, 20-byte element, OP_EQUALVERIFY, OP_CHECKSIG]
-    return Script([0x76, 0xa9, h160, 0x88, 0xac])
+    return Script.from_template(script_type="p2pkh", data=h160)
 
 
 class Script:
-    def __init__(self, cmds: list = None):
+    def __init__(self, cmds: list = None, raw: bytes = None):
         """
         Initializes script from command list.
 
         :param cmds: command list
+        :param raw: already known serialization of cmds (default=None)
         """
         if cmds is None:
             self.cmds = []
         else:
             self.cmds = cmds
+        self.raw = raw
+        # commands the raw serialization belongs to - raw is used only
+        # while cmds are unchanged
+        self.raw_cmds = None if raw is None else list(self.cmds)
 
     def __eq__(self, other) -> bool:
         """
@@ -102,72 +426,123 @@ class Script:
         """
         # Script serialization starts with the length of the entire script.
         length = read_varint(s)
-        cmds = []
-        count = 0
-        # we parse until the right of bytes is consumed
-        while count < length:
-            current = s.read(1)
-            count += 1
-            # This converts the byte into an integer in Python.
-            current_byte = current[0]
-            if 1 <= current_byte <= 75:
-                n = current_byte
-                cmds.append(s.read(n))
-                count += n
-            # 76 OP_PUSHDATA1,  next byte tells us how many bytes to read.
-            elif current_byte == 76:
-                data_length = little_endian_to_int(s.read(1))
-                cmds.append(s.read(data_length))
-                count += data_length + 1
-            # 77 OP_PUSHDATA2, next two bytes tell us how many bytes to read.
-            elif current_byte == 77:
-                data_length = little_endian_to_int(s.read(2))
-                cmds.append(s.read(data_length))
-                count += data_length + 2
-            else:
-                # opcode
-                op_code = current_byte
-                cmds.append(op_code)
+        raw = s.read(length)
+        if len(raw) != length:
+            raise SyntaxError("parsing script failed")
+        return cls([
+            op_code if data is None else bytes(data)
+            for op_code, data in iter_cmds(raw)
+        ])
 
-        if count != length:
+    @classmethod
+    def parse_view(cls, buf: Union[bytes, memoryview],
+                   offset: int = 0) -> Tuple["Script", int]:
+        """
+        Initializes script from serialized script at offset in buffer
+        without copying. Pushed elements are memoryview slices of buffer.
+
+        :param buf: buffer
+        :param offset: position of serialized script in buffer (default=0)
+        :return: script and offset right after parsed script
+        """
+        view = memoryview(buf)
+        # Script serialization starts with the length of the entire script.
+        length, offset = read_varint_from(view, offset)
+        end = offset + length
+        if end > len(view):
             raise SyntaxError("parsing script failed")
-        return cls(cmds)
+        cmds = [
+            op_code if data is None else data
+            for op_code, data in iter_cmds(view, offset=offset, end=end)
+        ]
+        return cls(cmds), end
+
+    @classmethod
+    def parse_many(cls, buf: Union[bytes, memoryview]) -> List["Script"]:
+        """
+        Initializes scripts from contiguous buffer of serialized scripts
+        without copying. Pushed elements are memoryview slices of buffer.
+
+        :param buf: buffer of serialized scripts
+        :return: list of scripts
+        """
+        view = memoryview(buf)
+        result = []
+        offset = 0
+        while offset < len(view):
+            script, offset = cls.parse_view(view, offset=offset)
+            result.append(script)
+        return result
+
+    @classmethod
+    def from_template(cls, script_type: str, data: bytes) -> "Script":
+        """
+        Initializes standard script from template. Serialization is
+        created by splicing data between cached prefix and suffix bytes.
+
+        Supported script types: p2pkh, p2sh, p2wpkh, p2wsh, multisig_1of1
+
+        :param script_type: template name
+        :param data: pushed element (hash or public key)
+        :return: script
+        """
+        try:
+            (prefix, suffix), prefix_cmds, suffix_cmds = \
+                SCRIPT_TEMPLATES[script_type]
+        except KeyError:
+            raise ValueError("Unsupported script type {}".format(script_type))
+        if len(data) != prefix[-1]:
+            raise ValueError(
+                "{} requires {} bytes element".format(script_type, prefix[-1])
+            )
+        return cls(
+            cmds=prefix_cmds + [data] + suffix_cmds,
+            raw=prefix + data + suffix
+        )
 
     def raw_serialize(self) -> bytes:
         """
         Serializes script.
 
+        Script created from template already carries its serialization
+        (used only if cmds were not modified since). Otherwise whole length
+        is computed first and commands are written into single
+        preallocated buffer.
+
         :return: serialized script
         """
-        result = b""
+        if self.raw is not None and self.cmds == self.raw_cmds:
+            return self.raw
+        headers = []
+        size = 0
         for cmd in self.cmds:
             # If the command is an integer, we know that’s an opcode.
             if type(cmd) == int:
-                result += int_to_little_endian(cmd, 1)
+                size += 1
             else:
                 length = len(cmd)
-                if length < 75:
-                    # length between 1 - 75 inclusive,
-                    # we encode the length as a single byte.
-                    result += int_to_little_endian(length, 1)
-                elif 75 < length < 256:
-                    # For any element with length from 76 to 255,
-                    # we put OP_PUSHDATA1 first, then encode the length
-                    # as a single byte, followed by the element.
-                    result += int_to_little_endian(76, 1)
-                    result += int_to_little_endian(length, 1)
-                elif 256 <= length <= 520:
-                    # For an element with a length from 256 to 520,
-                    # we put OP_PUSHDATA2 first, then encode the length
-                    # as two bytes in little endian, followed by the element.
-                    result += int_to_little_endian(77, 1)
-                    result += int_to_little_endian(length, 2)
-                else:
+                if length > MAX_ELEMENT_LENGTH:
                     # Any element longer than 520 bytes cannot be serialized.
                     raise ValueError("too long an cmd")
+                header = PUSH_HEADERS[length]
+                headers.append(header)
+                size += len(header) + length
+        result = bytearray(size)
+        view = memoryview(result)
+        offset = 0
+        headers = iter(headers)
+        for cmd in self.cmds:
+            if type(cmd) == int:
+                view[offset:offset + 1] = OP_CODE_BYTES[cmd]
+                offset += 1
+            else:
+                header = next(headers)
+                end = offset + len(header)
+                view[offset:end] = header
+                offset = end + len(cmd)
                 # actual element appending
-                result += cmd
-        return result
+                view[end:offset] = cmd
+        return bytes(result)
 
     def serialize(self) -> bytes:
         """
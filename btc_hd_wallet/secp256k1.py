@@ -0,0 +1,383 @@
+import sys
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+
+# field prime
+FIELD_ORDER = 2 ** 256 - 2 ** 32 - 977
+# group order
+CURVE_ORDER = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+# generator
+GX = 0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798
+GY = 0x483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8
+
+# GLV endomorphism - lambda * (x, y) = (beta * x, y)
+LAMBDA = 0x5363AD4CC05C30E0A5261C028812645A122E22EA20816678DF02967C1B23BD72
+BETA = 0x7AE96A2B657C07106E64479EAC3434E99CF0497512F58995C1396C28719501EE
+# short basis of lattice {(a, b): a + b * lambda = 0 mod n}
+A1 = 0x3086D221A7D46BCDE86C90E49284EB15
+B1 = -0xE4437ED6010E88286F547FA90ABFE4C3
+A2 = 0x114CA50F7A8E2F3F657C1108D9D44CFD8
+B2 = A1
+
+# wNAF window width for variable base multiplication
+WNAF_WIDTH = 5
+
+# d * 16^w * G affine points - filled lazily
+GENERATOR_TABLE = []
+
+INFINITY = (0, 1, 0)
+
+# pow with negative exponent (modular inverse) is available on Python 3.8+
+NATIVE_INVERSE = sys.version_info >= (3, 8)
+
+
+def lift_x(x: int) -> Tuple[int, int]:
+    """
+    Lifts x coordinate to point with even y coordinate (BIP340).
+
+    :param x: x coordinate
+    :return: affine point (x, y)
+    """
+    if x >= FIELD_ORDER:
+        raise ValueError("x coordinate is not in field")
+    c = (pow(x, 3, FIELD_ORDER) + 7) % FIELD_ORDER
+    y = pow(c, (FIELD_ORDER + 1) // 4, FIELD_ORDER)
+    if y * y % FIELD_ORDER != c:
+        raise ValueError("x coordinate is not on curve")
+    return x, y if y % 2 == 0 else FIELD_ORDER - y
+
+
+def is_on_curve(x: int, y: int) -> bool:
+    """
+    Checks whether affine point is on curve y^2 = x^3 + 7.
+
+    :param x: x coordinate
+    :param y: y coordinate
+    :return: whether point is on curve
+    """
+    p = FIELD_ORDER
+    return 0 <= x < p and 0 <= y < p and (y * y - x * x * x - 7) % p == 0
+
+
+@lru_cache(maxsize=4096)
+def decompress(sec: bytes) -> Tuple[int, int]:
+    """
+    Decodes SEC public key (compressed or uncompressed) to affine point.
+    Results are cached - the same parent keys are decoded over and over.
+
+    :param sec: SEC encoded public key
+    :return: affine point (x, y)
+    """
+    if len(sec) == 33 and sec[0] in (2, 3):
+        x, y = lift_x(int.from_bytes(sec[1:], "big"))
+        if sec[0] == 3:
+            y = FIELD_ORDER - y
+        return x, y
+    if len(sec) == 65 and sec[0] == 4:
+        x = int.from_bytes(sec[1:33], "big")
+        y = int.from_bytes(sec[33:], "big")
+        if not is_on_curve(x, y):
+            raise ValueError("point is not on curve")
+        return x, y
+    raise ValueError("invalid SEC public key")
+
+
+def compress(x: int, y: int) -> bytes:
+    """
+    Encodes affine point to compressed SEC public key.
+
+    :param x: x coordinate
+    :param y: y coordinate
+    :return: 33 bytes SEC public key
+    """
+    return (b"\x03" if y & 1 else b"\x02") + x.to_bytes(32, "big")
+
+
+def jacobian_double(X: int, Y: int, Z: int) -> Tuple[int, int, int]:
+    """
+    Doubles point in jacobian coordinates (a = 0).
+
+    :return: jacobian point (Z = 0 is point at infinity)
+    """
+    p = FIELD_ORDER
+    if not Y:
+        return INFINITY
+    YY = Y * Y % p
+    S = 4 * X * YY % p
+    M = 3 * X * X % p
+    X3 = (M * M - 2 * S) % p
+    return X3, (M * (S - X3) - 8 * YY * YY) % p, 2 * Y * Z % p
+
+
+def jacobian_add_affine(X1: int, Y1: int, Z1: int, x2: int, y2: int
+                        ) -> Tuple[int, int, int]:
+    """
+    Adds affine point to point in jacobian coordinates (mixed addition).
+
+    :return: jacobian point (Z = 0 is point at infinity)
+    """
+    p = FIELD_ORDER
+    if not Z1:
+        return x2, y2, 1
+    Z1Z1 = Z1 * Z1 % p
+    H = (x2 * Z1Z1 - X1) % p
+    r = (y2 * Z1 * Z1Z1 - Y1) % p
+    if not H:
+        if not r:
+            return jacobian_double(X1, Y1, Z1)
+        return INFINITY
+    HH = H * H % p
+    HHH = H * HH % p
+    V = X1 * HH % p
+    X3 = (r * r - HHH - 2 * V) % p
+    return X3, (r * (V - X3) - Y1 * HHH) % p, Z1 * H % p
+
+
+def jacobian_add(X1: int, Y1: int, Z1: int, X2: int, Y2: int, Z2: int
+                 ) -> Tuple[int, int, int]:
+    """
+    Adds two points in jacobian coordinates.
+
+    :return: jacobian point (Z = 0 is point at infinity)
+    """
+    p = FIELD_ORDER
+    if not Z1:
+        return X2, Y2, Z2
+    if not Z2:
+        return X1, Y1, Z1
+    Z1Z1 = Z1 * Z1 % p
+    Z2Z2 = Z2 * Z2 % p
+    U1 = X1 * Z2Z2 % p
+    U2 = X2 * Z1Z1 % p
+    S1 = Y1 * Z2 * Z2Z2 % p
+    S2 = Y2 * Z1 * Z1Z1 % p
+    H = (U2 - U1) % p
+    r = (S2 - S1) % p
+    if not H:
+        if not r:
+            return jacobian_double(X1, Y1, Z1)
+        return INFINITY
+    HH = H * H % p
+    HHH = H * HH % p
+    V = U1 * HH % p
+    X3 = (r * r - HHH - 2 * V) % p
+    return X3, (r * (V - X3) - S1 * HHH) % p, Z1 * Z2 * H % p
+
+
+def inverse(a: int, modulus: int) -> int:
+    """
+    Modular inverse - native on Python 3.8+, Fermat's little theorem
+    on older versions.
+
+    :param a: value to invert
+    :param modulus: prime modulus
+    :return: inverted value
+    """
+    if not a % modulus:
+        raise ValueError("{} is not invertible modulo {}".format(a, modulus))
+    if NATIVE_INVERSE:
+        return pow(a, -1, modulus)
+    return pow(a, modulus - 2, modulus)
+
+
+def to_affine(X: int, Y: int, Z: int) -> Tuple[int, int]:
+    """
+    Converts jacobian point to affine coordinates.
+
+    :return: affine point
+    """
+    if not Z:
+        raise ValueError("point at infinity has no affine coordinates")
+    p = FIELD_ORDER
+    z_inv = inverse(Z, p)
+    zz_inv = z_inv * z_inv % p
+    return X * zz_inv % p, Y * zz_inv * z_inv % p
+
+
+def batch_inverse(values: List[int], modulus: int) -> List[int]:
+    """
+    Inverts many non zero values with single modular inversion
+    (Montgomery batch inversion).
+
+    :param values: values to invert
+    :param modulus: prime modulus
+    :return: inverted values
+    """
+    prefix = []
+    acc = 1
+    for value in values:
+        prefix.append(acc)
+        acc = acc * value % modulus
+    inv = inverse(acc, modulus)
+    result = [0] * len(values)
+    for i in range(len(values) - 1, -1, -1):
+        result[i] = inv * prefix[i] % modulus
+        inv = inv * values[i] % modulus
+    return result
+
+
+def batch_to_affine(points: List[Tuple[int, int, int]]
+                    ) -> List[Tuple[int, int]]:
+    """
+    Converts jacobian points to affine coordinates with single field
+    inversion.
+
+    :param points: jacobian points (none of them at infinity)
+    :return: affine points
+    """
+    p = FIELD_ORDER
+    result = []
+    for (X, Y, _), z_inv in zip(
+            points, batch_inverse([Z for _, _, Z in points], p)):
+        zz_inv = z_inv * z_inv % p
+        result.append((X * zz_inv % p, Y * zz_inv * z_inv % p))
+    return result
+
+
+def generator_table() -> List[List[Optional[Tuple[int, int]]]]:
+    """
+    Fixed base table of affine points d * 16^w * G for every 4-bit window
+    w in 0..63 and digit d in 1..15 (computed once).
+
+    :return: generator table (entry for digit 0 is None)
+    """
+    if not GENERATOR_TABLE:
+        x, y = GX, GY
+        for _ in range(64):
+            points = [(x, y, 1)]
+            for _ in range(15):
+                points.append(jacobian_add_affine(*points[-1], x, y))
+            affine = batch_to_affine(points)
+            GENERATOR_TABLE.append([None] + affine[:15])
+            x, y = affine[15]
+    return GENERATOR_TABLE
+
+
+def fixed_base_mul(k: int) -> Tuple[int, int, int]:
+    """
+    Multiplies generator by scalar with precomputed generator table
+    (additions only, no doublings).
+
+    :param k: scalar (0 <= k < 2^256)
+    :return: jacobian point (Z = 0 is point at infinity)
+    """
+    X, Y, Z = INFINITY
+    for window in generator_table():
+        digit = k & 15
+        if digit:
+            X, Y, Z = jacobian_add_affine(X, Y, Z, *window[digit])
+        k >>= 4
+    return X, Y, Z
+
+
+def glv_split(k: int) -> Tuple[int, int]:
+    """
+    Splits scalar to two half length scalars k = k1 + k2 * lambda (mod n)
+    with GLV lattice basis.
+
+    :param k: scalar (0 <= k < n)
+    :return: k1 and k2 (both can be negative, |k1|, |k2| < 2^129)
+    """
+    n = CURVE_ORDER
+    c1 = (B2 * k + n // 2) // n
+    c2 = (-B1 * k + n // 2) // n
+    return k - c1 * A1 - c2 * A2, -c1 * B1 - c2 * B2
+
+
+def wnaf(k: int, width: int = WNAF_WIDTH) -> List[int]:
+    """
+    Width-w non-adjacent form of non negative scalar - every non zero
+    digit is odd, |digit| < 2^(w-1) and among any w consecutive digits
+    at most one is non zero.
+
+    :param k: scalar (k >= 0)
+    :param width: window width (default=WNAF_WIDTH)
+    :return: digits from least significant
+    """
+    window = 1 << width
+    half = window >> 1
+    digits = []
+    while k:
+        if k & 1:
+            digit = k & (window - 1)
+            if digit >= half:
+                digit -= window
+            k -= digit
+        else:
+            digit = 0
+        digits.append(digit)
+        k >>= 1
+    return digits
+
+
+def odd_multiples(x: int, y: int, width: int = WNAF_WIDTH
+                  ) -> List[Tuple[int, int]]:
+    """
+    Affine odd multiples 1P, 3P, ..., (2^(w-1) - 1)P of point
+    (single field inversion).
+
+    :param x: x coordinate
+    :param y: y coordinate
+    :param width: window width (default=WNAF_WIDTH)
+    :return: odd multiples (index i holds (2i + 1)P)
+    """
+    double = jacobian_double(x, y, 1)
+    points = [(x, y, 1)]
+    for _ in range((1 << (width - 2)) - 1):
+        points.append(jacobian_add(*points[-1], *double))
+    return batch_to_affine(points)
+
+
+def point_mul(k: int, x: int, y: int) -> Tuple[int, int, int]:
+    """
+    Multiplies point by scalar. Scalar is split with GLV endomorphism
+    to two half length scalars, both recoded to wNAF and processed
+    together (Strauss) - doublings are shared and halved. Odd multiples
+    of lambda * P are derived from odd multiples of P for free.
+
+    :param k: scalar
+    :param x: x coordinate of point
+    :param y: y coordinate of point
+    :return: jacobian point (Z = 0 is point at infinity)
+    """
+    p = FIELD_ORDER
+    k1, k2 = glv_split(k % CURVE_ORDER)
+    table = odd_multiples(x, y)
+    # sign of scalar is moved to point, sign of digit flips it again
+    naf = []
+    for scalar, endomorphism in ((k1, False), (k2, True)):
+        points = [
+            (BETA * px % p if endomorphism else px, py) for px, py in table
+        ]
+        digits = wnaf(abs(scalar))
+        naf.append((digits, points, scalar < 0))
+    X, Y, Z = INFINITY
+    for i in range(max(len(naf[0][0]), len(naf[1][0])) - 1, -1, -1):
+        if Z:
+            X, Y, Z = jacobian_double(X, Y, Z)
+        for digits, points, negative in naf:
+            if i < len(digits) and digits[i]:
+                digit = digits[i]
+                px, py = points[abs(digit) >> 1]
+                if (digit < 0) != negative:
+                    py = p - py
+                X, Y, Z = jacobian_add_affine(X, Y, Z, px, py)
+    return X, Y, Z
+
+
+def double_mul(u1: int, u2: int, x: int, y: int) -> Tuple[int, int, int]:
+    """
+    Computes u1 * G + u2 * P - generator part uses fixed base table,
+    point part uses GLV and wNAF.
+
+    :param u1: generator scalar
+    :param u2: point scalar
+    :param x: x coordinate of point P
+    :param y: y coordinate of point P
+    :return: jacobian point (Z = 0 is point at infinity)
+    """
+    return jacobian_add(
+        *fixed_base_mul(u1 % CURVE_ORDER),
+        *point_mul(u2, x, y)
+    )
@@ -0,0 +1,298 @@
+import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from btc_hd_wallet.wallet_utils import Key
+from btc_hd_wallet.importer import parse_extended_key
+from btc_hd_wallet.paper_wallet import PaperWallet
+from btc_hd_wallet.compression import StreamWriter, codec_from_path
+from btc_hd_wallet.planner import (
+    DerivationPlanner, DerivationSpec, LeafTask, derive_leaf
+)
+
+
+# number of address indexes in one shard
+SHARD_SIZE = 100000
+# version of job and shard digest format
+JOB_VERSION = 1
+# merge output formats - JSON lines or binary SEC key table
+# (contiguous buffer consumed by address pipeline)
+MERGE_FORMATS = ("jsonl", "sec")
+
+Shard = Tuple[int, int, str, str, int, tuple]
+
+
+def plan_job(wallet, specs: List[DerivationSpec],
+             shard_size: int = SHARD_SIZE, fields: tuple = None) -> dict:
+    """
+    Creates sharded export job from wallet and derivation specifications.
+
+    Job contains only account extended public keys - shards are derived
+    from them with public derivation, therefore any machine can run
+    any shard without access to wallet secrets.
+
+    :param wallet: paper wallet
+    :param specs: derivation specifications
+    :param shard_size: number of address indexes in one shard
+                        (default=SHARD_SIZE)
+    :param fields: row fields - any of path, address, sec
+                    (default=None - PUBLIC_FIELDS)
+    :return: job mapping
+    """
+    if shard_size < 1:
+        raise ValueError("shard size has to be positive")
+    planner = DerivationPlanner(wallet=wallet, private=False, fields=fields)
+    accounts = []
+    for spec in specs:
+        for account in range(*spec.accounts):
+            node = planner.node(
+                index_list=planner.account_path(
+                    purpose=spec.purpose,
+                    account=account
+                )
+            )
+            accounts.append({
+                "purpose": spec.purpose,
+                "account": account,
+                "path": str(node),
+                "xpub": wallet.node_extended_public_key(node=node),
+                "chains": list(spec.chains),
+                "interval": list(spec.interval),
+            })
+    return {
+        "version": JOB_VERSION,
+        "testnet": wallet.testnet,
+        "fields": list(planner.fields),
+        "shard_size": shard_size,
+        "accounts": accounts,
+    }
+
+
+def job_digest(job: dict) -> str:
+    """
+    Digest of job - sha256 of its canonical JSON serialization.
+
+    :param job: job mapping
+    :return: hex digest
+    """
+    return hashlib.sha256(
+        json.dumps(job, sort_keys=True, separators=(",", ":")).encode()
+    ).hexdigest()
+
+
+def shards(job: dict) -> List[Shard]:
+    """
+    Deterministic split of job into shards in output order.
+
+    :param job: job mapping
+    :return: list of (purpose, account, path, xpub, chain, interval)
+    """
+    if job.get("version") != JOB_VERSION:
+        raise ValueError(
+            "unsupported job version {}".format(job.get("version"))
+        )
+    size = job["shard_size"]
+    result = []
+    for account in job["accounts"]:
+        start, end = account["interval"]
+        for chain in account["chains"]:
+            for i in range(start, end, size):
+                result.append((
+                    account["purpose"], account["account"], account["path"],
+                    account["xpub"], chain, (i, min(i + size, end))
+                ))
+    return result
+
+
+def shard_paths(directory: str, shard_id: int) -> Tuple[str, str]:
+    """
+    Paths of shard file and its digest file.
+
+    :param directory: shards directory
+    :param shard_id: shard number
+    :return: shard file path and digest file path
+    """
+    name = os.path.join(directory, "shard-{:06d}".format(shard_id))
+    return name + ".jsonl", name + ".digest"
+
+
+def verify_shard(job: dict, shard_id: int, directory: str) -> Optional[dict]:
+    """
+    Verifies shard file against its digest and job.
+
+    :param job: job mapping
+    :param shard_id: shard number
+    :param directory: shards directory
+    :return: shard digest or None if shard is missing or corrupted
+    """
+    file_path, digest_path = shard_paths(directory, shard_id)
+    try:
+        with open(digest_path, "r") as f:
+            digest = json.load(f)
+        with open(file_path, "rb") as f:
+            data = f.read()
+    except (OSError, ValueError):
+        return None
+    if digest.get("job") != job_digest(job) or \
+            digest.get("shard") != shard_id or \
+            digest.get("sha256") != hashlib.sha256(data).hexdigest():
+        return None
+    return digest
+
+
+def check_shard_id(shard_id: int, count: int) -> None:
+    """
+    Checks that shard number belongs to job.
+
+    :param shard_id: shard number
+    :param count: number of shards in job
+    :return: None
+    """
+    if not 0 <= shard_id < count:
+        raise ValueError(
+            "shard {} out of range - job has {} shards (0-{})".format(
+                shard_id, count, count - 1
+            )
+        )
+
+
+def run_shard(job: dict, shard_id: int, directory: str) -> dict:
+    """
+    Derives rows of one shard from account extended public key and writes
+    shard file and its digest. Already finished shard is not derived again.
+
+    :param job: job mapping
+    :param shard_id: shard number
+    :param directory: shards directory
+    :return: shard digest
+    """
+    job_shards = shards(job)
+    check_shard_id(shard_id=shard_id, count=len(job_shards))
+    digest = verify_shard(job=job, shard_id=shard_id, directory=directory)
+    if digest is not None:
+        return digest
+    purpose, _, path, xpub, chain, interval = job_shards[shard_id]
+    node, key_type, _, _ = parse_extended_key(xpub)
+    if key_type != Key.PUB:
+        raise ValueError("only extended public keys are accepted")
+    task = LeafTask(
+        wallet_cls=PaperWallet,
+        purpose=purpose,
+        node=node.ckd(index=chain),
+        interval=interval,
+        fields=tuple(job["fields"])
+    )
+    task.path = "{}/{}".format(path, chain)
+    data = "".join(
+        json.dumps(group) + "\n" for group in derive_leaf(task)
+    ).encode()
+    file_path, digest_path = shard_paths(directory, shard_id)
+    digest = {
+        "job": job_digest(job),
+        "shard": shard_id,
+        "rows": interval[1] - interval[0],
+        "sha256": hashlib.sha256(data).hexdigest(),
+    }
+    with open(file_path, "wb") as f:
+        f.write(data)
+    # digest written last - shard without digest is unfinished
+    with open(digest_path, "w") as f:
+        json.dump(digest, f)
+    return digest
+
+
+def run_shards(job: dict, directory: str, shard_ids: List[int] = None,
+               workers: int = None) -> List[dict]:
+    """
+    Runs shards either serially or in worker processes.
+
+    :param job: job mapping
+    :param directory: shards directory
+    :param shard_ids: shard numbers (default=None - all shards)
+    :param workers: number of worker processes (default=None - serial)
+    :return: shard digests (in order of shard ids)
+    """
+    count = len(shards(job))
+    if shard_ids is None:
+        shard_ids = list(range(count))
+    # all numbers are checked before any shard is derived
+    for shard_id in shard_ids:
+        check_shard_id(shard_id=shard_id, count=count)
+    args = [(job, i, directory) for i in shard_ids]
+    if workers and workers > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(run_shard, *zip(*args)))
+    return [run_shard(*arg) for arg in args]
+
+
+def merge_shards(job: dict, directory: str, output: str,
+                 fmt: str = "jsonl", compress: str = None) -> dict:
+    """
+    Verifies all shards and merges them in order to output file.
+
+    JSON lines output is plain concatenation of shard files. Binary
+    SEC output is contiguous buffer of compressed public keys (requires
+    sec field) that can be consumed by address pipeline directly.
+    Output is compressed in separate thread while next shards are read.
+
+    :param job: job mapping
+    :param directory: shards directory
+    :param output: path to output file
+    :param fmt: output format - one of MERGE_FORMATS (default=jsonl)
+    :param compress: compression codec - one of gzip, xz, bz2, zstd
+                    (default=None - determined by file extension)
+    :return: merge summary - job digest, number of shards and rows,
+             sha256 of (uncompressed) output
+    """
+    if fmt not in MERGE_FORMATS:
+        raise ValueError(
+            "unknown format {}. Allowed {}".format(fmt, list(MERGE_FORMATS))
+        )
+    if fmt == "sec" and "sec" not in job["fields"]:
+        raise ValueError("sec format requires sec field")
+    count = len(shards(job))
+    digests = [
+        verify_shard(job=job, shard_id=i, directory=directory)
+        for i in range(count)
+    ]
+    bad = [i for i, digest in enumerate(digests) if digest is None]
+    if bad:
+        raise ValueError("missing or corrupted shards {}".format(bad))
+    if os.path.exists(output):
+        raise ValueError("File {} already exists".format(output))
+    output_hash = hashlib.sha256()
+    sec = job["fields"].index("sec") if fmt == "sec" else None
+    codec = compress or codec_from_path(output)
+    try:
+        with open(output, "wb") as out:
+            with StreamWriter(file=out, codec=codec) as writer:
+                for i in range(count):
+                    file_path, _ = shard_paths(directory, i)
+                    with open(file_path, "rb") as f:
+                        data = f.read()
+                    # shard could change since it was verified - merged
+                    # bytes are checked against digest again
+                    if hashlib.sha256(data).hexdigest() != \
+                            digests[i]["sha256"]:
+                        raise ValueError(
+                            "shard {} changed during merge".format(i)
+                        )
+                    if sec is not None:
+                        data = b"".join(
+                            bytes.fromhex(json.loads(line)[sec])
+                            for line in data.splitlines()
+                        )
+                    writer.write(data=data)
+                    output_hash.update(data)
+    except BaseException:
+        # incomplete output is never left behind
+        os.remove(output)
+        raise
+    return {
+        "job": job_digest(job),
+        "shards": count,
+        "rows": sum(digest["rows"] for digest in digests),
+        "sha256": output_hash.hexdigest(),
+    }
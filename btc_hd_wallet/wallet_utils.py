@@ -1,5 +1,5 @@
 import enum
-from typing import Any, List, Union
+from typing import Any, Dict, List, Tuple, Union
 
 
 class Bip(enum.Enum):
@@ -102,15 +102,11 @@ class Version(object):
         """
         if not isinstance(version_int, int):
             raise ValueError("has to be integer")
-        if not cls.valid_version(version=version_int):
+        try:
+            key_type, bip_type, testnet = VERSION_TABLE[version_int]
+        except KeyError:
             raise ValueError("unsupported version")
-        testnet = version_int in cls.testnet_versions()
-        private = version_int in cls.prv_versions()
-        return cls(
-            key_type=Key.PRV.value if private else Key.PUB.value,
-            bip=cls.bip(version=version_int),
-            testnet=testnet
-        )
+        return cls(key_type=key_type.value, bip=bip_type.value, testnet=testnet)
 
     @classmethod
     def valid_version(cls, version: int) -> bool:
@@ -122,10 +118,7 @@ class Version(object):
         :param version: extended key version
         :return: True/False
         """
-        _all = cls.testnet_versions() + cls.mainnet_versions()
-        if version in _all:
-            return True
-        return False
+        return version in VERSION_TABLE
 
     @classmethod
     def bip(cls, version: int) -> int:
@@ -135,14 +128,24 @@ class Version(object):
         :param version: extended key version
         :return: bip number
         """
-        if version in cls.bip44_data().values():
-            return Bip.BIP44.value
-        elif version in cls.bip49_data().values():
-            return Bip.BIP49.value
-        elif version in cls.bip84_data().values():
-            return Bip.BIP84.value
-        else:
-            return Bip.BIP44.value
+        if version in VERSION_TABLE:
+            return VERSION_TABLE[version][1].value
+        return Bip.BIP44.value
+
+    @classmethod
+    def table(cls) -> Dict[int, Tuple[Key, Bip, bool]]:
+        """
+        Builds mapping from every supported extended key version to its
+        key type, bip and network.
+
+        :return: mapping version -> (key type, bip, testnet)
+        """
+        result = {}
+        for testnet, dct in ((False, cls.main), (True, cls.test)):
+            for key_type, versions in dct.items():
+                for bip_type, version in versions.items():
+                    result[version] = (Key[key_type], Bip[bip_type], testnet)
+        return result
 
     @classmethod
     def bip44_data(cls) -> dict:
@@ -247,6 +250,10 @@ class Version(object):
         return cls.key_versions(key_type=Key.PUB.name)
 
 
+# precomputed version -> (key type, bip, testnet) lookup table
+VERSION_TABLE = Version.table()
+
+
 class Bip32Path(object):
 
     __slots__ = (
@@ -0,0 +1,125 @@
+import unittest
+
+from btc_hd_wallet import bech32
+from btc_hd_wallet.helper import (
+    h160_to_p2pkh_address, h160_to_p2sh_address, h160_to_p2wpkh_address,
+    h256_to_p2wsh_address, xonly_to_p2tr_address
+)
+from btc_hd_wallet.script import classify
+from btc_hd_wallet.address import (
+    DecodedAddress, decode_address, decode_many
+)
+
+
+H160 = bytes.fromhex("74d691da1574e6b3c192ecfb52cc8984ee7b6c56")
+H256 = bytes.fromhex(
+    "c3ef08811cd374113edddaf67bf00894889671b8bad0ce5abd0bdec0c09a4ae1"
+)
+
+
+class TestDecodeAddress(unittest.TestCase):
+
+    def test_all_types(self):
+        data = [
+            (h160_to_p2pkh_address(H160), "mainnet", "p2pkh", H160, None),
+            (h160_to_p2pkh_address(H160, testnet=True),
+             "testnet", "p2pkh", H160, None),
+            (h160_to_p2sh_address(H160), "mainnet", "p2sh", H160, None),
+            (h160_to_p2sh_address(H160, testnet=True),
+             "testnet", "p2sh", H160, None),
+            (h160_to_p2wpkh_address(H160), "mainnet", "p2wpkh", H160, 0),
+            (h160_to_p2wpkh_address(H160, testnet=True),
+             "testnet", "p2wpkh", H160, 0),
+            (h256_to_p2wsh_address(H256), "mainnet", "p2wsh", H256, 0),
+            (xonly_to_p2tr_address(H256, testnet=True),
+             "testnet", "p2tr", H256, 1),
+            (bech32.encode("bcrt", 0, H160), "regtest", "p2wpkh", H160, 0),
+            (bech32.encode("bcrt", 1, H256), "regtest", "p2tr", H256, 1),
+            (bech32.encode("bc", 2, H160[:16]),
+             "mainnet", "witness_unknown", H160[:16], 2),
+            ("BC1SW50QGDZ25J", "mainnet", "witness_unknown",
+             bytes.fromhex("751e"), 16),
+        ]
+        for address, network, script_type, program, witver in data:
+            decoded = decode_address(address)
+            self.assertEqual(decoded, DecodedAddress(
+                address=address,
+                network=network,
+                script_type=script_type,
+                program=program,
+                witness_version=witver
+            ))
+            if script_type != "witness_unknown":
+                classified, got = classify(decoded.script_pubkey())
+                self.assertEqual(classified, script_type)
+                self.assertEqual(bytes(got), program)
+
+    def test_invalid(self):
+        p2pkh = h160_to_p2pkh_address(H160)
+        p2wpkh = h160_to_p2wpkh_address(H160)
+        invalid = [
+            "",
+            "1",
+            p2pkh[:-1] + ("1" if p2pkh[-1] != "1" else "2"),  # checksum
+            p2pkh[:10] + "0" + p2pkh[11:],  # charset
+            "x" + p2pkh[1:],  # prefix
+            p2pkh + "1111111111",  # length
+            p2wpkh[:-1] + ("q" if p2wpkh[-1] != "q" else "p"),  # checksum
+            p2wpkh[:10] + "b" + p2wpkh[11:],  # charset
+            p2wpkh[:10] + p2wpkh[10:].upper(),  # mixed case
+            "ltc1" + p2wpkh[3:],  # hrp
+            p2wpkh + "q" * 60,  # length
+            # bech32m checksum with witness v0
+            bech32.bech32_encode(
+                "bc", [0] + bech32.convertbits(H160, 8, 5),
+                bech32.Encoding.BECH32M
+            ),
+            # bech32 checksum with witness v1
+            bech32.bech32_encode(
+                "bc", [1] + bech32.convertbits(H256, 8, 5),
+                bech32.Encoding.BECH32
+            ),
+        ]
+        for address in invalid:
+            with self.assertRaises(ValueError):
+                decode_address(address)
+        self.assertEqual(
+            decode_address(p2wpkh.upper()).program, H160
+        )
+
+    def test_network(self):
+        p2pkh = h160_to_p2pkh_address(H160, testnet=True)
+        regtest = bech32.encode("bcrt", 0, H160)
+        self.assertEqual(
+            decode_address(p2pkh, network="testnet").network, "testnet"
+        )
+        # base58 regtest addresses share testnet version bytes
+        self.assertEqual(
+            decode_address(p2pkh, network="regtest").network, "testnet"
+        )
+        self.assertEqual(
+            decode_address(regtest, network="regtest").network, "regtest"
+        )
+        with self.assertRaises(ValueError):
+            decode_address(p2pkh, network="mainnet")
+        with self.assertRaises(ValueError):
+            decode_address(regtest, network="testnet")
+        with self.assertRaises(ValueError):
+            decode_address(p2pkh, network="signet")
+
+    def test_decode_many(self):
+        p2pkh = h160_to_p2pkh_address(H160)
+        p2wpkh = h160_to_p2wpkh_address(H160, testnet=True)
+        result = decode_many([p2pkh, "bad", p2wpkh, p2pkh, None, ""])
+        self.assertEqual(result[0], decode_address(p2pkh))
+        self.assertEqual(result[2], decode_address(p2wpkh))
+        self.assertIs(result[0], result[3])
+        self.assertEqual([r is None for r in result],
+                         [False, True, False, False, True, True])
+        result = decode_many([p2pkh, p2wpkh], network="mainnet")
+        self.assertEqual(result[0].script_type, "p2pkh")
+        self.assertIsNone(result[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+
+from btc_hd_wallet.base_wallet import BaseWallet
+from btc_hd_wallet.helper import hash160, sha256
+from btc_hd_wallet.keys import taproot_tweak
+from btc_hd_wallet.script import Script, p2wpkh_script, p2wsh_script
+from btc_hd_wallet.address_pipeline import (
+    script_programs, sec_buffer, iter_sec, addresses, program_to_address,
+    SCRIPT_TYPES
+)
+
+
+class TestAddressPipeline(unittest.TestCase):
+    mnemonic = (
+        "vast tell razor drip stick one engine action "
+        "width sport else try scare phone blouse view "
+        "program ketchup pole rapid use length student raven"
+    )
+    wallet = BaseWallet.from_mnemonic(mnemonic=mnemonic)
+    nodes = wallet.by_path("m/84'/0'/0'/0").generate_children(interval=(0, 5))
+
+    def test_sec_buffer(self):
+        secs = [node.public_key.sec() for node in self.nodes]
+        buffer = sec_buffer(secs)
+        self.assertEqual(len(buffer), 33 * 5)
+        self.assertEqual([bytes(sec) for sec in iter_sec(buffer)], secs)
+        with self.assertRaises(ValueError):
+            sec_buffer([self.nodes[0].public_key.sec(compressed=False)])
+
+    def test_script_programs(self):
+        secs = [node.public_key.sec() for node in self.nodes]
+        programs = script_programs(buffer=sec_buffer(secs))
+        self.assertEqual(len(programs), len(secs))
+        for sec, progs in zip(secs, programs):
+            self.assertEqual(len(progs), len(SCRIPT_TYPES))
+            h160 = hash160(sec)
+            witness_script = Script([0x51, sec, 0x51, 0xae]).raw_serialize()
+            h256 = sha256(witness_script)
+            expected = (
+                h160,
+                h160,
+                hash160(p2wpkh_script(h160=h160).raw_serialize()),
+                h256,
+                hash160(p2wsh_script(h256=h256).raw_serialize()),
+            )
+            self.assertEqual(progs, expected)
+
+        # subset and custom order
+        subset = script_programs(
+            buffer=sec_buffer(secs),
+            script_types=("p2wsh", "p2pkh")
+        )
+        for progs, sub in zip(programs, subset):
+            self.assertEqual(sub, (progs[3], progs[0]))
+
+        with self.assertRaises(ValueError):
+            script_programs(buffer=sec_buffer(secs), script_types=("p2pk",))
+
+    def test_script_programs_p2tr(self):
+        secs = [node.public_key.sec() for node in self.nodes]
+        programs = script_programs(
+            buffer=sec_buffer(secs),
+            script_types=("p2tr", "p2wpkh")
+        )
+        for sec, (p2tr, p2wpkh) in zip(secs, programs):
+            self.assertEqual(p2tr, taproot_tweak(sec[1:]))
+            self.assertEqual(p2wpkh, hash160(sec))
+
+    def test_addresses(self):
+        buffer = sec_buffer([node.public_key.sec() for node in self.nodes])
+        for testnet in (False, True):
+            wallet = BaseWallet(master=self.wallet.master, testnet=testnet)
+            for script_type in SCRIPT_TYPES + ("p2tr",):
+                addr_fnc = getattr(wallet, script_type + "_address")
+                self.assertEqual(
+                    addresses(
+                        buffer=buffer,
+                        script_type=script_type,
+                        testnet=testnet
+                    ),
+                    [addr_fnc(node) for node in self.nodes]
+                )
+
+    def test_program_to_address(self):
+        h160 = bytes.fromhex("6c743a71b8899dcd30882f5affa712e130339866")
+        self.assertEqual(
+            program_to_address(script_type="p2pkh", program=h160),
+            "1AtTDQHGkkvzM58dFFDHqUuSKwTGqcnzUm"
+        )
+        with self.assertRaises(ValueError):
+            program_to_address(script_type="p2pk", program=h160)
@@ -0,0 +1,114 @@
+import unittest
+from collections.abc import Sequence
+
+from btc_hd_wallet.base_wallet import BaseWallet
+from btc_hd_wallet.bip32 import HARDENED, PubKeyNode
+from btc_hd_wallet.address_sequence import AddressSequence
+
+
+class TestAddressSequence(unittest.TestCase):
+    mnemonic = (
+        "vast tell razor drip stick one engine action "
+        "width sport else try scare phone blouse view "
+        "program ketchup pole rapid use length student raven"
+    )
+    wallet = BaseWallet.from_mnemonic(mnemonic=mnemonic)
+    chain = wallet.by_path("m/84'/0'/0'/0")
+
+    def expected(self, index: int) -> str:
+        return self.wallet.p2wpkh_address(node=self.chain.ckd(index=index))
+
+    def test_sequence(self):
+        seq = AddressSequence(node=self.chain)
+        self.assertIsInstance(seq, Sequence)
+        self.assertEqual(len(seq), HARDENED)
+        self.assertEqual(seq[5], self.expected(5))
+        self.assertEqual(seq[-1], self.expected(HARDENED - 1))
+        self.assertEqual(seq[1000000], self.expected(1000000))
+        with self.assertRaises(IndexError):
+            seq[HARDENED]
+        self.assertEqual(seq[10:13], [self.expected(i) for i in range(10, 13)])
+        self.assertEqual(seq[12:6:-3], [self.expected(i) for i in (12, 9)])
+        self.assertEqual(seq[5:5], [])
+        it = iter(seq)
+        self.assertEqual([next(it) for _ in range(3)], seq[:3])
+
+    def test_script_type(self):
+        chain = self.wallet.by_path("m/86'/0'/0'/0")
+        seq = AddressSequence(node=chain, script_type="p2tr")
+        self.assertEqual(
+            seq[0:2],
+            [self.wallet.p2tr_address(node=chain.ckd(index=i)) for i in (0, 1)]
+        )
+        with self.assertRaises(ValueError):
+            AddressSequence(node=self.chain, script_type="p2pk")
+
+    def test_cache(self):
+        seq = AddressSequence(node=self.chain, cache_size=3)
+        seq[0:5]
+        self.assertEqual(list(seq.cache), [2, 3, 4])
+        seq[2]
+        seq[7]
+        self.assertEqual(list(seq.cache), [4, 2, 7])
+        # private node is neutered and its children are not kept
+        self.assertEqual(seq.node.children, [])
+        self.assertEqual(seq.node.key, self.chain.public_key.sec())
+
+    def test_node_not_modified(self):
+        chain = self.wallet.by_path("m/84'/0'/0'/1")
+        xpub = PubKeyNode.parse(s=chain.extended_public_key())
+        for node in (chain, xpub):
+            child = node.ckd(index=0)
+            seq = AddressSequence(node=node)
+            seq[3]
+            seq[5:8]
+            self.assertIsNot(seq.node, node)
+            self.assertEqual(node.children, [child])
+        self.assertEqual(seq[3], self.wallet.p2wpkh_address(
+            node=chain.ckd(index=3)
+        ))
+
+    def test_index(self):
+        seq = AddressSequence(node=self.chain, search_limit=50)
+        self.assertEqual(seq.index(self.expected(42)), 42)
+        self.assertIn(self.expected(3), seq)
+        with self.assertRaises(ValueError):
+            seq.index(self.expected(60))
+        self.assertEqual(seq.index(self.expected(60), start=30), 60)
+        with self.assertRaises(ValueError):
+            seq.index(self.expected(42), stop=40)
+        with self.assertRaises(RuntimeError):
+            seq.lookup(self.expected(42))
+
+    def test_reverse_index(self):
+        seq = AddressSequence(
+            node=self.chain, cache_size=2, reverse_index=True, search_limit=1
+        )
+        address = self.expected(500)
+        self.assertIsNone(seq.lookup(address))
+        seq[490:510]
+        self.assertEqual(seq.lookup(address), 500)
+        self.assertEqual(seq.index(address), 500)
+        self.assertIn(address, seq)
+        self.assertNotIn(self.expected(510), seq)
+        # reverse index hit outside of searched range
+        with self.assertRaises(ValueError):
+            seq.index(address, stop=0)
+        with self.assertRaises(ValueError):
+            seq.index(address, start=501)
+        self.assertEqual(seq.index(address, start=500, stop=501), 500)
+
+    def test_reverse_limit(self):
+        seq = AddressSequence(
+            node=self.chain, cache_size=2, reverse_index=True,
+            reverse_limit=5, search_limit=1
+        )
+        seq[0:10]
+        self.assertEqual(len(seq.reverse), 5)
+        # least recently derived are dropped first
+        self.assertIsNone(seq.lookup(self.expected(4)))
+        self.assertEqual(seq.lookup(self.expected(5)), 5)
+        seq[2]
+        self.assertEqual(len(seq.reverse), 5)
+        self.assertEqual(seq.lookup(self.expected(2)), 2)
+        self.assertIsNone(seq.lookup(self.expected(5)))
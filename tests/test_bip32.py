@@ -1,4 +1,8 @@
+import copy
+import pickle
+import sys
 import unittest
+import threading
 from io import BytesIO
 
 from btc_hd_wallet.bip32 import PrvKeyNode, PubKeyNode
@@ -42,6 +46,94 @@ class TestNode(unittest.TestCase):
         self.assertNotEqual(m0, M0)
 
 
+    def test_ckd_state_reuse(self):
+        seed = "000102030405060708090a0b0c0d0e0f"
+        m = PrvKeyNode.master_key(bip39_seed=bytes.fromhex(seed))
+        # parsed node has 0x00 padded private key
+        parsed = PrvKeyNode.parse(s=m.extended_private_key())
+        for index in (0, 1, 2 ** 31, 2 ** 31 + 1, 7):
+            self.assertEqual(
+                parsed.ckd(index=index).extended_private_key(),
+                m.ckd(index=index).extended_private_key()
+            )
+        self.assertIsNotNone(parsed.hmac_state)
+        self.assertEqual(parsed.public_key_sec(), m.public_key.sec())
+        M = PubKeyNode.parse(s=m.extended_public_key())
+        for index in (0, 5, 3):
+            self.assertEqual(
+                M.ckd(index=index).extended_public_key(),
+                m.ckd(index=index).extended_public_key()
+            )
+
+    def test_pickle_copy(self):
+        xpriv = "xprv9s21ZrQH143K3YFDmG48xQj4BKHUn15if4xsQiMwSKX8bZ6YruYK6mV6oM5Tbodv1pLF7GMdPGaTcZBno3ZejMHbVVvymhsS5GcYC4hSKag"
+        m = PrvKeyNode.parse(s=xpriv)
+        M = PubKeyNode.parse(s=m.extended_public_key())
+        for node in (m, M):
+            # derivation creates (unpicklable) keyed HMAC state
+            child = node.ckd(index=1)
+            for clone in (pickle.loads(pickle.dumps(node)),
+                          copy.deepcopy(node), copy.copy(node)):
+                self.assertEqual(clone, node)
+                self.assertEqual(clone.ckd(index=1), child)
+                self.assertEqual(
+                    clone.ckd(index=1).chain_code, child.chain_code
+                )
+
+    def test_ckd_threads(self):
+        xpub = "xpub661MyMwAqRbcFW31YEwpkMuc5THy2PSt5bDMsktWQcFF8syAmRUapSCGu8ED9W6oDMSgv6Zz8idoc4a6mr8BDzTJY47LJhkJ8UB7WEGuduB"
+        count = 500
+        shared = PubKeyNode.parse(s=xpub)
+        expected = [
+            PubKeyNode.parse(s=xpub).ckd(index=i).key for i in range(count)
+        ]
+        results = {}
+
+        def worker(offset):
+            results[offset] = [
+                shared.ckd(index=(i + offset) % count).key
+                for i in range(count)
+            ]
+
+        interval = sys.getswitchinterval()
+        # switch threads as often as possible to expose shared state
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [
+                threading.Thread(target=worker, args=(t * count // 8,))
+                for t in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        for offset, keys in results.items():
+            self.assertEqual(
+                keys, [expected[(i + offset) % count] for i in range(count)]
+            )
+
+    def test_derive_range(self):
+        xpriv = "xprv9s21ZrQH143K3YFDmG48xQj4BKHUn15if4xsQiMwSKX8bZ6YruYK6mV6oM5Tbodv1pLF7GMdPGaTcZBno3ZejMHbVVvymhsS5GcYC4hSKag"
+        m = PrvKeyNode.parse(s=xpriv)
+        for interval in [(0, 10), (2 ** 31 - 2, 2 ** 31 + 2), (5, 5)]:
+            children = m.derive_range(interval=interval)
+            self.assertEqual(len(children), len(range(*interval)))
+            for child in children:
+                expected = PrvKeyNode.parse(s=xpriv).ckd(index=child.index)
+                self.assertEqual(child, expected)
+                self.assertEqual(child.chain_code, expected.chain_code)
+                self.assertEqual(
+                    child.public_key_sec(), expected.public_key.sec()
+                )
+                self.assertEqual(child.wif(), expected.private_key.wif())
+                self.assertEqual(
+                    child.extended_public_key(),
+                    expected.extended_public_key()
+                )
+        self.assertEqual(m.generate_children(interval=(0, 3)), m.children[-3:])
+
 class TestBip32(unittest.TestCase):
 
     def test_ckd_pub_ckd_priv_matches_public_key(self):
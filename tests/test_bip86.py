@@ -0,0 +1,62 @@
+import unittest
+from btc_hd_wallet.bip32 import PrvKeyNode
+from btc_hd_wallet.bip39 import bip39_seed_from_mnemonic
+from btc_hd_wallet.base_wallet import BaseWallet
+from btc_hd_wallet.keys import taproot_tweak
+
+
+class TestBip86(unittest.TestCase):
+    def test_vector(self):
+        mnemonic = "abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about"
+        root_prv = "xprv9s21ZrQH143K3GJpoapnV8SFfukcVBSfeCficPSGfubmSFDxo1kuHnLisriDvSnRRuL2Qrg5ggqHKNVpxR86QEC8w35uxmGoggxtQTPvfUu"
+        root_pub = "xpub661MyMwAqRbcFkPHucMnrGNzDwb6teAX1RbKQmqtEF8kK3Z7LZ59qafCjB9eCRLiTVG3uxBxgKvRgbubRhqSKXnGGb1aoaqLrpMBDrVxga8"
+        node = PrvKeyNode.master_key(
+            bip39_seed=bip39_seed_from_mnemonic(mnemonic=mnemonic)
+        )
+        self.assertEqual(node.extended_private_key(), root_prv)
+        self.assertEqual(node.extended_public_key(), root_pub)
+
+        # Account 0, root = m/86'/0'/0'
+        account = node.derive_path(index_list=[86 + 2**31, 2**31, 2**31])
+        self.assertEqual(
+            account.extended_private_key(),
+            "xprv9xgqHN7yz9MwCkxsBPN5qetuNdQSUttZNKw1dcYTV4mkaAFiBVGQziHs3NRSWMkCzvgjEe3n9xV8oYywvM8at9yRqyaZVz6TYYhX98VjsUk"
+        )
+        self.assertEqual(
+            account.extended_public_key(),
+            "xpub6BgBgsespWvERF3LHQu6CnqdvfEvtMcQjYrcRzx53QJjSxarj2afYWcLteoGVky7D3UKDP9QyrLprQ3VCECoY49yfdDEHGCtMMj92pReUsQ"
+        )
+
+        for path, internal_key, output_key, address in (
+            # Account 0, first receiving address = m/86'/0'/0'/0/0
+            (
+                [0, 0],
+                "cc8a4bc64d897bddc5fbc2f670f7a8ba0b386779106cf1223c6fc5d7cd6fc115",
+                "a60869f0dbcf1dc659c9cecbaf8050135ea9e8cdc487053f1dc6880949dc684c",
+                "bc1p5cyxnuxmeuwuvkwfem96lqzszd02n6xdcjrs20cac6yqjjwudpxqkedrcr",
+            ),
+            # Account 0, second receiving address = m/86'/0'/0'/0/1
+            (
+                [0, 1],
+                "83dfe85a3151d2517290da461fe2815591ef69f2b18a2ce63f01697a8b313145",
+                "a82f29944d65b86ae6b5e5cc75e294ead6c59391a1edc5e016e3498c67fc7bbb",
+                "bc1p4qhjn9zdvkux4e44uhx8tc55attvtyu358kutcqkudyccelu0was9fqzwh",
+            ),
+            # Account 0, first change address = m/86'/0'/0'/1/0
+            (
+                [1, 0],
+                "399f1b2f4393f29a18c937859c5dd8a77350103157eb880f02e8c08214277cef",
+                "882d74e5d0572d5a816cef0041a96b6c1de832f6f9676d9605c44d5e9a97d3dc",
+                "bc1p3qkhfews2uk44qtvauqyr2ttdsw7svhkl9nkm9s9c3x4ax5h60wqwruhk7",
+            ),
+        ):
+            child = account.derive_path(index_list=path)
+            self.assertEqual(child.public_key.xonly().hex(), internal_key)
+            self.assertEqual(
+                taproot_tweak(child.public_key.xonly()).hex(), output_key
+            )
+            self.assertEqual(
+                child.public_key.address(addr_type="p2tr"), address
+            )
+            wallet = BaseWallet(master=node)
+            self.assertEqual(wallet.p2tr_address(node=child), address)
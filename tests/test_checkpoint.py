@@ -0,0 +1,173 @@
+import os
+import gzip
+import json
+import tempfile
+import unittest
+from unittest import mock
+
+from btc_hd_wallet.paper_wallet import PaperWallet
+from btc_hd_wallet.planner import DerivationSpec
+from btc_hd_wallet import checkpoint
+from btc_hd_wallet.checkpoint import (
+    CheckpointedExport, load_manifest, write_manifest, verify_export,
+    manifest_path
+)
+
+
+class TestCheckpointedExport(unittest.TestCase):
+    mnemonic = (
+        "vast tell razor drip stick one engine action "
+        "width sport else try scare phone blouse view "
+        "program ketchup pole rapid use length student raven"
+    )
+    wallet = PaperWallet.from_mnemonic(mnemonic=mnemonic)
+    specs = [
+        DerivationSpec.parse("84:0-1:0,1:0-7"),
+        DerivationSpec.parse("44:1-2:0:2-5"),
+    ]
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp.name, "export.jsonl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def expected_rows(self):
+        data = self.wallet.plan(specs=self.specs)
+        return [
+            group
+            for bip in ("BIP84", "BIP44")
+            for account in data[bip]
+            for group in account["groups"]
+        ]
+
+    def read_rows(self):
+        with open(self.file_path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_export(self):
+        manifest = self.wallet.export_checkpointed(
+            file_path=self.file_path, specs=self.specs, chunk_size=3
+        )
+        self.assertEqual(self.read_rows(), self.expected_rows())
+        self.assertTrue(manifest["complete"])
+        self.assertEqual(
+            [(c["purpose"], c["chain"], c["interval"])
+             for c in manifest["chunks"]],
+            [
+                (84, 0, [0, 3]), (84, 0, [3, 6]), (84, 0, [6, 7]),
+                (84, 1, [0, 3]), (84, 1, [3, 6]), (84, 1, [6, 7]),
+                (44, 0, [2, 5]),
+            ]
+        )
+        self.assertNotIn("mnemonic", json.dumps(manifest))
+        self.assertTrue(verify_export(self.file_path))
+        # existing file is never overwritten
+        with self.assertRaises(ValueError):
+            self.wallet.export_checkpointed(
+                file_path=self.file_path, specs=self.specs
+            )
+        # tampering is detected
+        with open(self.file_path, "r+b") as f:
+            f.seek(10)
+            f.write(b"X")
+        self.assertFalse(verify_export(self.file_path))
+
+    def test_resume(self):
+        self.wallet.export_checkpointed(
+            file_path=self.file_path, specs=self.specs, chunk_size=3,
+            fields=("path", "address")
+        )
+        with open(self.file_path, "rb") as f:
+            complete = f.read()
+        manifest = load_manifest(self.file_path)
+        # crash after third chunk was written - fourth chunk partially
+        # written but not recorded, third chunk corrupted on disk
+        manifest["chunks"] = manifest["chunks"][:4]
+        manifest["complete"] = False
+        manifest["sha256"] = None
+        write_manifest(file_path=self.file_path, manifest=manifest)
+        third = manifest["chunks"][2]
+        with open(self.file_path, "r+b") as f:
+            f.truncate(manifest["chunks"][3]["offset"] + 17)
+            f.seek(third["offset"])
+            f.write(b"?")
+        self.assertFalse(verify_export(self.file_path))
+
+        other = PaperWallet.from_entropy_hex("00" * 16)
+        with self.assertRaises(ValueError):
+            other.resume_export(file_path=self.file_path)
+
+        manifest = self.wallet.resume_export(file_path=self.file_path)
+        self.assertTrue(manifest["complete"])
+        with open(self.file_path, "rb") as f:
+            self.assertEqual(f.read(), complete)
+        self.assertTrue(verify_export(self.file_path))
+        self.assertEqual(
+            CheckpointedExport.resume(
+                wallet=self.wallet, file_path=self.file_path
+            ).planner.fields,
+            ("path", "address")
+        )
+
+    def test_workers_single_pool(self):
+        pool = checkpoint.ProcessPoolExecutor
+        with mock.patch.object(checkpoint, "ProcessPoolExecutor",
+                               side_effect=pool) as executor:
+            manifest = self.wallet.export_checkpointed(
+                file_path=self.file_path, specs=self.specs, chunk_size=1,
+                workers=2
+            )
+        # one pool for all 17 chunks
+        self.assertEqual(executor.call_count, 1)
+        self.assertEqual(len(manifest["chunks"]), 17)
+        self.assertEqual(self.read_rows(), self.expected_rows())
+        self.assertTrue(verify_export(self.file_path))
+
+    def test_manifest_append(self):
+        export = CheckpointedExport(
+            wallet=self.wallet, file_path=self.file_path, specs=self.specs,
+            chunk_size=3
+        )
+        manifest = export.run()
+        with open(manifest_path(self.file_path)) as f:
+            lines = f.read().splitlines()
+        # header and one record per chunk
+        self.assertEqual(len(lines), len(manifest["chunks"]) + 1)
+        self.assertEqual(load_manifest(self.file_path), manifest)
+        # torn last record (interrupted append) is ignored
+        with open(manifest_path(self.file_path), "w") as f:
+            f.write("\n".join(lines[:-1]) + "\n" + lines[-1][:20])
+        self.assertEqual(
+            load_manifest(self.file_path)["chunks"], manifest["chunks"][:-1]
+        )
+        with open(manifest_path(self.file_path), "w") as f:
+            f.write("\n".join(lines[:2] + ["{"] + lines[3:]) + "\n")
+        with self.assertRaises(ValueError):
+            load_manifest(self.file_path)
+
+    def test_compressed_resume(self):
+        file_path = self.file_path + ".gz"
+        self.wallet.export_checkpointed(
+            file_path=file_path, specs=self.specs, chunk_size=3
+        )
+        self.assertEqual(load_manifest(file_path)["codec"], "gzip")
+        with gzip.open(file_path, "rt") as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(rows, self.expected_rows())
+        self.assertTrue(verify_export(file_path))
+
+        manifest = load_manifest(file_path)
+        manifest["chunks"] = manifest["chunks"][:2]
+        manifest["complete"] = False
+        write_manifest(file_path=file_path, manifest=manifest)
+        with open(file_path, "r+b") as f:
+            f.truncate(manifest["chunks"][1]["offset"] + 5)
+        self.wallet.resume_export(file_path=file_path)
+        # every chunk is independent gzip member
+        with gzip.open(file_path, "rt") as f:
+            self.assertEqual(
+                [json.loads(line) for line in f], self.expected_rows()
+            )
+        self.assertTrue(verify_export(file_path))
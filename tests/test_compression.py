@@ -0,0 +1,67 @@
+import io
+import unittest
+
+from btc_hd_wallet import compression
+from btc_hd_wallet.compression import (
+    StreamWriter, available_codecs, codec_from_path, compress, decompress,
+    new_compressor, text_blocks
+)
+
+
+class TestCompression(unittest.TestCase):
+    data = b"".join(
+        "[\"m/84'/0'/0'/0/{}\", \"bc1q\"]\n".format(i).encode()
+        for i in range(2000)
+    )
+
+    def test_codec_from_path(self):
+        self.assertEqual(codec_from_path("wallet.json.gz"), "gzip")
+        self.assertEqual(codec_from_path("rows.jsonl.xz"), "xz")
+        self.assertEqual(codec_from_path("rows.jsonl.bz2"), "bz2")
+        self.assertEqual(codec_from_path("rows.jsonl.zst"), "zstd")
+        self.assertIsNone(codec_from_path("wallet.json"))
+        with self.assertRaises(ValueError):
+            new_compressor("lz4")
+
+    @unittest.skipIf(compression.zstandard is not None, "zstandard installed")
+    def test_zstd_unavailable(self):
+        self.assertNotIn("zstd", available_codecs())
+        with self.assertRaises(ValueError):
+            StreamWriter(file=io.BytesIO(), codec="zstd")
+
+    def test_text_blocks(self):
+        chunks = ["a" * 10] * 25
+        blocks = list(text_blocks(chunks, block_size=100))
+        self.assertEqual([len(b) for b in blocks], [100, 100, 50])
+
+    def test_stream_writer(self):
+        for codec in available_codecs():
+            self.assertEqual(decompress(codec, compress(codec, self.data)),
+                             self.data)
+            # one stream for all blocks
+            f = io.BytesIO()
+            with StreamWriter(file=f, codec=codec) as writer:
+                for i in range(0, len(self.data), 1000):
+                    writer.write(data=self.data[i:i + 1000])
+            self.assertEqual(decompress(codec, f.getvalue()), self.data)
+            # independent stream for every block
+            f = io.BytesIO()
+            written = []
+            with StreamWriter(file=f, codec=codec, members=True) as writer:
+                for i in range(0, len(self.data), 10000):
+                    writer.write(
+                        data=self.data[i:i + 10000], callback=written.append
+                    )
+            self.assertEqual(b"".join(written), f.getvalue())
+            self.assertEqual(
+                decompress(codec, written[1]), self.data[10000:20000]
+            )
+            self.assertEqual(decompress(codec, f.getvalue()), self.data)
+
+    def test_stream_writer_failure(self):
+        f = io.BytesIO()
+        f.close()
+        writer = StreamWriter(file=f, codec="gzip")
+        writer.write(data=self.data)
+        with self.assertRaises(RuntimeError):
+            writer.close()
@@ -0,0 +1,177 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from btc_hd_wallet.base_wallet import BaseWallet
+from btc_hd_wallet.client import DaemonClient
+from btc_hd_wallet.daemon import (
+    DerivationDaemon, DaemonServer, merge_intervals, parse_relative_path,
+    remove_stale_socket, serve
+)
+
+
+class TestDerivationDaemon(unittest.TestCase):
+    mnemonic = (
+        "vast tell razor drip stick one engine action "
+        "width sport else try scare phone blouse view "
+        "program ketchup pole rapid use length student raven"
+    )
+    wallet = BaseWallet.from_mnemonic(mnemonic=mnemonic)
+    xpub = "xpub6CEGxdGrXswtcL6Hqo1L3wwzDBuRzQvQfUa5PZponbX7ibNWUKkhp1LaNHMg9oJYjjRmbxArwDUjpudAvmNDRG8LGwYb9YvnkEfMY3eGdTP"
+    zpub = "zpub6rjjS2aQooWinBYsKESH2q8LMMgGhVnpnYV8uvxNxotQfU6NBsf2rAUwm7AtMfBkVywW7baLLKcQ5CZ2vfGCCSpQ8gb2F9rkNUuEnFKmobk"
+
+    def addresses(self, path, interval, addr_fnc):
+        return [
+            addr_fnc(self.wallet.by_path("{}/{}".format(path, i)))
+            for i in range(*interval)
+        ]
+
+    def test_helpers(self):
+        self.assertEqual(parse_relative_path("0/5"), (0, 5))
+        for invalid in ["0/5'", "a", "0/2147483648"]:
+            with self.assertRaises(ValueError):
+                parse_relative_path(invalid)
+        self.assertEqual(
+            merge_intervals([(5, 10), (0, 3), (3, 6), (20, 30)]),
+            [(0, 10), (20, 30)]
+        )
+
+    def test_handle(self):
+        daemon = DerivationDaemon(cache_size=50)
+        responses = daemon.handle([
+            {"op": "derive", "xpub": self.zpub, "interval": [0, 5]},
+            {"op": "derive", "xpub": self.zpub, "interval": [3, 8]},
+            {"op": "derive", "xpub": self.xpub, "chain": 1,
+             "interval": [0, 3]},
+            {"op": "address", "xpub": self.zpub, "path": "0/7"},
+            {"op": "address", "xpub": self.zpub, "path": "1/2",
+             "script_type": "p2tr"},
+            {"op": "unknown"},
+            {"op": "derive", "xpub": self.zpub, "interval": [5, 5]},
+            {"op": "derive", "xpub": self.wallet.master.extended_private_key(),
+             "interval": [0, 1]},
+        ])
+        p2wpkh = self.addresses(
+            "m/84'/0'/0'/0", (0, 8), self.wallet.p2wpkh_address
+        )
+        self.assertEqual(responses[0], {"result": p2wpkh[:5]})
+        self.assertEqual(responses[1], {"result": p2wpkh[3:8]})
+        self.assertEqual(
+            responses[2],
+            {"result": self.addresses(
+                "m/44'/0'/0'/1", (0, 3), self.wallet.p2pkh_address
+            )}
+        )
+        self.assertEqual(responses[3], {"result": p2wpkh[7]})
+        self.assertEqual(
+            responses[4],
+            {"result": self.wallet.p2tr_address(
+                self.wallet.by_path("m/84'/0'/0'/1/2")
+            )}
+        )
+        for response in responses[5:]:
+            self.assertIn("error", response)
+        # both derive requests on chain 0 were coalesced to one sequence
+        self.assertEqual(len(daemon.sequences), 3)
+
+        self.assertEqual(
+            daemon.handle([{"op": "lookup", "address": p2wpkh[6]}]),
+            [{"result": {
+                "xpub": self.zpub, "path": "0/6", "script_type": "p2wpkh"
+            }}]
+        )
+        self.assertEqual(
+            daemon.handle([{"op": "lookup", "address": "unknown"}]),
+            [{"result": None}]
+        )
+        stats = daemon.handle([{"op": "stats"}])[0]["result"]
+        self.assertEqual(stats["requests"], 3)
+        self.assertEqual(stats["errors"], 3)
+        self.assertEqual(stats["addresses"], 15)
+        self.assertEqual(stats["operations"]["derive"], 4)
+        self.assertEqual(stats["operations"]["lookup"], 2)
+
+    def test_reverse_limit(self):
+        daemon = DerivationDaemon(cache_size=2, reverse_limit=3)
+        daemon.handle([
+            {"op": "derive", "xpub": self.zpub, "interval": [0, 10]},
+        ])
+        p2wpkh = self.addresses(
+            "m/84'/0'/0'/0", (0, 10), self.wallet.p2wpkh_address
+        )
+        responses = daemon.handle([
+            {"op": "lookup", "address": address} for address in p2wpkh
+        ])
+        self.assertEqual(
+            [response["result"] is not None for response in responses],
+            [False] * 7 + [True] * 3
+        )
+        sequence, _ = daemon.sequence(xpub=self.zpub, path=(0,))
+        self.assertEqual(len(sequence.reverse), 3)
+
+    def test_client(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            socket_path = os.path.join(tmp, "daemon.sock")
+            derivation = DerivationDaemon()
+            server = DaemonServer(socket_path, derivation)
+            thread = threading.Thread(target=server.serve_forever)
+            thread.start()
+            try:
+                with DaemonClient(socket_path, timeout=30) as client:
+                    addrs = client.derive(self.zpub, interval=(0, 3))
+                    self.assertEqual(
+                        addrs,
+                        self.addresses(
+                            "m/84'/0'/0'/0", (0, 3),
+                            self.wallet.p2wpkh_address
+                        )
+                    )
+                    self.assertEqual(client.address(self.zpub, "0/1"), addrs[1])
+                    self.assertEqual(
+                        client.lookup(addrs[2])["path"], "0/2"
+                    )
+                    with self.assertRaises(ValueError):
+                        client.derive(self.zpub, interval=(3, 1))
+                    responses = client.batch([
+                        {"op": "address", "xpub": self.zpub, "path": "0/0"},
+                        {"op": "stats"},
+                    ])
+                    self.assertEqual(responses[0], {"result": addrs[0]})
+                    self.assertEqual(responses[1]["result"]["requests"], 4)
+            finally:
+                server.shutdown()
+                server.server_close()
+                thread.join()
+                derivation.close()
+
+    def test_stale_socket(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            socket_path = os.path.join(tmp, "daemon.sock")
+            remove_stale_socket(socket_path)
+            derivation = DerivationDaemon()
+            server = DaemonServer(socket_path, derivation)
+            thread = threading.Thread(target=server.serve_forever)
+            thread.start()
+            try:
+                # running daemon is never replaced
+                with self.assertRaises(RuntimeError):
+                    remove_stale_socket(socket_path)
+                with self.assertRaises(RuntimeError):
+                    serve(socket_path)
+                self.assertTrue(os.path.exists(socket_path))
+                with DaemonClient(socket_path, timeout=30) as client:
+                    self.assertEqual(client.stats()["requests"], 0)
+            finally:
+                server.shutdown()
+                server.server_close()
+                thread.join()
+                derivation.close()
+            # socket file of stopped daemon is stale
+            self.assertTrue(os.path.exists(socket_path))
+            remove_stale_socket(socket_path)
+            self.assertFalse(os.path.exists(socket_path))
+            file_path = os.path.join(tmp, "file")
+            open(file_path, "w").close()
+            with self.assertRaises(ValueError):
+                remove_stale_socket(file_path)
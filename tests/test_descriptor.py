@@ -0,0 +1,184 @@
+import unittest
+
+from btc_hd_wallet.base_wallet import BaseWallet
+from btc_hd_wallet.helper import hash160, h160_to_p2pkh_address
+from btc_hd_wallet.multisig import MultisigAccount
+from btc_hd_wallet.descriptor import (
+    Descriptor, KeyExpression, descriptor_checksum, add_checksum,
+    split_checksum, parse_path
+)
+
+
+class TestDescriptorChecksum(unittest.TestCase):
+    def test_checksum(self):
+        self.assertEqual(descriptor_checksum("raw(deadbeef)"), "89f8spxm")
+        self.assertEqual(add_checksum("raw(deadbeef)"), "raw(deadbeef)#89f8spxm")
+        self.assertEqual(
+            split_checksum("raw(deadbeef)#89f8spxm"),
+            ("raw(deadbeef)", "89f8spxm")
+        )
+        self.assertEqual(split_checksum("raw(deadbeef)"), ("raw(deadbeef)", None))
+        with self.assertRaises(ValueError):
+            split_checksum("raw(deadbeef)#89f8spxn")
+        with self.assertRaises(ValueError):
+            split_checksum("raw(deadbeef)#89f8spx")
+        with self.assertRaises(ValueError):
+            descriptor_checksum("raw(deadbeef)\n")
+
+    def test_parse_path(self):
+        self.assertEqual(parse_path(""), [])
+        self.assertEqual(
+            parse_path("84'/0h/0'/1/2"),
+            [2 ** 31 + 84, 2 ** 31, 2 ** 31, 1, 2]
+        )
+        with self.assertRaises(ValueError):
+            parse_path("84'/x")
+
+
+class TestDescriptor(unittest.TestCase):
+    mnemonic = (
+        "vast tell razor drip stick one engine action "
+        "width sport else try scare phone blouse view "
+        "program ketchup pole rapid use length student raven"
+    )
+    wallet = BaseWallet.from_mnemonic(mnemonic=mnemonic)
+
+    def account(self, path):
+        fp = self.wallet.master.fingerprint().hex()
+        xpub = self.wallet.by_path(path).extended_public_key()
+        return "[{}/{}]{}".format(fp, path[2:], xpub)
+
+    def chain_addresses(self, path, addr_fnc, n=5):
+        chain = self.wallet.by_path(path)
+        return [addr_fnc(node) for node in chain.generate_children((0, n))]
+
+    def test_single_key_descriptors(self):
+        for name, path, addr_fnc in (
+            ("pkh({}/0/*)", "m/44'/0'/0'", self.wallet.p2pkh_address),
+            ("sh(wpkh({}/0/*))", "m/49'/0'/0'", self.wallet.p2sh_p2wpkh_address),
+            ("wpkh({}/1/*)", "m/84'/0'/0'", self.wallet.p2wpkh_address),
+        ):
+            desc = Descriptor.parse(name.format(self.account(path)))
+            self.assertTrue(desc.is_range)
+            self.assertFalse(desc.testnet)
+            chain = path + ("/1" if name.startswith("wpkh") else "/0")
+            self.assertEqual(
+                desc.addresses(interval=(0, 5)),
+                self.chain_addresses(chain, addr_fnc)
+            )
+            self.assertEqual(desc.address(3), desc.addresses((0, 5))[3])
+            self.assertEqual(
+                desc.addresses(interval=(0, 5), workers=2),
+                desc.addresses(interval=(0, 5))
+            )
+
+    def test_private_key_with_hardened_steps(self):
+        xprv = self.wallet.master.extended_private_key()
+        desc = Descriptor.parse("wpkh({}/84'/0h/0'/0/*)".format(xprv))
+        self.assertEqual(
+            desc.addresses(interval=(0, 3)),
+            self.chain_addresses("m/84'/0'/0'/0", self.wallet.p2wpkh_address, 3)
+        )
+        # base node is derived only once
+        base = desc.keys()[0].base_node()
+        desc.addresses(interval=(3, 6))
+        self.assertIs(desc.keys()[0].base_node(), base)
+
+    def test_multisig(self):
+        cosigners = [
+            BaseWallet.from_mnemonic(mnemonic=mnemonic).by_path("m/48'/0'/0'/2'")
+            for mnemonic in (
+                self.mnemonic,
+                "abandon abandon abandon abandon abandon abandon abandon "
+                "abandon abandon abandon abandon about",
+            )
+        ]
+        keys = ",".join(
+            node.extended_public_key() + "/0/*" for node in cosigners
+        )
+        account = MultisigAccount(
+            threshold=1,
+            cosigners=[node.extended_public_key() for node in cosigners]
+        )
+        desc = Descriptor.parse("wsh(sortedmulti(1,{}))".format(keys))
+        self.assertEqual(
+            desc.addresses(interval=(0, 4)),
+            account.addresses(interval=(0, 4))
+        )
+        desc = Descriptor.parse("sh(wsh(sortedmulti(1,{})))".format(keys))
+        self.assertEqual(
+            desc.addresses(interval=(0, 4)),
+            account.addresses(interval=(0, 4), script_type="p2sh_p2wsh")
+        )
+        # multi keeps key order
+        multi = Descriptor.parse("wsh(multi(1,{}))".format(keys))
+        sorted_scripts = Descriptor.parse(
+            "wsh(sortedmulti(1,{}))".format(keys)
+        ).script_pubkeys(interval=(0, 10))
+        self.assertNotEqual(
+            multi.script_pubkeys(interval=(0, 10)), sorted_scripts
+        )
+
+    def test_taproot_bip86(self):
+        desc = Descriptor.parse(
+            "tr([73c5da0a/86'/0'/0']xpub6BgBgsespWvERF3LHQu6CnqdvfEvtMcQjYrcRzx"
+            "53QJjSxarj2afYWcLteoGVky7D3UKDP9QyrLprQ3VCECoY49yfdDEHGCtMMj92pR"
+            "eUsQ/0/*)"
+        )
+        self.assertEqual(
+            desc.addresses(interval=(0, 2)),
+            [
+                "bc1p5cyxnuxmeuwuvkwfem96lqzszd02n6xdcjrs20cac6yqjjwudpxqkedrcr",
+                "bc1p4qhjn9zdvkux4e44uhx8tc55attvtyu358kutcqkudyccelu0was9fqzwh",
+            ]
+        )
+        key = desc.keys()[0]
+        self.assertEqual(key.fingerprint.hex(), "73c5da0a")
+        self.assertEqual(key.origin_path, [2 ** 31 + 86, 2 ** 31, 2 ** 31])
+        # x-only internal key
+        desc = Descriptor.parse(
+            "tr(cc8a4bc64d897bddc5fbc2f670f7a8ba0b386779106cf1223c6fc5d7cd6fc115)"
+        )
+        self.assertFalse(desc.is_range)
+        self.assertEqual(
+            desc.script_pubkeys(interval=(0, 10)),
+            [bytes.fromhex(
+                "5120a60869f0dbcf1dc659c9cecbaf8050135ea9e8cdc487053f1dc6880949dc684c"
+            )]
+        )
+
+    def test_hex_key_and_roundtrip(self):
+        sec = "02c6047f9441ed7d6d3045406e95c07cd85c778e4b8cef3ca7abac09b95c709ee5"
+        desc = Descriptor.parse("pkh({})".format(sec))
+        self.assertEqual(
+            desc.addresses(),
+            [h160_to_p2pkh_address(hash160(bytes.fromhex(sec)))]
+        )
+        text = repr(desc)
+        self.assertEqual(text, add_checksum("pkh({})".format(sec)))
+        self.assertEqual(Descriptor.parse(text), desc)
+        self.assertEqual(repr(Descriptor.parse(text)), text)
+
+    def test_invalid(self):
+        xpub = self.wallet.by_path("m/84'/0'/0'").extended_public_key()
+        xprv = self.wallet.master.extended_private_key()
+        sec = "02c6047f9441ed7d6d3045406e95c07cd85c778e4b8cef3ca7abac09b95c709ee5"
+        for desc in (
+            "wpkh({}/0'/*)".format(xpub),
+            "wpkh({}/0/*')".format(xprv),
+            "multi(1,{})".format(sec),
+            "wsh(wpkh({}))".format(sec),
+            "sh(tr({}))".format(sec),
+            "wpkh({},{})".format(sec, sec),
+            "wpkh({})".format(sec[2:]),
+            "wpkh({}/0)".format(sec),
+            "wsh(multi(2,{}))".format(sec),
+            "wpkh([d34db33f/84'{})".format(xpub),
+            "wpkh({})#00000000".format(sec),
+            "pkh(04{})".format(sec[2:]),
+            "wpkh(xpub)",
+        ):
+            with self.assertRaises(ValueError, msg=desc):
+                Descriptor.parse(desc)
+        with self.assertRaises(ValueError):
+            KeyExpression.parse(xpub + "/0/*").sec()
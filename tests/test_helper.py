@@ -6,7 +6,8 @@ from btc_hd_wallet.helper import (
     b58decode_addr, h160_to_p2pkh_address, h160_to_p2sh_address, merkle_root,
     merkle_parent, merkle_parent_level, big_endian_to_int, int_to_big_endian,
     encode_varint, read_varint, h160_to_p2wpkh_address, h256_to_p2wsh_address,
-    chunks, bech32_decode_address
+    chunks, bech32_decode_address, hmac_sha512, hmac_sha512_state,
+    hmac_sha512_copy
 )
 
 
@@ -165,6 +166,9 @@ class HelperTest(unittest.TestCase):
         testnet_addr = "tb1qwntfrks4wnnt8svjana49nyfsnh8kmzk5jjssj"
         self.assertEqual(want, bech32_decode_address(testnet_addr))
 
+        regtest_addr = "bcrt1qwntfrks4wnnt8svjana49nyfsnh8kmzkkmta8m"
+        self.assertEqual(want, bech32_decode_address(regtest_addr))
+
         want = bytes.fromhex("c3ef08811cd374113edddaf67bf00894889671b8bad0ce5abd0bdec0c09a4ae1")
         mainnet_addr = "bc1qc0hs3qgu6d6pz0kamtm8huqgjjyfvudchtgvuk4ap00vpsy6ftssepf4fd"
         self.assertEqual(want, bech32_decode_address(mainnet_addr))
@@ -206,6 +210,8 @@ class HelperTest(unittest.TestCase):
         ]
         want_tx_hashes = [bytes.fromhex(x) for x in want_hex_hashes]
         self.assertEqual(merkle_parent_level(tx_hashes), want_tx_hashes)
+        # caller's list is not modified
+        self.assertEqual(len(tx_hashes), len(hex_hashes))
 
     def test_merkle_parent_level_failure(self):
         hashes = [
@@ -215,6 +221,14 @@ class HelperTest(unittest.TestCase):
         with self.assertRaises(ValueError):
             merkle_parent_level(hashes=hashes)
 
+    def test_hmac_sha512_copy(self):
+        state = hmac_sha512_state(key=b"Bitcoin seed")
+        for msg in [b"", b"\x00" * 37, bytearray(b"abc")]:
+            self.assertEqual(
+                hmac_sha512_copy(state=state, msg=msg),
+                hmac_sha512(key=b"Bitcoin seed", msg=bytes(msg))
+            )
+
     def test_merkle_root(self):
         hex_hashes = [
             'c117ea8ec828342f4dfb0ad6bd140e03a50720ece40169ee38bdc15d9eb64cf5',
@@ -0,0 +1,73 @@
+import io
+import os
+import unittest
+from unittest.mock import patch
+
+from btc_hd_wallet.base_wallet import BaseWallet
+from btc_hd_wallet.bip32 import PrvKeyNode, PubKeyNode
+from btc_hd_wallet.wallet_utils import Key, Bip
+from btc_hd_wallet.importer import (
+    bulk_import, parse_extended_key, read_extended_keys
+)
+
+
+class TestImporter(unittest.TestCase):
+    xpub = "xpub6CEGxdGrXswtcL6Hqo1L3wwzDBuRzQvQfUa5PZponbX7ibNWUKkhp1LaNHMg9oJYjjRmbxArwDUjpudAvmNDRG8LGwYb9YvnkEfMY3eGdTP"
+    ypub = "ypub6WouwrxJ8bb32SyDmGnNeAracX1FeHMjFMjETWtR76hbt442FcKv4ce6QEDWjQHEr5kr9fGziGETGgvLYayVGSWKLJGNuQahEoMBVDaEYsZ"
+    vprv = "vprv9LFibgTtfNsNtNY47JxpcD2m1WqVwiJqaFms8t14LjNtuqP1inE6yy4h7pBLGKDa33qURi2oxHMvrekZPzfrLDFNukmE3gQ2n7ryyyzdsXz"
+    tpub = "tpubDDppRte6omcjgcMn3acmKrk5AkiTYUJcUjouLyYYnw3aSxnqvBGpwtAEhJHm14fyqYMdm9pRuoxCRHzwaSaUWRXdi6QKQhoQ4HKZ2uNgRnJ"
+
+    def test_parse_extended_key(self):
+        node, key_type, bip_type, testnet = parse_extended_key(self.ypub)
+        self.assertIsInstance(node, PubKeyNode)
+        self.assertEqual((key_type, bip_type, testnet), (Key.PUB, Bip.BIP49, False))
+
+        node, key_type, bip_type, testnet = parse_extended_key(self.vprv)
+        self.assertIsInstance(node, PrvKeyNode)
+        self.assertEqual((key_type, bip_type, testnet), (Key.PRV, Bip.BIP84, True))
+        self.assertEqual(node.extended_private_key(version=0x045f18bc), self.vprv)
+
+    def test_bulk_import(self):
+        keys = [
+            self.xpub,
+            self.xpub[:-1] + "Q",  # bad checksum
+            "  " + self.vprv + "\n",
+            "xpub0OIl",  # invalid base58 characters
+            self.tpub,
+        ]
+        result = bulk_import(keys)
+        self.assertEqual([key.position for key in result.keys], [0, 2, 4])
+        self.assertEqual([f.position for f in result.failures], [1, 3])
+        self.assertRegex(result.failures[1].reason, "not valid base58")
+
+        wallets = result.wallets()
+        self.assertEqual(
+            wallets,
+            [
+                BaseWallet.from_extended_key(self.xpub),
+                BaseWallet.from_extended_key(self.vprv),
+                BaseWallet.from_extended_key(self.tpub),
+            ]
+        )
+        self.assertEqual([w.watch_only for w in wallets], [True, False, True])
+        self.assertEqual(result.nodes()[2].testnet, True)
+
+    def test_read_extended_keys(self):
+        content = "# custodial batch\n{}\n\n{}\n".format(self.xpub, self.ypub)
+        self.assertEqual(
+            list(read_extended_keys(io.StringIO(content))),
+            [self.xpub, self.ypub]
+        )
+        file_path = "extended_keys.txt"
+        with open(file_path, "w") as f:
+            f.write(content)
+        try:
+            self.assertEqual(
+                list(read_extended_keys(file_path)), [self.xpub, self.ypub]
+            )
+        finally:
+            os.remove(file_path)
+        with patch("sys.stdin", io.StringIO(content)):
+            self.assertEqual(
+                list(read_extended_keys("-")), [self.xpub, self.ypub]
+            )
@@ -1,5 +1,13 @@
+import ecdsa
+import hashlib
 import unittest
-from btc_hd_wallet.keys import PrivateKey, PublicKey
+from btc_hd_wallet.keys import (
+    PrivateKey, PublicKey, Signature, taproot_tweak, taproot_tweak_many,
+    lift_x, rfc6979_nonce, sign_batch, sec_many, CURVE_ORDER
+)
+from btc_hd_wallet.helper import (
+    tagged_hash, big_endian_to_int, int_to_big_endian
+)
 
 
 class TestPrivateKey(unittest.TestCase):
@@ -159,6 +167,16 @@ class TestPublicKey(unittest.TestCase):
                 PublicKey.parse(bytes.fromhex(compressed)).point
             )
 
+    def test_sec_many(self):
+        secrets = [1, 2, 3, CURVE_ORDER - 1, 2 ** 256 - 2 ** 199]
+        self.assertEqual(
+            sec_many(secrets),
+            [PrivateKey(sec_exp=k).K.sec() for k in secrets]
+        )
+        self.assertEqual(sec_many([]), [])
+        with self.assertRaises(ValueError):
+            sec_many([CURVE_ORDER])
+
     def test_incorrect_address_type(self):
         pubkey = PrivateKey(sec_exp=6516151654156).K
         with self.assertRaises(ValueError):
@@ -283,3 +301,102 @@ class TestPublicKey(unittest.TestCase):
             "033c47bf0f7c18ed18f49efd78cfb14138e673eea135ccf0779f22c46c93ac2b2f"
         ))
         self.assertNotEqual(pk1, pk2)
+
+
+class TestTaprootTweak(unittest.TestCase):
+    def test_taproot_tweak_many(self):
+        xonlys = [
+            PrivateKey(sec_exp=i).K.xonly() for i in (1, 2, 3, 2 ** 200 + 7)
+        ]
+        expected = []
+        for xonly in xonlys:
+            t = big_endian_to_int(tagged_hash("TapTweak", xonly))
+            point = PublicKey.parse(b"\x02" + xonly).point + \
+                PrivateKey(sec_exp=t).K.point
+            expected.append(int_to_big_endian(point.x(), 32))
+        self.assertEqual(taproot_tweak_many(xonlys), expected)
+        self.assertEqual(taproot_tweak(xonlys[1]), expected[1])
+        self.assertEqual(taproot_tweak_many([]), [])
+        # with merkle root
+        root = bytes(32)
+        t = big_endian_to_int(tagged_hash("TapTweak", xonlys[0] + root))
+        point = PublicKey.parse(b"\x02" + xonlys[0]).point + \
+            PrivateKey(sec_exp=t).K.point
+        self.assertEqual(
+            taproot_tweak(xonlys[0], merkle_root=root),
+            int_to_big_endian(point.x(), 32)
+        )
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            taproot_tweak(bytes(31))
+        with self.assertRaises(ValueError):
+            # x = 5 is not on secp256k1
+            lift_x(5)
+        with self.assertRaises(ValueError):
+            lift_x(2 ** 256 - 1)
+
+
+class TestSigning(unittest.TestCase):
+    def test_rfc6979_vector(self):
+        sk = PrivateKey(sec_exp=1)
+        sig = sk.sign(hashlib.sha256(b"Satoshi Nakamoto").digest())
+        self.assertEqual(
+            sig.r,
+            0x934b1ea10a4b3c1757e2b0c017d0b6143ce3c9a7e6a4a49860d7a6ab210ee3d8
+        )
+        self.assertEqual(
+            sig.s,
+            0x2442ce9d2b916064108014783e923ec36b49743e2ffa1c4496f01a512aafd9e5
+        )
+        self.assertEqual(
+            rfc6979_nonce(1, hashlib.sha256(b"Satoshi Nakamoto").digest()),
+            0x8f8a276c19f4149656b280621e358cce24f5f52542772691ee69063b74f15d15
+        )
+
+    def test_sign_matches_ecdsa(self):
+        sk = PrivateKey(sec_exp=0xdeadbeef * 2 ** 128 + 12345)
+        digests = [hashlib.sha256(bytes([i])).digest() for i in range(20)]
+        signatures = sk.sign_many(digests)
+        self.assertEqual(signatures, [sk.sign(d) for d in digests])
+        for digest, sig in zip(digests, signatures):
+            r, s = sk.k.sign_digest_deterministic(
+                digest,
+                hashfunc=hashlib.sha256,
+                sigencode=ecdsa.util.sigencode_strings_canonize
+            )
+            self.assertEqual(sig.compact(), r + s)
+            self.assertLessEqual(sig.s, CURVE_ORDER // 2)
+            self.assertTrue(
+                sk.K.K.verify_digest(
+                    sig.der(), digest, sigdecode=ecdsa.util.sigdecode_der
+                )
+            )
+            self.assertEqual(Signature.parse_der(sig.der()), sig)
+            self.assertEqual(Signature.parse_compact(sig.compact()), sig)
+            self.assertIn(sig.recid, (0, 1))
+
+        high = sk.sign(digests[0], low_s=False)
+        low = signatures[0]
+        self.assertEqual(high.r, low.r)
+        self.assertIn(high.s, (low.s, CURVE_ORDER - low.s))
+
+    def test_sign_batch_many_keys(self):
+        keys = [PrivateKey(sec_exp=i) for i in (3, 5, 7)]
+        digest = hashlib.sha256(b"sweep").digest()
+        self.assertEqual(
+            sign_batch([(key, digest) for key in keys]),
+            [key.sign(digest) for key in keys]
+        )
+        self.assertEqual(sign_batch([]), [])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            PrivateKey(sec_exp=1).sign(b"\x00" * 31)
+        for der in (b"", b"\x31\x06\x02\x01\x01\x02\x01\x01",
+                    b"\x30\x06\x02\x01\x01\x02\x02\x01",
+                    b"\x30\x07\x02\x01\x01\x02\x01\x01\x00"):
+            with self.assertRaises(ValueError):
+                Signature.parse_der(der)
+        with self.assertRaises(ValueError):
+            Signature.parse_compact(b"\x00" * 63)
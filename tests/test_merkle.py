@@ -0,0 +1,77 @@
+import unittest
+
+from btc_hd_wallet.helper import hash256, merkle_root
+from btc_hd_wallet.merkle import (
+    MerkleTree, address_leaf, streaming_merkle_root, verify_proof
+)
+
+
+class TestMerkleTree(unittest.TestCase):
+    leaves = [hash256(i.to_bytes(4, "big")) for i in range(37)]
+
+    def test_root(self):
+        for n in range(1, len(self.leaves) + 1):
+            leaves = self.leaves[:n]
+            root = merkle_root(list(leaves))
+            self.assertEqual(MerkleTree(leaves).root(), root)
+            self.assertEqual(streaming_merkle_root(iter(leaves)), root)
+        with self.assertRaises(ValueError):
+            streaming_merkle_root([])
+        with self.assertRaises(ValueError):
+            MerkleTree().root()
+        with self.assertRaises(ValueError):
+            MerkleTree([b"\x00" * 31])
+
+    def test_proof(self):
+        for n in (1, 2, 5, 16, 37):
+            tree = MerkleTree(self.leaves[:n])
+            root = tree.root()
+            for i in range(n):
+                proof = tree.proof(i)
+                self.assertEqual(len(proof), len(tree.levels) - 1)
+                self.assertTrue(verify_proof(self.leaves[i], i, proof, root))
+                self.assertFalse(
+                    verify_proof(self.leaves[i], i + 1, proof, root, n)
+                )
+                if i + 1 < n:
+                    self.assertFalse(
+                        verify_proof(self.leaves[i], i + 1, proof, root)
+                    )
+                self.assertFalse(
+                    verify_proof(hash256(b"other"), i, proof, root)
+                )
+        with self.assertRaises(IndexError):
+            MerkleTree(self.leaves[:5]).proof(5)
+
+    def test_append_update(self):
+        tree = MerkleTree()
+        for i, leaf in enumerate(self.leaves):
+            self.assertEqual(tree.append(leaf), i)
+            self.assertEqual(tree.root(), merkle_root(self.leaves[:i + 1]))
+        self.assertEqual(tree.levels, MerkleTree(self.leaves).levels)
+
+        leaves = list(self.leaves)
+        for i in (0, 17, 36):
+            leaves[i] = hash256(b"updated" + bytes([i]))
+            tree.update(i, leaves[i])
+            self.assertEqual(tree.root(), merkle_root(leaves))
+            self.assertTrue(verify_proof(leaves[i], i, tree.proof(i),
+                                         tree.root()))
+        with self.assertRaises(IndexError):
+            tree.update(37, leaves[0])
+
+    def test_from_addresses(self):
+        addresses = [
+            "bc1qcr8te4kr609gcawutmrza0j4xv80jy8z306fyu",
+            "bc1qnjg0jd8228aq7egyzacy8cys3knf9xvrerkf9g",
+            "1LqBGSKuX5yYUonjxT5qGfpUsXKYYWeabA",
+        ]
+        tree = MerkleTree.from_addresses(addresses)
+        self.assertEqual(len(tree), 3)
+        self.assertEqual(
+            tree.root(), merkle_root([address_leaf(a) for a in addresses])
+        )
+        self.assertTrue(
+            verify_proof(address_leaf(addresses[2]), 2, tree.proof(2),
+                         tree.root())
+        )
@@ -0,0 +1,132 @@
+import base64
+import hashlib
+import unittest
+
+from btc_hd_wallet import bech32
+from btc_hd_wallet.keys import PrivateKey, PublicKey
+from btc_hd_wallet.message import (
+    message_digest, sign_message, parse_message_signature,
+    recover_message_key, verify_message, verify_messages
+)
+
+
+class TestMessage(unittest.TestCase):
+    key = PrivateKey(sec_exp=0x1e99423a4ed27608a15a2616a2b0e9e52ced330ac530edcc32c8ffc6a526aedd)
+    message = b"This is an example of a signed message."
+
+    def test_message_digest(self):
+        self.assertEqual(
+            message_digest(b""),
+            hashlib.sha256(hashlib.sha256(
+                b"\x18Bitcoin Signed Message:\n\x00"
+            ).digest()).digest()
+        )
+
+    def test_sign_verify_roundtrip(self):
+        for addr_type, address in (
+            ("p2pkh", self.key.K.address(addr_type="p2pkh")),
+            ("p2sh_p2wpkh", self.key.K.address(addr_type="p2sh_p2wpkh")),
+            ("p2wpkh", self.key.K.address(addr_type="p2wpkh")),
+            ("p2pkh_uncompressed", self.key.K.address(
+                compressed=False, addr_type="p2pkh"
+            )),
+        ):
+            signature = sign_message(self.key, self.message, addr_type)
+            sig, parsed_type = parse_message_signature(signature)
+            self.assertEqual(parsed_type, addr_type)
+            key, _ = recover_message_key(self.message, signature)
+            self.assertEqual(key, self.key.K)
+            self.assertTrue(verify_message(address, self.message, signature))
+            self.assertFalse(
+                verify_message(address, self.message + b"!", signature)
+            )
+        testnet_address = self.key.K.address(testnet=True, addr_type="p2wpkh")
+        signature = sign_message(self.key, self.message, "p2wpkh")
+        self.assertTrue(
+            verify_message(testnet_address, self.message, signature)
+        )
+        # compressed header is accepted for any compressed address type
+        signature = sign_message(self.key, self.message, "p2pkh")
+        self.assertTrue(verify_message(
+            self.key.K.address(addr_type="p2wpkh"), self.message, signature
+        ))
+        # uncompressed header does not prove compressed address
+        signature = sign_message(self.key, self.message, "p2pkh_uncompressed")
+        self.assertFalse(verify_message(
+            self.key.K.address(addr_type="p2pkh"), self.message, signature
+        ))
+
+    def test_verify_messages(self):
+        keys = [PrivateKey(sec_exp=i) for i in range(1, 6)]
+        items = [
+            (
+                key.K.address(addr_type="p2wpkh"),
+                b"proof " + bytes([i]),
+                sign_message(key, b"proof " + bytes([i]), "p2wpkh")
+            )
+            for i, key in enumerate(keys)
+        ]
+        # wrong address, malformed signatures
+        items.append((items[0][0], items[1][1], items[1][2]))
+        items.append((items[0][0], items[0][1], "not base64!"))
+        items.append((items[0][0], items[0][1], "AAAA"))
+        expected = [True] * 5 + [False] * 3
+        self.assertEqual(verify_messages(items), expected)
+        self.assertEqual(
+            verify_messages(items, workers=2, chunk_size=2), expected
+        )
+
+    def test_verify_any_network(self):
+        h160 = self.key.K.h160()
+        for addr_type, address in (
+            ("p2wpkh", bech32.encode("bcrt", 0, h160)),
+            ("p2wpkh", bech32.encode("tb", 0, h160)),
+            ("p2pkh", self.key.K.address(testnet=True, addr_type="p2pkh")),
+            ("p2sh_p2wpkh", self.key.K.address(
+                testnet=True, addr_type="p2sh_p2wpkh"
+            )),
+        ):
+            signature = sign_message(self.key, self.message, addr_type)
+            self.assertTrue(verify_message(address, self.message, signature))
+            other = PrivateKey(sec_exp=7)
+            self.assertFalse(verify_message(
+                address, self.message,
+                sign_message(other, self.message, addr_type)
+            ))
+        signature = sign_message(self.key, self.message, "p2wpkh")
+        regtest = bech32.encode("bcrt", 0, h160).upper()
+        self.assertTrue(verify_message(regtest, self.message, signature))
+        self.assertFalse(verify_message("bcrt1invalid", self.message, signature))
+        self.assertFalse(verify_message(
+            self.key.K.address(addr_type="p2tr"), self.message, signature
+        ))
+
+    def test_invalid_signature(self):
+        with self.assertRaises(ValueError):
+            sign_message(self.key, self.message, "p2tr")
+        raw = bytes([26]) + bytes(64)
+        with self.assertRaises(ValueError):
+            parse_message_signature(base64.b64encode(raw).decode())
+
+
+class TestVerify(unittest.TestCase):
+    def test_verify_many(self):
+        key = PrivateKey(sec_exp=987654321)
+        digests = [hashlib.sha256(bytes([i])).digest() for i in range(10)]
+        signatures = key.sign_many(digests)
+        self.assertEqual(
+            key.K.verify_many(digests, signatures), [True] * 10
+        )
+        self.assertEqual(
+            key.K.verify_many(digests, signatures[1:] + signatures[:1]),
+            [False] * 10
+        )
+        self.assertEqual(
+            key.K.verify_many(digests, signatures, workers=2),
+            [True] * 10
+        )
+        other = PublicKey.parse(PrivateKey(sec_exp=5).K.sec())
+        self.assertFalse(other.verify(digests[0], signatures[0]))
+        # high S is valid too
+        high = key.sign(digests[0], low_s=False)
+        self.assertTrue(key.K.verify(digests[0], high))
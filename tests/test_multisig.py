@@ -0,0 +1,128 @@
+import unittest
+
+from btc_hd_wallet.base_wallet import BaseWallet
+from btc_hd_wallet.helper import (
+    hash160, sha256, h160_to_p2sh_address, h256_to_p2wsh_address
+)
+from btc_hd_wallet.script import (
+    Script, p2wsh_script, sortedmulti_serialize, sortedmulti_script,
+    multisig_template
+)
+from btc_hd_wallet.multisig import MultisigAccount
+
+
+class TestSortedMulti(unittest.TestCase):
+    def test_bip67_vector(self):
+        keys = [
+            bytes.fromhex("02ff12471208c14bd580709cb2358d98975247d8765f92bc25eab3b2763ed605f8"),
+            bytes.fromhex("02fe6f0a5a297eb38c391581c4413e084773ea23954d93f7753db7dc0adc188b2f"),
+        ]
+        raw = sortedmulti_serialize(m=2, keys=keys)
+        self.assertEqual(
+            raw.hex(),
+            "522102fe6f0a5a297eb38c391581c4413e084773ea23954d93f7753db7dc0adc188b2f"
+            "2102ff12471208c14bd580709cb2358d98975247d8765f92bc25eab3b2763ed605f852ae"
+        )
+        self.assertEqual(
+            h160_to_p2sh_address(hash160(raw)),
+            "39bgKC7RFbpoCRbtD5KEdkYKtNyhpsNa3Z"
+        )
+        script = sortedmulti_script(m=2, keys=keys)
+        self.assertEqual(script, Script([0x52] + sorted(keys) + [0x52, 0xae]))
+        self.assertEqual(script.raw_serialize(), raw)
+
+    def test_multisig_template(self):
+        self.assertEqual(multisig_template(1, 1), (b"\x51", b"\x21", b"\x51\xae"))
+        self.assertIs(multisig_template(2, 3), multisig_template(2, 3))
+        for m, n in ((0, 1), (3, 2), (1, 17)):
+            with self.assertRaises(ValueError):
+                multisig_template(m, n)
+
+
+class TestMultisigAccount(unittest.TestCase):
+    wallets = [
+        BaseWallet.from_mnemonic(mnemonic=mnemonic)
+        for mnemonic in (
+            "abandon abandon abandon abandon abandon abandon abandon abandon "
+            "abandon abandon abandon about",
+            "legal winner thank year wave sausage worth useful legal winner "
+            "thank yellow",
+            "letter advice cage absurd amount doctor acoustic avoid letter "
+            "advice cage above",
+        )
+    ]
+    path = "m/48'/0'/0'/2'"
+    cosigners = [
+        wallets[0].by_path(path).extended_public_key(),
+        wallets[1].by_path(path).extended_public_key(),
+        wallets[2].by_path(path).extended_public_key(),
+    ]
+
+    def expected(self, chain, index):
+        keys = [
+            wallet.by_path(self.path).ckd(chain).ckd(index).public_key.sec()
+            for wallet in self.wallets
+        ]
+        return Script([0x52] + sorted(keys) + [0x53, 0xae]).raw_serialize()
+
+    def test_witness_scripts(self):
+        account = MultisigAccount(threshold=2, cosigners=self.cosigners)
+        scripts = account.witness_scripts(chain=1, interval=(3, 8))
+        self.assertEqual(scripts, [self.expected(1, i) for i in range(3, 8)])
+        self.assertEqual(account.script(1, 5).raw_serialize(), scripts[2])
+        self.assertEqual(account.witness_scripts(interval=(5, 5)), [])
+        # cosigner order does not matter
+        reversed_account = MultisigAccount(
+            threshold=2, cosigners=self.cosigners[::-1]
+        )
+        self.assertEqual(
+            reversed_account.witness_scripts(chain=1, interval=(3, 8)),
+            scripts
+        )
+
+    def test_addresses(self):
+        account = MultisigAccount(threshold=2, cosigners=self.cosigners)
+        expected = [self.expected(0, i) for i in range(4)]
+        self.assertEqual(
+            account.addresses(interval=(0, 4)),
+            [h256_to_p2wsh_address(sha256(ws)) for ws in expected]
+        )
+        self.assertEqual(
+            account.addresses(interval=(0, 4), script_type="p2sh_p2wsh"),
+            [
+                h160_to_p2sh_address(
+                    hash160(p2wsh_script(sha256(ws)).raw_serialize())
+                )
+                for ws in expected
+            ]
+        )
+        self.assertEqual(
+            account.addresses(interval=(0, 4), workers=2),
+            account.addresses(interval=(0, 4))
+        )
+        with self.assertRaises(ValueError):
+            account.addresses(script_type="p2wpkh")
+
+    def test_one_of_one_matches_wallet(self):
+        wallet = self.wallets[0]
+        account = MultisigAccount(
+            threshold=1, cosigners=[self.cosigners[0]]
+        )
+        chain = wallet.by_path(self.path + "/0")
+        for script_type in ("p2wsh", "p2sh_p2wsh"):
+            addr_fnc = getattr(wallet, script_type + "_address")
+            self.assertEqual(
+                account.addresses(interval=(0, 3), script_type=script_type),
+                [addr_fnc(node) for node in chain.generate_children((0, 3))]
+            )
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            MultisigAccount(threshold=3, cosigners=self.cosigners[:2])
+        with self.assertRaises(ValueError):
+            MultisigAccount(threshold=1, cosigners=[self.wallets[0].master])
+        with self.assertRaises(ValueError):
+            MultisigAccount(
+                threshold=1,
+                cosigners=[self.wallets[0].master.extended_private_key()]
+            )
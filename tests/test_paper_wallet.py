@@ -1,6 +1,9 @@
 import os
+import bz2
 import csv
+import gzip
 import json
+import lzma
 import unittest
 from btc_hd_wallet.paper_wallet import PaperWallet
 
@@ -265,6 +268,84 @@ class TestColdWallet(unittest.TestCase):
         self.assertEqual(pw["BIP84"]["groups"][49][2], pubkey)
         self.assertEqual(pw["BIP84"]["groups"][49][3], wif)
 
+    def test_bip86(self):
+        pw = self.wallet.generate(interval=(0, 3))
+        acct_ext_keys, groups = self.wallet.bip86(interval=(0, 3))
+        self.assertEqual(pw["BIP86"]["account_extended_keys"], acct_ext_keys)
+        self.assertEqual(pw["BIP86"]["groups"], groups)
+        self.assertEqual(acct_ext_keys["path"], "m/86'/0'/0'")
+        self.assertTrue(acct_ext_keys["pub"].startswith("xpub"))
+        for i, group in enumerate(groups):
+            path = "m/86'/0'/0'/0/{}".format(i)
+            node = self.wallet.by_path(path)
+            self.assertEqual(group[0], path)
+            self.assertEqual(group[1], self.wallet.p2tr_address(node=node))
+            self.assertTrue(group[1].startswith("bc1p"))
+            self.assertEqual(group[2], node.public_key.sec().hex())
+            self.assertEqual(group[3], node.private_key.wif())
+
+        _, groups = self.wallet_testnet.bip86(interval=(0, 1))
+        self.assertTrue(groups[0][1].startswith("tb1p"))
+
+    def test_internal_chain(self):
+        acct_ext_keys, groups = self.wallet.bip84(interval=(0, 3), chains=(0, 1))
+        self.assertEqual(acct_ext_keys, self.wallet.bip84()[0])
+        self.assertEqual(len(groups), 6)
+        self.assertEqual(groups[:3], self.wallet.bip84(interval=(0, 3))[1])
+        for i, group in enumerate(groups[3:]):
+            path = "m/84'/0'/0'/1/{}".format(i)
+            node = self.wallet.by_path(path)
+            self.assertEqual(group[0], path)
+            self.assertEqual(group[1], self.wallet.p2wpkh_address(node=node))
+            self.assertEqual(group[2], node.public_key.sec().hex())
+            self.assertEqual(group[3], node.private_key.wif())
+
+        pw = self.wallet_testnet.generate(interval=(5, 7), chains=(1,))
+        for bip, purpose in (("BIP44", 44), ("BIP49", 49), ("BIP84", 84),
+                             ("BIP86", 86)):
+            self.assertEqual(
+                [group[0] for group in pw[bip]["groups"]],
+                [
+                    "m/{}'/1'/0'/1/5".format(purpose),
+                    "m/{}'/1'/0'/1/6".format(purpose)
+                ]
+            )
+
+    def test_generate_sections(self):
+        full = self.wallet.generate(interval=(0, 3))
+        pw = self.wallet.generate(interval=(0, 3), sections=["BIP84"])
+        self.assertEqual(list(pw), ["BIP84"])
+        self.assertEqual(pw["BIP84"], full["BIP84"])
+        pw = self.wallet.generate(
+            interval=(0, 3), sections=["BIP86", "MASTER"]
+        )
+        self.assertEqual(list(pw), ["MASTER", "BIP86"])
+        self.assertEqual(pw["MASTER"], full["MASTER"])
+        self.assertEqual(pw["BIP86"], full["BIP86"])
+        with self.assertRaises(ValueError):
+            self.wallet.generate(sections=["BIP32"])
+
+    def test_generate_public(self):
+        full = self.wallet_testnet.generate(interval=(0, 3), chains=(0, 1))
+        pw = self.wallet_testnet.generate(
+            interval=(0, 3), chains=(0, 1), private=False
+        )
+        self.assertEqual(list(pw), ["BIP44", "BIP49", "BIP84", "BIP86"])
+        for bip in pw:
+            self.assertEqual(
+                pw[bip]["account_extended_keys"],
+                {
+                    "path": full[bip]["account_extended_keys"]["path"],
+                    "pub": full[bip]["account_extended_keys"]["pub"]
+                }
+            )
+            self.assertEqual(
+                pw[bip]["groups"],
+                [group[:-1] for group in full[bip]["groups"]]
+            )
+        with self.assertRaises(ValueError):
+            self.wallet.generate(sections=["BIP85"], private=False)
+
     def test_watch_only_generate_failure(self):
         # cannot do hardened ckd
         xpub = "xpub6CEGxdGrXswwWNoqpBePNgiQhjBmcEZWoPfkGcLg7zEjBxrFBkSzcFGrkpPqvH7TJwkjyuGMShKuyU7VpjvKnUoTavL9xSaq3DvKCAgNhwM"
@@ -321,6 +402,23 @@ class TestColdWallet(unittest.TestCase):
         data_testnet = self.load_file_data(file_path=filename_testnet)
         self.assertEqual(expected_testnet, data_testnet)
 
+    def test_export_wallet_compressed(self):
+        expected = self.wallet.generate()
+        for file_path, opener in (("wallet.json.gz", gzip.open),
+                                  ("wallet.json.xz", lzma.open),
+                                  ("wallet.json.bz2", bz2.open)):
+            self.wallet.export_wallet(file_path=file_path, data=expected)
+            with opener(file_path, "rt") as f:
+                self.assertEqual(json.load(f), expected)
+            os.remove(file_path)
+        # explicit codec regardless of extension
+        self.wallet.export_wallet(
+            file_path="wallet.json", data=expected, compress="gzip"
+        )
+        with gzip.open("wallet.json", "rt") as f:
+            self.assertEqual(json.load(f), expected)
+        os.remove("wallet.json")
+
     def test_export_wasabi(self):
         expect = {
             "ExtPubKey": "xpub6D5CphEaWSRm5bAdeWs2cewL1RPNpFopxKShM9AcCo8eZGTugZKuc3AfihFiMqsughhtcePDQzuJJdKuVGSAbyTCQ1CB5LDmq2mx17Xq3rZ",
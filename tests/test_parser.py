@@ -1,11 +1,17 @@
+import os
+import json
+import tempfile
 import unittest
 from io import StringIO
 from unittest.mock import patch
 from argparse import Namespace, ArgumentParser
 
-from btc_hd_wallet.__main__ import parse_args, paranoia_mode
+from btc_hd_wallet.__main__ import main, parse_args
 from btc_hd_wallet.bip39 import CORRECT_ENTROPY_BITS, CORRECT_MNEMONIC_LENGTH
 from btc_hd_wallet.paper_wallet import PaperWallet
+from btc_hd_wallet.daemon import CACHE_SIZE, REVERSE_LIMIT
+from btc_hd_wallet.planner import DerivationSpec
+from btc_hd_wallet.shard import SHARD_SIZE, plan_job
 
 
 class TestArgumentParsing(unittest.TestCase):
@@ -13,10 +19,19 @@ class TestArgumentParsing(unittest.TestCase):
     def test_parser(self):
         expected = Namespace(
             file="wallet.json",
+            compress=None,
+            checkpoint=False,
+            resume=None,
+            shard_plan=None,
+            shard_size=SHARD_SIZE,
             testnet=True,
             paranoia=True,
             account=1100,
             interval=[0, 150],
+            chains=[0, 1],
+            spec=None,
+            fields=None,
+            workers=None,
             command="new",
             password="secret_bip39_password",
             mnemonic_len=12
@@ -26,6 +41,7 @@ class TestArgumentParsing(unittest.TestCase):
             "--testnet", "--paranoia",
             "--account", "1100",
             "--interval", "0", "150",
+            "--chains", "0,1",
             "new",
             "--password", "secret_bip39_password",
             "--mnemonic-len", "12"
@@ -35,10 +51,19 @@ class TestArgumentParsing(unittest.TestCase):
 
         expected = Namespace(
             file=None,
+            compress=None,
+            checkpoint=False,
+            resume=None,
+            shard_plan=None,
+            shard_size=SHARD_SIZE,
             testnet=False,
             paranoia=False,
             account=0,
             interval=[0, 20],
+            chains=[0],
+            spec=None,
+            fields=None,
+            workers=None,
             command="new",
             password="",
             mnemonic_len=24
@@ -131,6 +156,114 @@ class TestArgumentParsing(unittest.TestCase):
             r"Address index has to be between 0 inclusive and 4294967295"
         )
 
+    @patch('sys.stderr', new_callable=StringIO)
+    def test_invalid_chains(self, mock_stderr):
+        for invalid_chains in ["2", "0,2", "a", ""]:
+            with self.assertRaises(SystemExit):
+                parse_args(["--chains", invalid_chains, "new"])
+            self.assertRegexpMatches(
+                mock_stderr.getvalue(),
+                r"Chains have to be comma separated 0"
+            )
+
+    def test_fields(self):
+        _, ns_obj = parse_args(["--fields", "address,path", "new"])
+        self.assertEqual(ns_obj.fields, ("address", "path"))
+
+    @patch('sys.stderr', new_callable=StringIO)
+    def test_invalid_resume(self, mock_stderr):
+        # existing file without manifest is not checkpointed export
+        with self.assertRaises(SystemExit):
+            parse_args(["--resume", "tests/test_parser.py", "new"])
+        self.assertRegexpMatches(
+            mock_stderr.getvalue(), r"is not checkpointed export"
+        )
+
+    def test_serve(self):
+        _, ns_obj = parse_args(
+            ["--workers", "2", "serve", "--socket", "/tmp/wallet.sock"]
+        )
+        self.assertEqual(ns_obj.command, "serve")
+        self.assertEqual(ns_obj.socket, "/tmp/wallet.sock")
+        self.assertEqual(ns_obj.workers, 2)
+        self.assertEqual(ns_obj.cache_size, CACHE_SIZE)
+        self.assertEqual(ns_obj.reverse_limit, REVERSE_LIMIT)
+        _, ns_obj = parse_args(
+            ["serve", "--socket", "/tmp/wallet.sock", "--reverse-limit", "10"]
+        )
+        self.assertEqual(ns_obj.reverse_limit, 10)
+
+    @patch('sys.stderr', new_callable=StringIO)
+    def test_invalid_shard_size(self, mock_stderr):
+        for invalid_size in ["0", "-3"]:
+            with self.assertRaises(SystemExit):
+                parse_args(["--shard-size", invalid_size, "new"])
+            self.assertRegexpMatches(
+                mock_stderr.getvalue(), r"Shard size has to be between 1"
+            )
+        _, ns_obj = parse_args(["--shard-size", "7", "new"])
+        self.assertEqual(ns_obj.shard_size, 7)
+
+    @patch('sys.stderr', new_callable=StringIO)
+    def test_invalid_shard_id(self, mock_stderr):
+        wallet = PaperWallet.from_entropy_hex("00" * 16)
+        job = plan_job(
+            wallet=wallet, specs=[DerivationSpec.parse("84:0:0:0-4")],
+            shard_size=2
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            job_path = os.path.join(tmp, "job.json")
+            with open(job_path, "w") as f:
+                json.dump(job, f)
+            shards_dir = os.path.join(tmp, "shards")
+            for shard_id in ["-1", "2", "999"]:
+                argv = ["prog", "shard", job_path, "--dir", shards_dir,
+                        "--id", shard_id]
+                with patch("sys.argv", argv):
+                    with self.assertRaises(SystemExit):
+                        main()
+                self.assertRegexpMatches(
+                    mock_stderr.getvalue(),
+                    r"shard {} out of range".format(shard_id)
+                )
+            self.assertEqual(os.listdir(shards_dir), [])
+
+    def test_compressed_shard_plan(self):
+        mnemonic = ("vast tell razor drip stick one engine action "
+                    "width sport flock cheese")
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ["job.json", "job.json.gz", "job.json.xz"]:
+                job_path = os.path.join(tmp, name)
+                argv = ["prog", "--shard-plan", job_path, "--shard-size", "2",
+                        "--interval", "0", "3", "from-mnemonic", mnemonic]
+                with patch("sys.argv", argv):
+                    main()
+                _, ns_obj = parse_args(
+                    ["shard", job_path, "--dir", os.path.join(tmp, "shards")]
+                )
+                self.assertEqual(ns_obj.job["shard_size"], 2)
+
+    @patch('sys.stderr', new_callable=StringIO)
+    def test_compress_without_file(self, mock_stderr):
+        argv = ["prog", "--compress", "gzip", "--interval", "0", "3",
+                "from-entropy-hex", "00" * 16]
+        with patch("sys.argv", argv):
+            with self.assertRaises(SystemExit):
+                main()
+        self.assertRegexpMatches(
+            mock_stderr.getvalue(), r"--compress requires --file"
+        )
+
+    @patch('sys.stderr', new_callable=StringIO)
+    def test_invalid_fields(self, mock_stderr):
+        for invalid_fields in ["xpub", "path,path", "path,", ""]:
+            with self.assertRaises(SystemExit):
+                parse_args(["--fields", invalid_fields, "new"])
+            self.assertRegexpMatches(
+                mock_stderr.getvalue(),
+                r"Invalid fields"
+            )
+
     @patch('sys.stderr', new_callable=StringIO)
     def test_invalid_extended_key(self, mock_stderr):
         invalid_xprv = "xprv9yg2hgdKSVridAPC7kYvC3nYXZZoSMfLnQHFrsmKiC4m9ywrLS59suprG9CiMmtna6up5RKXou8rALdaDxvkjxJ2wrXGCpN3U5Lujx5JyPj00"
@@ -215,19 +348,23 @@ class TestArgumentParsing(unittest.TestCase):
         )
 
     def test_paranoia_mode(self):
-        w = PaperWallet.new_wallet()
-        data = w.generate()
-        self.assertTrue("MASTER" in data)
-        self.assertTrue("BIP85" in data)
-        for bip in ["BIP44", "BIP49", "BIP84"]:
-            self.assertTrue("prv" in data[bip]["account_extended_keys"])
-            for group in data[bip]["groups"]:
-                self.assertEqual(len(group), 4)
-
-        data = paranoia_mode(data=data)
-        self.assertFalse("MASTER" in data)
-        self.assertFalse("BIP85" in data)
-        for bip in ["BIP44", "BIP49", "BIP84"]:
-            self.assertFalse("prv" in data[bip]["account_extended_keys"])
+        mnemonic = (
+            "domain auction wool cloud era thrive vivid vital outdoor "
+            "brass tilt domain fossil produce kidney virtual skill truly"
+        )
+        argv = ["prog", "--paranoia", "--interval", "0", "3",
+                "from-mnemonic", mnemonic]
+        with patch("sys.argv", argv), \
+                patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            main()
+        data = json.loads(mock_stdout.getvalue())
+        self.assertEqual(list(data), ["BIP44", "BIP49", "BIP84", "BIP86"])
+        wallet = PaperWallet.from_mnemonic(mnemonic=mnemonic)
+        self.assertEqual(
+            data, wallet.generate(interval=(0, 3), private=False)
+        )
+        for bip in data:
+            self.assertNotIn("prv", data[bip]["account_extended_keys"])
             for group in data[bip]["groups"]:
                 self.assertEqual(len(group), 3)
+        self.assertNotIn(mnemonic, mock_stdout.getvalue())
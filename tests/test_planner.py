@@ -0,0 +1,117 @@
+import unittest
+
+from btc_hd_wallet.bip32 import HARDENED
+from btc_hd_wallet.paper_wallet import PaperWallet
+from btc_hd_wallet.planner import (
+    DerivationSpec, DerivationPlanner, parse_range
+)
+
+
+class TestDerivationPlanner(unittest.TestCase):
+    mnemonic = (
+        "vast tell razor drip stick one engine action "
+        "width sport else try scare phone blouse view "
+        "program ketchup pole rapid use length student raven"
+    )
+    wallet = PaperWallet.from_mnemonic(mnemonic=mnemonic)
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range("0-20"), (0, 20))
+        self.assertEqual(parse_range("5"), (5, 6))
+        for invalid in ["10-5", "3-3", "-1", "a-b"]:
+            with self.assertRaises(ValueError):
+                parse_range(invalid)
+
+    def test_spec_parse(self):
+        spec = DerivationSpec.parse("84:0-10:0,1:0-20")
+        self.assertEqual(
+            spec,
+            DerivationSpec(
+                purpose=84, accounts=(0, 10), chains=(0, 1), interval=(0, 20)
+            )
+        )
+        self.assertEqual(str(spec), "84:0-10:0,1:0-20")
+        for invalid in ["85:0:0:0-20", "84:0:2:0-20", "84:0:0", "84:0:0:0:0"]:
+            with self.assertRaises(ValueError):
+                DerivationSpec.parse(invalid)
+
+    def test_nodes_derived_once(self):
+        # fresh wallet - children of shared wallet depend on test order
+        wallet = PaperWallet.from_mnemonic(mnemonic=self.mnemonic)
+        planner = DerivationPlanner(wallet=wallet)
+        planner.tasks(specs=[
+            DerivationSpec.parse("84:0-3:0,1:0-1"),
+            DerivationSpec.parse("49:0-2:0:0-1"),
+        ])
+        # master + 2 purposes + 2 coins + 5 accounts + 8 chains
+        self.assertEqual(len(planner.cache), 18)
+        self.assertEqual(len(wallet.master.children), 2)
+
+    def test_run_matches_generate(self):
+        generated = self.wallet.generate(account=1, interval=(0, 5))
+        planned = self.wallet.plan(specs=[
+            DerivationSpec.parse("44:0-2:0:0-5"),
+            DerivationSpec.parse("84:1:0:0-5"),
+        ])
+        self.assertEqual(sorted(planned), ["BIP44", "BIP84"])
+        self.assertEqual(len(planned["BIP44"]), 2)
+        self.assertEqual(planned["BIP44"][1], generated["BIP44"])
+        self.assertEqual(planned["BIP84"][0], generated["BIP84"])
+
+    def test_run_chains(self):
+        planned = self.wallet.plan(specs=[DerivationSpec.parse("84:0:0,1:0-3")])
+        groups = planned["BIP84"][0]["groups"]
+        self.assertEqual(
+            [group[0] for group in groups],
+            [
+                "m/84'/0'/0'/0/0", "m/84'/0'/0'/0/1", "m/84'/0'/0'/0/2",
+                "m/84'/0'/0'/1/0", "m/84'/0'/0'/1/1", "m/84'/0'/0'/1/2",
+            ]
+        )
+        self.assertEqual(
+            groups[3][1], self.wallet.p2wpkh_address(
+                node=self.wallet.by_path("m/84'/0'/0'/1/0")
+            )
+        )
+
+    def test_run_workers(self):
+        specs = [DerivationSpec.parse("49:0-2:0,1:0-3")]
+        serial = self.wallet.plan(specs=specs)
+        parallel = self.wallet.plan(specs=specs, workers=2)
+        self.assertEqual(serial, parallel)
+
+    def test_run_fields(self):
+        specs = [DerivationSpec.parse("86:0:0,1:0-3")]
+        full = self.wallet.plan(specs=specs)["BIP86"][0]
+        planned = self.wallet.plan(
+            specs=specs, fields=("address", "path")
+        )["BIP86"][0]
+        self.assertEqual(
+            planned["groups"],
+            [[group[1], group[0]] for group in full["groups"]]
+        )
+        self.assertEqual(
+            planned["account_extended_keys"], full["account_extended_keys"]
+        )
+        planned = self.wallet.plan(
+            specs=specs, fields=("wif",), workers=2
+        )["BIP86"][0]
+        self.assertEqual(
+            planned["groups"], [group[3:] for group in full["groups"]]
+        )
+        for invalid in [(), ("xpub",)]:
+            with self.assertRaises(ValueError):
+                self.wallet.plan(specs=specs, fields=invalid)
+        with self.assertRaises(ValueError):
+            self.wallet.plan(specs=specs, private=False, fields=("wif",))
+
+    def test_leaf_task_neutered(self):
+        planner = DerivationPlanner(
+            wallet=PaperWallet.from_mnemonic(mnemonic=self.mnemonic),
+            fields=("path", "address")
+        )
+        _, task = planner.tasks(specs=[DerivationSpec.parse("84:0:0:0-1")])[0]
+        self.assertFalse(task.private)
+        self.assertEqual(task.node().key, planner.node([
+            84 + HARDENED, HARDENED, HARDENED, 0
+        ]).public_key.sec())
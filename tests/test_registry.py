@@ -0,0 +1,71 @@
+import unittest
+
+from btc_hd_wallet.base_wallet import BaseWallet
+from btc_hd_wallet.registry import WatchOnlyRegistry
+
+
+class TestWatchOnlyRegistry(unittest.TestCase):
+    mnemonic = (
+        "vast tell razor drip stick one engine action "
+        "width sport else try scare phone blouse view "
+        "program ketchup pole rapid use length student raven"
+    )
+    wallet = BaseWallet.from_mnemonic(mnemonic=mnemonic)
+    xpub = "xpub6CEGxdGrXswtcL6Hqo1L3wwzDBuRzQvQfUa5PZponbX7ibNWUKkhp1LaNHMg9oJYjjRmbxArwDUjpudAvmNDRG8LGwYb9YvnkEfMY3eGdTP"
+    zpub = "zpub6rjjS2aQooWinBYsKESH2q8LMMgGhVnpnYV8uvxNxotQfU6NBsf2rAUwm7AtMfBkVywW7baLLKcQ5CZ2vfGCCSpQ8gb2F9rkNUuEnFKmobk"
+
+    def test_add_deduplicates(self):
+        registry = WatchOnlyRegistry()
+        wid = registry.add(self.zpub, wallet_id="alice")
+        self.assertEqual(wid, "alice")
+        self.assertEqual(registry.add(self.zpub, wallet_id="bob"), "alice")
+        self.assertEqual(registry.add(self.xpub), "a69c17a7")
+        self.assertEqual(len(registry), 2)
+        with self.assertRaises(ValueError):
+            registry.add(self.wallet.master)
+        with self.assertRaises(ValueError):
+            registry.add(self.wallet.master.extended_private_key())
+
+    def test_schedule_round_robin(self):
+        registry = WatchOnlyRegistry(chains=(0,), chunk_size=5)
+        registry.add(self.zpub, wallet_id="a")
+        registry.add(self.xpub, wallet_id="b", priority=1)
+        tasks = registry.schedule(n=10)
+        self.assertEqual(
+            [(t.wallet_id, t.interval) for t in tasks],
+            [
+                ("b", (0, 5)), ("a", (0, 5)),
+                ("b", (5, 10)), ("a", (5, 10)),
+            ]
+        )
+
+    def test_ensure_derived(self):
+        registry = WatchOnlyRegistry(chunk_size=3)
+        registry.add(self.zpub, wallet_id="zpub")
+        registry.add(self.xpub, wallet_id="xpub")
+        self.assertEqual(registry.ensure_derived(n=4), 16)
+        self.assertEqual(registry.derived()["zpub"], {0: 4, 1: 4})
+        # already derived - nothing to do
+        self.assertEqual(registry.ensure_derived(n=4), 0)
+        self.assertEqual(registry.ensure_derived(n=5), 4)
+
+        for path, wallet_id, addr_fnc in (
+            ("m/84'/0'/0'", "zpub", self.wallet.p2wpkh_address),
+            ("m/44'/0'/0'", "xpub", self.wallet.p2pkh_address),
+        ):
+            for chain in (0, 1):
+                for i in range(5):
+                    node = self.wallet.by_path("{}/{}/{}".format(path, chain, i))
+                    self.assertEqual(
+                        registry.lookup(addr_fnc(node)), (wallet_id, chain, i)
+                    )
+        self.assertIsNone(registry.lookup("1BitcoinEaterAddressDontSendf59kuE"))
+
+    def test_ensure_derived_workers(self):
+        serial = WatchOnlyRegistry(chunk_size=2)
+        serial.add(self.zpub)
+        serial.ensure_derived(n=5)
+        with WatchOnlyRegistry(chunk_size=2, workers=2) as parallel:
+            parallel.add(self.zpub)
+            parallel.ensure_derived(n=5)
+            self.assertEqual(serial.lookup_table, parallel.lookup_table)
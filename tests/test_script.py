@@ -3,7 +3,9 @@ from io import BytesIO
 
 from btc_hd_wallet.helper import hash160, sha256
 from btc_hd_wallet.script import (
-    Script, p2sh_script, p2pkh_script, p2wpkh_script, p2wsh_script
+    Script, p2sh_script, p2pkh_script, p2wpkh_script, p2wsh_script,
+    iter_cmds, iter_scripts, classify, classify_many, classified_address,
+    match_programs
 )
 
 
@@ -66,3 +68,158 @@ class TestScript(unittest.TestCase):
 
         with self.assertRaises(ValueError):
             Script([521 * b"\x00"]).serialize()
+
+    def test_serialize_push_boundaries(self):
+        for length, header in (
+            (1, "01"), (75, "4b"), (76, "4c4c"), (255, "4cff"),
+            (256, "4d0001"), (520, "4d0802")
+        ):
+            element = length * b"\x01"
+            raw = Script([element, 0xac]).raw_serialize()
+            self.assertEqual(raw, bytes.fromhex(header) + element + b"\xac")
+            script = Script.parse(BytesIO(Script([element, 0xac]).serialize()))
+            self.assertEqual(script.cmds, [element, 0xac])
+
+    def test_from_template(self):
+        h160 = bytes.fromhex("6c743a71b8899dcd30882f5affa712e130339866")
+        h256 = sha256(h160)
+        sec = bytes.fromhex("020bf81062796b773dcb4055dfab420ef92fa95ebd92426a994a464dec5b321004")
+        for script_type, data, cmds in (
+            ("p2pkh", h160, [0x76, 0xa9, h160, 0x88, 0xac]),
+            ("p2sh", h160, [0xa9, h160, 0x87]),
+            ("p2wpkh", h160, [0x00, h160]),
+            ("p2wsh", h256, [0x00, h256]),
+            ("multisig_1of1", sec, [0x51, sec, 0x51, 0xae]),
+        ):
+            script = Script.from_template(script_type=script_type, data=data)
+            self.assertEqual(script, Script(cmds))
+            self.assertEqual(script.raw_serialize(), Script(cmds).raw_serialize())
+            self.assertEqual(script.serialize(), Script(cmds).serialize())
+
+        with self.assertRaises(ValueError):
+            Script.from_template(script_type="p2pk", data=sec)
+        with self.assertRaises(ValueError):
+            Script.from_template(script_type="p2wsh", data=h160)
+
+    def test_modified_template_serialize(self):
+        h160 = bytes.fromhex("6c743a71b8899dcd30882f5affa712e130339866")
+        script = p2wpkh_script(h160)
+        script.cmds.append(0x87)
+        self.assertEqual(script, Script([0x00, h160, 0x87]))
+        self.assertEqual(
+            script.serialize(), Script([0x00, h160, 0x87]).serialize()
+        )
+        script.cmds = [0xa9, h160, 0x87]
+        self.assertEqual(script.serialize(), p2sh_script(h160).serialize())
+
+    def test_iter_cmds(self):
+        h160 = bytes.fromhex("6c743a71b8899dcd30882f5affa712e130339866")
+        raw = p2pkh_script(h160=h160).raw_serialize()
+        cmds = list(iter_cmds(raw))
+        self.assertEqual(
+            [op_code for op_code, _ in cmds], [0x76, 0xa9, 0x14, 0x88, 0xac]
+        )
+        self.assertIsInstance(cmds[2][1], memoryview)
+        self.assertEqual(cmds[2][1], h160)
+        self.assertIsNone(cmds[0][1])
+
+        raw = Script([76 * b"\x00", 257 * b"\x01"]).raw_serialize()
+        self.assertEqual(
+            [(op, bytes(data)) for op, data in iter_cmds(raw)],
+            [(76, 76 * b"\x00"), (77, 257 * b"\x01")]
+        )
+        for invalid in ["14" + 19 * "00", "4c", "4d01", "4c0500"]:
+            with self.assertRaises(SyntaxError):
+                list(iter_cmds(bytes.fromhex(invalid)))
+
+    def test_parse_view_and_many(self):
+        h160 = bytes.fromhex("6c743a71b8899dcd30882f5affa712e130339866")
+        scripts = [
+            p2pkh_script(h160=h160),
+            p2wpkh_script(h160=h160),
+            p2wsh_script(h256=sha256(h160)),
+            Script([300 * b"\x01", 0x6a]),
+        ]
+        buf = b"".join(script.serialize() for script in scripts)
+        script, offset = Script.parse_view(buf)
+        self.assertEqual(script, scripts[0])
+        self.assertEqual(offset, len(scripts[0].serialize()))
+        self.assertIsInstance(script.cmds[2], memoryview)
+
+        parsed = Script.parse_many(buf)
+        self.assertEqual(parsed, scripts)
+        self.assertEqual(
+            [script.raw_serialize() for script in parsed],
+            [script.raw_serialize() for script in scripts]
+        )
+        self.assertEqual(
+            [bytes(raw) for raw in iter_scripts(buf)],
+            [script.raw_serialize() for script in scripts]
+        )
+        with self.assertRaises(SyntaxError):
+            Script.parse_many(buf[:-1])
+        with self.assertRaises(SyntaxError):
+            list(iter_scripts(buf[:-1]))
+
+    def test_classify(self):
+        h160 = bytes.fromhex("6c743a71b8899dcd30882f5affa712e130339866")
+        h256 = sha256(h160)
+        for script, script_type, program in (
+            (p2pkh_script(h160=h160), "p2pkh", h160),
+            (p2sh_script(h160=h160), "p2sh", h160),
+            (p2wpkh_script(h160=h160), "p2wpkh", h160),
+            (p2wsh_script(h256=h256), "p2wsh", h256),
+            (Script([0x51, h256]), "p2tr", h256),
+        ):
+            self.assertEqual(
+                classify(script.raw_serialize()), (script_type, program)
+            )
+        for script in (
+            Script([0x76, 0xa9, h160, 0x88, 0xad]),
+            Script([0xa9, h160, 0x88]),
+            Script([0x51, h160]),
+            Script([0x52, h256]),
+            Script([0x6a, h160]),
+            Script(),
+        ):
+            self.assertEqual(
+                classify(script.raw_serialize()), ("nonstandard", None)
+            )
+
+    def test_classify_many_and_match(self):
+        h160 = bytes.fromhex("6c743a71b8899dcd30882f5affa712e130339866")
+        h256 = sha256(h160)
+        scripts = [
+            p2wpkh_script(h160=h160),
+            Script([0x6a, h160]),
+            p2wsh_script(h256=h256),
+            p2sh_script(h160=h160),
+        ]
+        raw = [script.raw_serialize() for script in scripts]
+        expected = [
+            ("p2wpkh", h160), ("nonstandard", None), ("p2wsh", h256),
+            ("p2sh", h160)
+        ]
+        self.assertEqual(classify_many(raw), expected)
+        buf = b"".join(script.serialize() for script in scripts)
+        self.assertEqual(classify_many(buf), expected)
+        self.assertEqual(
+            match_programs(buf, {h160: "wallet-1"}),
+            [(0, "p2wpkh", "wallet-1"), (3, "p2sh", "wallet-1")]
+        )
+
+    def test_classified_address(self):
+        h160 = bytes.fromhex("6c743a71b8899dcd30882f5affa712e130339866")
+        script_type, program = classify(p2wpkh_script(h160=h160).raw_serialize())
+        self.assertEqual(
+            classified_address(script_type=script_type, program=program),
+            "bc1qd36r5udc3xwu6vyg9ad0lfcjuycr8xrxuhw660"
+        )
+        # BIP350 test vector
+        program = bytes.fromhex("79be667ef9dcbbac55a06295ce870b07029bfcdb2dce28d959f2815b16f81798")
+        self.assertEqual(
+            classified_address(script_type="p2tr", program=program),
+            "bc1p0xlxvlhemja6c4dqv22uapctqupfhlxm9h8z3k2e72q4k9hcz7vqzk5jj0"
+        )
+        with self.assertRaises(ValueError):
+            classified_address(script_type="nonstandard", program=b"")
@@ -0,0 +1,156 @@
+import random
+import unittest
+
+import ecdsa
+
+from btc_hd_wallet.bip32 import PrvKeyNode, PubKeyNode, HARDENED
+from btc_hd_wallet.secp256k1 import (
+    CURVE_ORDER, LAMBDA, BETA, FIELD_ORDER, GX, GY, INFINITY, compress,
+    decompress, to_affine, fixed_base_mul, point_mul, double_mul, glv_split,
+    wnaf, batch_to_affine, jacobian_add, jacobian_double, inverse,
+    batch_inverse
+)
+
+
+G = ecdsa.SECP256k1.generator
+RNG = random.Random(44)
+SCALARS = [
+    1, 2, 3, 15, 16, 17, CURVE_ORDER - 1, CURVE_ORDER // 2, LAMBDA,
+    2 ** 128, 2 ** 255 + 19
+] + [RNG.randrange(1, CURVE_ORDER) for _ in range(20)]
+
+
+def ecdsa_sec(secret: int) -> bytes:
+    """SEC public key computed by ecdsa."""
+    return ecdsa.SigningKey.from_secret_exponent(
+        secexp=secret, curve=ecdsa.SECP256k1
+    ).get_verifying_key().to_string(encoding="compressed")
+
+
+class TestSecp256k1(unittest.TestCase):
+    scalars = SCALARS
+    rng = RNG
+
+    def test_constants(self):
+        self.assertEqual((GX, GY), (G.x(), G.y()))
+        self.assertEqual(CURVE_ORDER, G.order())
+        self.assertEqual(FIELD_ORDER, ecdsa.SECP256k1.curve.p())
+        point = G * LAMBDA
+        self.assertEqual((point.x(), point.y()), (BETA * GX % FIELD_ORDER, GY))
+
+    def test_fixed_base_mul(self):
+        for k in self.scalars:
+            point = G * k
+            self.assertEqual(
+                to_affine(*fixed_base_mul(k)), (point.x(), point.y())
+            )
+        self.assertEqual(fixed_base_mul(0)[2], 0)
+        self.assertEqual(fixed_base_mul(CURVE_ORDER)[2], 0)
+
+    def test_point_mul(self):
+        base = G * self.rng.randrange(1, CURVE_ORDER)
+        for k in self.scalars:
+            point = base * k
+            self.assertEqual(
+                to_affine(*point_mul(k, base.x(), base.y())),
+                (point.x(), point.y())
+            )
+        self.assertEqual(point_mul(0, base.x(), base.y())[2], 0)
+        self.assertEqual(point_mul(CURVE_ORDER, base.x(), base.y())[2], 0)
+
+    def test_double_mul(self):
+        base = G * self.rng.randrange(1, CURVE_ORDER)
+        for u1, u2 in zip(self.scalars, reversed(self.scalars)):
+            point = G * u1 + base * u2
+            self.assertEqual(
+                to_affine(*double_mul(u1, u2, base.x(), base.y())),
+                (point.x(), point.y())
+            )
+        # u1 * G + (-u1) * G
+        self.assertEqual(double_mul(5, CURVE_ORDER - 5, GX, GY)[2], 0)
+
+    def test_jacobian(self):
+        a = fixed_base_mul(7)
+        b = fixed_base_mul(9)
+        self.assertEqual(
+            to_affine(*jacobian_add(*a, *b)), to_affine(*fixed_base_mul(16))
+        )
+        self.assertEqual(
+            to_affine(*jacobian_add(*a, *a)), to_affine(*jacobian_double(*a))
+        )
+        self.assertEqual(jacobian_add(*INFINITY, *a), a)
+        self.assertEqual(
+            jacobian_add(*a, *fixed_base_mul(CURVE_ORDER - 7))[2], 0
+        )
+        points = [fixed_base_mul(k) for k in (1, 2, 3)]
+        self.assertEqual(
+            batch_to_affine(points), [to_affine(*p) for p in points]
+        )
+
+    def test_glv_split(self):
+        for k in self.scalars:
+            k1, k2 = glv_split(k)
+            self.assertEqual((k1 + k2 * LAMBDA - k) % CURVE_ORDER, 0)
+            self.assertLess(abs(k1), 2 ** 129)
+            self.assertLess(abs(k2), 2 ** 129)
+
+    def test_wnaf(self):
+        for k in self.scalars:
+            digits = wnaf(k, width=5)
+            self.assertEqual(sum(d << i for i, d in enumerate(digits)), k)
+            for i, d in enumerate(digits):
+                if d:
+                    self.assertEqual(d % 2, 1)
+                    self.assertLess(abs(d), 16)
+                    self.assertFalse(any(digits[i + 1:i + 5]))
+        self.assertEqual(wnaf(0), [])
+
+    def test_inverse(self):
+        for modulus in [CURVE_ORDER, FIELD_ORDER]:
+            for k in self.scalars:
+                self.assertEqual(k * inverse(k, modulus) % modulus, 1)
+            for invalid in [0, modulus, 2 * modulus]:
+                with self.assertRaises(ValueError):
+                    inverse(invalid, modulus)
+            with self.assertRaises(ValueError):
+                batch_inverse([1, 2, 0, 3], modulus)
+        self.assertEqual(batch_inverse([1, 2, 3], 7), [1, 4, 5])
+
+    def test_compression(self):
+        for k in self.scalars:
+            sec = ecdsa_sec(k)
+            point = G * k
+            self.assertEqual(decompress(sec), (point.x(), point.y()))
+            self.assertEqual(compress(point.x(), point.y()), sec)
+            uncompressed = b"\x04" + point.x().to_bytes(32, "big") + \
+                point.y().to_bytes(32, "big")
+            self.assertEqual(decompress(uncompressed), (point.x(), point.y()))
+        for invalid in [b"\x02" + bytes(32), b"\x04" + bytes(64),
+                        b"\x05" + bytes(32), bytes(33)[:20]]:
+            with self.assertRaises(ValueError):
+                decompress(invalid)
+
+    def test_bip32_vectors(self):
+        # public keys of BIP32 test vectors 1 and 2 derived by engine
+        # are pinned against ecdsa (private and public derivation)
+        seeds = [
+            ("000102030405060708090a0b0c0d0e0f",
+             [HARDENED, 1, HARDENED + 2, 2, 1000000000]),
+            ("fffcf9f6f3f0edeae7e4e1dedbd8d5d2cfccc9c6c3c0bdbab7b4b1aeaba8a5a2"
+             "9f9c999693908d8a8784817e7b7875726f6c696663605d5a5754514e4b484542",
+             [0, HARDENED + 2147483647, 1, HARDENED + 2147483646, 2]),
+        ]
+        for seed, path in seeds:
+            node = PrvKeyNode.master_key(bip39_seed=bytes.fromhex(seed))
+            for index in path:
+                secret = int.from_bytes(node.key, "big")
+                self.assertEqual(node.public_key.sec(), ecdsa_sec(secret))
+                self.assertEqual(node.public_key_sec(), ecdsa_sec(secret))
+                child = node.ckd(index=index)
+                if index < HARDENED:
+                    pub = PubKeyNode.parse(s=node.extended_public_key())
+                    self.assertEqual(
+                        pub.ckd(index=index).key,
+                        ecdsa_sec(int.from_bytes(child.key, "big"))
+                    )
+                node = child
@@ -0,0 +1,153 @@
+import os
+import json
+import lzma
+import tempfile
+import unittest
+from unittest import mock
+
+from btc_hd_wallet.paper_wallet import PaperWallet
+from btc_hd_wallet.planner import DerivationSpec
+from btc_hd_wallet.address_pipeline import sec_buffer
+from btc_hd_wallet import shard
+from btc_hd_wallet.shard import (
+    plan_job, job_digest, shards, shard_paths, run_shard, run_shards,
+    merge_shards
+)
+
+
+class TestShardedExport(unittest.TestCase):
+    mnemonic = (
+        "vast tell razor drip stick one engine action "
+        "width sport else try scare phone blouse view "
+        "program ketchup pole rapid use length student raven"
+    )
+    wallet = PaperWallet.from_mnemonic(mnemonic=mnemonic)
+    specs = [
+        DerivationSpec.parse("84:0-2:0,1:0-5"),
+        DerivationSpec.parse("86:3-4:0:2-4"),
+    ]
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def expected_rows(self):
+        data = self.wallet.plan(specs=self.specs, private=False)
+        return [
+            group
+            for bip in ("BIP84", "BIP86")
+            for account in data[bip]
+            for group in account["groups"]
+        ]
+
+    def test_plan_job(self):
+        job = plan_job(wallet=self.wallet, specs=self.specs, shard_size=3)
+        self.assertNotIn("prv", json.dumps(job))
+        self.assertEqual(
+            [a["path"] for a in job["accounts"]],
+            ["m/84'/0'/0'", "m/84'/0'/1'", "m/86'/0'/3'"]
+        )
+        self.assertEqual(job["fields"], ["path", "address", "sec"])
+        # deterministic - same job and shards on every machine
+        self.assertEqual(
+            job_digest(job),
+            job_digest(plan_job(self.wallet, self.specs, shard_size=3))
+        )
+        self.assertEqual(
+            [(s[1], s[4], s[5]) for s in shards(job)[:3]],
+            [(0, 0, (0, 3)), (0, 0, (3, 5)), (0, 1, (0, 3))]
+        )
+        self.assertEqual(len(shards(job)), 9)
+        with self.assertRaises(ValueError):
+            plan_job(self.wallet, self.specs, fields=("path", "wif"))
+
+    def test_run_and_merge(self):
+        job = plan_job(wallet=self.wallet, specs=self.specs, shard_size=3)
+        # shards run independently (in any order) from job alone
+        run_shards(job=job, directory=self.dir, shard_ids=[8, 2, 0])
+        output = os.path.join(self.dir, "out.jsonl")
+        with self.assertRaises(ValueError):
+            merge_shards(job=job, directory=self.dir, output=output)
+        run_shards(job=job, directory=self.dir, workers=2)
+        summary = merge_shards(job=job, directory=self.dir, output=output)
+        self.assertEqual(summary["shards"], 9)
+        self.assertEqual(summary["rows"], 22)
+        with open(output) as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(rows, self.expected_rows())
+
+        compressed = os.path.join(self.dir, "out.jsonl.xz")
+        self.assertEqual(
+            merge_shards(job=job, directory=self.dir, output=compressed),
+            summary
+        )
+        with lzma.open(compressed, "rt") as f:
+            self.assertEqual([json.loads(line) for line in f], rows)
+
+        table = os.path.join(self.dir, "out.sec")
+        merge_shards(job=job, directory=self.dir, output=table, fmt="sec")
+        with open(table, "rb") as f:
+            self.assertEqual(
+                f.read(), sec_buffer(bytes.fromhex(r[2]) for r in rows)
+            )
+
+        # corrupted shard is detected and re-derived
+        file_path, _ = shard_paths(self.dir, 4)
+        with open(file_path, "ab") as f:
+            f.write(b"\n")
+        with self.assertRaises(ValueError):
+            merge_shards(
+                job=job, directory=self.dir,
+                output=os.path.join(self.dir, "other.jsonl")
+            )
+        run_shard(job=job, shard_id=4, directory=self.dir)
+        self.assertEqual(
+            merge_shards(
+                job=job, directory=self.dir,
+                output=os.path.join(self.dir, "other.jsonl")
+            )["sha256"],
+            summary["sha256"]
+        )
+        # shards of different job are rejected
+        other = plan_job(wallet=self.wallet, specs=self.specs, shard_size=4)
+        with self.assertRaises(ValueError):
+            merge_shards(
+                job=other, directory=self.dir,
+                output=os.path.join(self.dir, "x.jsonl")
+            )
+
+    def test_shard_id_range(self):
+        job = plan_job(wallet=self.wallet, specs=self.specs, shard_size=3)
+        for shard_id in (-1, 9, 100):
+            with self.assertRaises(ValueError):
+                run_shard(job=job, shard_id=shard_id, directory=self.dir)
+        with self.assertRaises(ValueError):
+            run_shards(job=job, directory=self.dir, shard_ids=[0, -1])
+        # nothing is derived if any shard number is out of range
+        self.assertEqual(os.listdir(self.dir), [])
+        with self.assertRaises(ValueError):
+            plan_job(wallet=self.wallet, specs=self.specs, shard_size=0)
+
+    def test_shard_changed_during_merge(self):
+        job = plan_job(wallet=self.wallet, specs=self.specs, shard_size=3)
+        run_shards(job=job, directory=self.dir)
+        output = os.path.join(self.dir, "out.jsonl")
+        verify = shard.verify_shard
+
+        def verify_then_tamper(job, shard_id, directory):
+            digest = verify(job=job, shard_id=shard_id, directory=directory)
+            if shard_id == 5:
+                # shard is modified after it was verified
+                file_path, _ = shard_paths(directory, shard_id)
+                with open(file_path, "ab") as f:
+                    f.write(b"[]\n")
+            return digest
+
+        with mock.patch.object(shard, "verify_shard",
+                               side_effect=verify_then_tamper):
+            with self.assertRaises(ValueError):
+                merge_shards(job=job, directory=self.dir, output=output)
+        self.assertFalse(os.path.exists(output))